@@ -0,0 +1,64 @@
+from collections import deque
+
+import numpy as np
+
+# Epoka anteny pomocniczej liczy się do głosowania, gdy jej buffcnt jest w tym oknie od epoki anteny głównej
+FUSION_WINDOW_SEC = 1.0
+# Ile anten (razem z główną) musi widzieć problem nawigacyjny, by potwierdzić atak od razu
+FUSION_MIN_AGREE = 2
+
+
+class AntennaNavState:
+    """Flagi nawigacyjne jednej anteny pomocniczej - jak check_jamming_conditions anteny głównej
+    (F2 spadek C/N0 względem mediany historii, F4 wysokość), te same progi, własna historia C/N0.
+    """
+
+    __slots__ = ('cn0_drop_db', 'hgt_max', 'cn0_history', 'buffcnt', 'flagged', 'epochs')
+
+    def __init__(self, cn0_drop_db, hgt_max):
+        self.cn0_drop_db = cn0_drop_db
+        self.hgt_max = hgt_max
+        self.cn0_history = deque(maxlen=100)
+        self.buffcnt = None
+        self.flagged = False
+        self.epochs = 0
+
+    def update(self, buffcnt, nsat, hgt, snr_values):
+        """Epoka anteny (snr_values - tablica NumPy). Zwraca flagę problemu nawigacyjnego."""
+        cn0_avg = float(np.mean(snr_values)) if len(snr_values) else 0.0
+
+        flag_f2 = False
+        if len(self.cn0_history) > 40:
+            flag_f2 = cn0_avg < np.median(self.cn0_history) - self.cn0_drop_db
+        nav_issue = abs(hgt) > self.hgt_max and nsat > 0
+
+        self.flagged = bool(flag_f2 or nav_issue)
+        if not self.flagged and cn0_avg > 0:
+            self.cn0_history.append(cn0_avg)
+        self.buffcnt = buffcnt
+        self.epochs += 1
+        return self.flagged
+
+
+class AntennaFusion:
+    """Głosowanie anten pomocniczych przy epoce anteny głównej (wyrównanie po buffcnt).
+
+    Nagrania anten są zsynchronizowane, więc ten sam buffcnt to ta sama chwila. Antena bez
+    epoki w oknie window_samples (dekoder w tyle albo bez fixa) nie głosuje.
+    """
+
+    def __init__(self, states, window_samples):
+        self.states = states
+        self.window_samples = window_samples
+
+    def votes(self, buffcnt):
+        """(liczba anten pomocniczych z problemem, liczba anten z aktualną epoką)."""
+        agree = 0
+        fresh = 0
+        for state in self.states:
+            if state.buffcnt is None or abs(state.buffcnt - buffcnt) > self.window_samples:
+                continue
+            fresh += 1
+            if state.flagged:
+                agree += 1
+        return agree, fresh
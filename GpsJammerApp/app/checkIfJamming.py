@@ -1,110 +1,211 @@
 import numpy as np
 import sys
 import os
+import csv
+import glob
+import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .power_scan import load_or_scan_power_profile, resolve_scan_workers, high_power_runs, count_power_chunks
+except ImportError:
+    from power_scan import load_or_scan_power_profile, resolve_scan_workers, high_power_runs, count_power_chunks
+# skrypty/ jest w sys.path po imporcie power_scan
+from iq_io import IQFile
+from change_point import refine_intervals
 
 CHUNK_SIZE_BYTES = 131072
+# Sugerowany próg = mediana mocy chunków * CALIBRATION_FACTOR
+CALIBRATION_FACTOR = 4.8
+CALIBRATION_PERCENTILES = (5, 25, 75, 95, 99)
 
-def analyze_chunk_power(
-    raw_uint8_chunk: np.ndarray, 
-    power_threshold: float
-) -> tuple[bool, float]:
-    
-    if raw_uint8_chunk.size % 2 != 0 or raw_uint8_chunk.size == 0:
-        return False, 0.0
+# Tryb wsadowy: rozszerzenia nagrań szukanych w katalogu
+BATCH_EXTENSIONS = ('.bin', '.iq')
+SAMPLE_RATE_HZ = 2048000
 
-    iq_samples_f32 = (raw_uint8_chunk.astype(np.float32) - 127.5)
-    iq_complex = iq_samples_f32[0::2] + 1j * iq_samples_f32[1::2]
-    average_power = np.mean(np.abs(iq_complex)**2)
-    is_jamming_now = average_power > power_threshold
-    
-    return is_jamming_now, average_power
+def power_events_from_profile(powers: np.ndarray, power_threshold: float, total_samples: int,
+                              file_path: str = None) -> list:
+    """Zdarzenia (start, koniec) w próbkach; z file_path granice są doprecyzowane co do próbki."""
+    samples_per_chunk = CHUNK_SIZE_BYTES // 2
+    starts, ends = high_power_runs(powers > power_threshold)
+    if file_path is not None and len(starts):
+        return refine_intervals(IQFile(file_path, 'uint8'), starts, ends, samples_per_chunk, powers)
+    return [
+        (int(s) * samples_per_chunk, min(int(e) * samples_per_chunk, total_samples))
+        for s, e in zip(starts, ends)
+    ]
 
-def analyze_file_for_jamming(file_path: str, power_threshold: float) -> list:
-    current_jamming_state = False 
-    total_samples_processed = 0
-    jamming_events = [] 
-    current_jamming_start = None
-    
+def analyze_file_for_jamming(file_path: str, power_threshold: float, workers: int = 1, use_cache: bool = True) -> list:
     try:
-        with open(file_path, 'rb') as f:
-            while True:
-                raw_bytes = f.read(CHUNK_SIZE_BYTES)
-                if not raw_bytes:
-                    break
-                
-                raw_chunk_uint8 = np.frombuffer(raw_bytes, dtype=np.uint8)
-                num_new_samples_in_chunk = raw_chunk_uint8.size // 2
-                
-                if num_new_samples_in_chunk == 0:
-                    continue 
-
-                is_jamming_now, avg_power = analyze_chunk_power(
-                    raw_chunk_uint8,
-                    power_threshold 
-                )
-                
-                was_jamming_previously = current_jamming_state
-                timestamp_sample = total_samples_processed
-
-                if is_jamming_now and not was_jamming_previously:
-                    current_jamming_start = timestamp_sample
-                
-                elif not is_jamming_now and was_jamming_previously:
-                    if current_jamming_start is not None:
-                        jamming_events.append((current_jamming_start, timestamp_sample))
-                        current_jamming_start = None
-
-                current_jamming_state = is_jamming_now
-                total_samples_processed += num_new_samples_in_chunk
-
-        if current_jamming_state and current_jamming_start is not None:
-            jamming_events.append((current_jamming_start, total_samples_processed))
-            
-        return jamming_events
+        powers = load_or_scan_power_profile(file_path, CHUNK_SIZE_BYTES, workers=workers, use_cache=use_cache)
+        total_samples = os.path.getsize(file_path) // 2
+        return power_events_from_profile(powers, power_threshold, total_samples, file_path)
         
     except Exception as e:
         print(f"Błąd podczas analizy pliku: {e}")
         return []
 
-def calibrate_file(file_path: str):
-    power_values = []
-    
+def calibration_stats(file_path: str, workers: int = 1, use_cache: bool = True,
+                      stop_check=None, progress_callback=None):
+    """Statystyki mocy chunków pliku i sugerowany próg.
+
+    Zwraca słownik (median, min, max, mean, percentiles {p: wartość}, num_chunks,
+    suggested_threshold) albo None, gdy plik jest pusty lub kalibrację przerwano.
+    Mapa mocy jest brana z cache, jeśli istnieje.
+    """
+    powers = load_or_scan_power_profile(
+        file_path, CHUNK_SIZE_BYTES, stop_check=stop_check, progress_callback=progress_callback,
+        workers=workers, use_cache=use_cache
+    )
+    expected = count_power_chunks(os.path.getsize(file_path), CHUNK_SIZE_BYTES)
+    if len(powers) == 0 or len(powers) != expected:
+        return None
+
+    all_powers_np = np.asarray(powers, dtype=np.float64)
+    noise_floor_median = float(np.median(all_powers_np))
+    percentile_values = np.percentile(all_powers_np, CALIBRATION_PERCENTILES)
+    return {
+        'median': noise_floor_median,
+        'min': float(np.min(all_powers_np)),
+        'max': float(np.max(all_powers_np)),
+        'mean': float(np.mean(all_powers_np)),
+        'percentiles': {p: float(v) for p, v in zip(CALIBRATION_PERCENTILES, percentile_values)},
+        'num_chunks': len(all_powers_np),
+        'suggested_threshold': noise_floor_median * CALIBRATION_FACTOR,
+    }
+
+def calibrate_file(file_path: str, workers: int = 1, use_cache: bool = True):
     try:
-        with open(file_path, 'rb') as f:
-            while True:
-                raw_bytes = f.read(CHUNK_SIZE_BYTES)
-                if not raw_bytes:
-                    break
-                
-                raw_chunk_uint8 = np.frombuffer(raw_bytes, dtype=np.uint8)
-                _, avg_power = analyze_chunk_power(raw_chunk_uint8, 0.0)
-                
-                if avg_power == 0.0 and raw_chunk_uint8.size == 0:
-                    continue
-                    
-                power_values.append(avg_power)
+        stats = calibration_stats(file_path, workers=workers, use_cache=use_cache)
 
         print("--- Kalibracja zakończona ---")
         
-        if not power_values:
+        if stats is None:
             print("Plik jest pusty lub nie zawiera poprawnych danych.")
             return
 
-        all_powers_np = np.array(power_values)
-        noise_floor_median = np.median(all_powers_np)
-        suggested_threshold = noise_floor_median * 4.8
+        suggested_threshold = stats['suggested_threshold']
         
         print("\n--- Statystyki mocy (skala cyfrowa I²+Q²) ---")
-        print(f"Typowy poziom szumu (Mediana): {noise_floor_median:.2f}")
-        print(f"Moc szczytowa (max):         {np.max(all_powers_np):.2f}")
-        print(f"Moc minimalna (min):         {np.min(all_powers_np):.2f}")
+        print(f"Typowy poziom szumu (Mediana): {stats['median']:.2f}")
+        print(f"Moc szczytowa (max):         {stats['max']:.2f}")
+        print(f"Moc minimalna (min):         {stats['min']:.2f}")
         
-        print(f"\nSugerowany <próg_mocy> (Mediana * 4.8): {suggested_threshold:.2f}")
+        print(f"\nSugerowany <próg_mocy> (Mediana * {CALIBRATION_FACTOR}): {suggested_threshold:.2f}")
         print(f"Użyj: python {os.path.basename(__file__)} {file_path} {suggested_threshold:.2f}")
 
     except Exception as e:
         print(f"Błąd podczas kalibracji pliku: {e}")
 
+def collect_batch_files(pattern: str) -> list:
+    """Pliki dla trybu wsadowego: katalog (nagrania z BATCH_EXTENSIONS), wzorzec glob albo jeden plik."""
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(pattern, name) for name in os.listdir(pattern)
+            if name.lower().endswith(BATCH_EXTENSIONS) and os.path.isfile(os.path.join(pattern, name))
+        )
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+def analyze_batch_file(file_path: str, power_threshold=None, use_cache: bool = True) -> dict:
+    """Analiza jednego pliku w trybie wsadowym (próg None = kalibracja tego pliku)."""
+    result = {
+        'file': file_path,
+        'size_bytes': 0,
+        'duration_s': 0.0,
+        'threshold': power_threshold,
+        'calibrated': power_threshold is None,
+        'events': [],
+        'scan_time_s': 0.0,
+        'throughput_mb_s': 0.0,
+        'error': None,
+    }
+    try:
+        started = time.perf_counter()
+        result['size_bytes'] = os.path.getsize(file_path)
+        total_samples = result['size_bytes'] // 2
+        result['duration_s'] = total_samples / SAMPLE_RATE_HZ
+
+        powers = load_or_scan_power_profile(file_path, CHUNK_SIZE_BYTES, workers=1, use_cache=use_cache)
+        if power_threshold is None:
+            # Ten sam próg co w --kalibruj, z już policzonej mapy mocy
+            power_threshold = float(np.median(powers)) * CALIBRATION_FACTOR if len(powers) else 0.0
+            result['threshold'] = power_threshold
+        result['events'] = power_events_from_profile(powers, power_threshold, total_samples, file_path)
+
+        result['scan_time_s'] = time.perf_counter() - started
+        if result['scan_time_s'] > 0:
+            result['throughput_mb_s'] = result['size_bytes'] / (1024 * 1024) / result['scan_time_s']
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def analyze_batch(file_paths: list, power_threshold=None, workers: int = 1, use_cache: bool = True) -> dict:
+    """Analizuje pliki równolegle (jeden plik na proces). Zwraca wyniki w kolejności plików i podsumowanie."""
+    started = time.perf_counter()
+    workers = max(1, min(workers, len(file_paths)))
+    if workers == 1:
+        results = [analyze_batch_file(path, power_threshold, use_cache) for path in file_paths]
+    else:
+        # spawn jak w power_scan - bez dziedziczenia stanu procesu nadrzędnego
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            results = list(pool.map(
+                analyze_batch_file, file_paths,
+                [power_threshold] * len(file_paths), [use_cache] * len(file_paths)
+            ))
+
+    wall_time = time.perf_counter() - started
+    total_bytes = sum(r['size_bytes'] for r in results)
+    return {
+        'files': results,
+        'summary': {
+            'num_files': len(results),
+            'num_failed': sum(1 for r in results if r['error']),
+            'num_events': sum(len(r['events']) for r in results),
+            'total_bytes': total_bytes,
+            'wall_time_s': wall_time,
+            'scan_time_s': sum(r['scan_time_s'] for r in results),
+            'throughput_mb_s': total_bytes / (1024 * 1024) / wall_time if wall_time > 0 else 0.0,
+            'workers': workers,
+            'shared_threshold': power_threshold,
+        },
+    }
+
+def write_batch_report(report: dict, report_path: str):
+    """Zapisuje raport: .json (pełna struktura) albo .csv (wiersz na zdarzenie; plik bez zdarzeń = jeden wiersz)."""
+    if report_path.lower().endswith('.json'):
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return
+
+    columns = ['file', 'size_bytes', 'duration_s', 'threshold', 'calibrated', 'scan_time_s', 'throughput_mb_s',
+               'event', 'start_sample', 'end_sample', 'start_s', 'end_s', 'error']
+    with open(report_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for r in report['files']:
+            base = {key: r[key] for key in columns if key in r}
+            if not r['events']:
+                writer.writerow(base)
+            for i, (start, end) in enumerate(r['events'], 1):
+                writer.writerow(dict(base, event=i, start_sample=start, end_sample=end,
+                                     start_s=round(start / SAMPLE_RATE_HZ, 7), end_s=round(end / SAMPLE_RATE_HZ, 7)))
+
+def print_batch_report(report: dict):
+    for r in report['files']:
+        name = os.path.basename(r['file'])
+        if r['error']:
+            print(f"  {name}: BŁĄD - {r['error']}")
+            continue
+        print(f"  {name}: {len(r['events'])} zdarzeń, próg {r['threshold']:.2f}, "
+              f"{r['scan_time_s']:.2f} s ({r['throughput_mb_s']:.1f} MB/s)")
+    summary = report['summary']
+    print(f"\nPliki: {summary['num_files']} (błędy: {summary['num_failed']}), zdarzenia: {summary['num_events']}")
+    print(f"Czas: {summary['wall_time_s']:.2f} s, przepustowość: {summary['throughput_mb_s']:.1f} MB/s "
+          f"({summary['workers']} proc.)")
+
 def print_usage_and_exit():
     script_name = os.path.basename(__file__)
     print("BŁĄD: Niepoprawne użycie.")
@@ -115,10 +216,73 @@ def print_usage_and_exit():
     print("\nSposób użycia (Tryb Kalibracji):")
     print(f"  python {script_name} <nazwa_pliku.bin> --kalibruj")
     print(f"Przykład: python {script_name} nagranie.iq --kalibruj")
+    
+    print("\nSposób użycia (Tryb wsadowy - katalog lub wzorzec glob):")
+    print(f"  python {script_name} --wsadowo <katalog|wzorzec> (<próg_mocy>|--kalibruj) [--raport <plik.csv|plik.json>]")
+    print(f"Przykład: python {script_name} --wsadowo 'sesja/*.bin' --kalibruj --procesy 0 --raport raport.csv")
+    
+    print("\nOpcje:")
+    print("  --procesy <N>   liczba procesów skanu mocy (0 = wszystkie rdzenie, domyślnie 1);")
+    print("                  w trybie wsadowym - liczba plików analizowanych równolegle")
+    print("  --bez-cache     ignoruj zapisaną mapę mocy i skanuj plik od nowa")
     sys.exit(1)
 
 if __name__ == "__main__":
     
+    WORKERS = 1
+    if '--procesy' in sys.argv:
+        idx = sys.argv.index('--procesy')
+        try:
+            WORKERS = resolve_scan_workers(int(sys.argv[idx + 1]))
+        except (IndexError, ValueError):
+            print_usage_and_exit()
+        del sys.argv[idx:idx + 2]
+
+    USE_CACHE = '--bez-cache' not in sys.argv
+    if not USE_CACHE:
+        sys.argv.remove('--bez-cache')
+
+    REPORT_PATH = None
+    if '--raport' in sys.argv:
+        idx = sys.argv.index('--raport')
+        try:
+            REPORT_PATH = sys.argv[idx + 1]
+        except IndexError:
+            print_usage_and_exit()
+        del sys.argv[idx:idx + 2]
+
+    if '--wsadowo' in sys.argv:
+        idx = sys.argv.index('--wsadowo')
+        try:
+            BATCH_PATTERN = sys.argv[idx + 1]
+        except IndexError:
+            print_usage_and_exit()
+        del sys.argv[idx:idx + 2]
+        if len(sys.argv) != 2:
+            print_usage_and_exit()
+
+        BATCH_THRESHOLD = None
+        if sys.argv[1] != '--kalibruj':
+            try:
+                BATCH_THRESHOLD = float(sys.argv[1])
+            except ValueError:
+                print(f"BŁĄD: <próg_mocy> musi być liczbą (np. '120.0'), a nie '{sys.argv[1]}'")
+                print_usage_and_exit()
+
+        BATCH_FILES = collect_batch_files(BATCH_PATTERN)
+        if not BATCH_FILES:
+            print(f"BŁĄD: Brak plików dla: {BATCH_PATTERN}")
+            sys.exit(1)
+
+        mode_text = "kalibracja każdego pliku" if BATCH_THRESHOLD is None else f"wspólny próg {BATCH_THRESHOLD:.2f}"
+        print(f"--- Tryb wsadowy: {len(BATCH_FILES)} plik(ów), {mode_text} ---")
+        report = analyze_batch(BATCH_FILES, BATCH_THRESHOLD, workers=WORKERS, use_cache=USE_CACHE)
+        print_batch_report(report)
+        if REPORT_PATH:
+            write_batch_report(report, REPORT_PATH)
+            print(f"Raport zapisano: {REPORT_PATH}")
+        sys.exit(0)
+
     if len(sys.argv) != 3:
         print_usage_and_exit()
 
@@ -145,12 +309,14 @@ if __name__ == "__main__":
     if MODE == 'calibrate':
         print(f"--- Tryb kalibracji: {SDR_FILE_PATH} ---")
         print("Proszę czekać, trwa analiza pliku...")
-        calibrate_file(SDR_FILE_PATH)
+        calibrate_file(SDR_FILE_PATH, workers=WORKERS, use_cache=USE_CACHE)
         
     elif MODE == 'analyze':
         jamming_events = analyze_file_for_jamming(
             SDR_FILE_PATH, 
-            CALIBRATED_POWER_THRESHOLD
+            CALIBRATED_POWER_THRESHOLD,
+            workers=WORKERS,
+            use_cache=USE_CACHE
         )
         
         if not jamming_events:
@@ -0,0 +1,45 @@
+import os
+import subprocess
+
+# Port, na który gnssdec bez możliwości 'http-port' wysyła POST /data (sdrout.c: HTTP_PORT)
+LEGACY_HTTP_PORT = 1234
+# Możliwości zgłaszane przez gnssdec -V (sdrmain.c: GNSSDEC_CAPS)
+CAP_HTTP_PORT = 'http-port'   # port POST /data z GNSSDEC_HTTP_PORT
+CAP_STREAM = 'stream'         # strumień epok na gnieździe Unix (GNSSDEC_STREAM_SOCKET)
+CAP_BINARY = 'binary'         # rekordy binarne w strumieniu (GNSSDEC_STREAM_FORMAT=binary)
+CAP_FOLLOW = 'follow'         # -f: śledzenie rosnącego pliku
+CAP_SEGMENT = 'segment'       # dekodowanie fragmentu pliku (segment_decoder.py)
+
+_cache = {}
+
+
+def decoder_capabilities(decoder_path, timeout=5.0):
+    """Zbiór możliwości binarki gnssdec (wynik -V, zapamiętany dla ścieżki i mtime).
+
+    Starsza binarka nie zna -V - wypisuje użycie i kończy z błędem, więc zbiór jest pusty
+    i worker wraca do pierwotnego zachowania (stały port HTTP, bez -f i segmentów).
+    """
+    try:
+        key = (decoder_path, os.stat(decoder_path).st_mtime_ns)
+    except OSError:
+        return frozenset()
+    if key not in _cache:
+        _cache[key] = _probe(decoder_path, timeout)
+    return _cache[key]
+
+
+def _probe(decoder_path, timeout):
+    try:
+        result = subprocess.run([decoder_path, '-V'], capture_output=True, text=True, errors='replace',
+                                timeout=timeout)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[GNSSDEC] Nie można sprawdzić możliwości {decoder_path}: {e}")
+        return frozenset()
+    if result.returncode == 0:
+        for line in result.stdout.splitlines():
+            key, _, value = line.partition('|')
+            if key == 'CAPS':
+                return frozenset(value.split())
+    print(f"[GNSSDEC] {os.path.basename(decoder_path)} nie zgłasza możliwości (-V) - starsza wersja, "
+          f"tryb zgodności: port {LEGACY_HTTP_PORT}, bez strumienia epok, -f i segmentów. Przebuduj backend/bin.")
+    return frozenset()
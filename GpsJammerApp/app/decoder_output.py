@@ -0,0 +1,94 @@
+import threading
+from collections import deque
+
+# Ile ostatnich linii wyjścia gnssdec trzymamy (stdout + stderr)
+DECODER_LOG_LINES = 2000
+
+
+class DecoderStatus:
+    """Stan dekodera z linii statusu gnssdec (sdrout.c: updateNavStatusWin, co ~100 ms).
+
+    ACQSV / TRACKED / DECODED - listy PRN, LLA|nsat|lat|lon|hgt|gdop|clk|buffcnt - pozycja.
+    feed() zwraca True po linii LLA, czyli po pełnym bloku statusu.
+    """
+
+    __slots__ = ('elapsed_time', 'acquired', 'tracked', 'decoded', 'nsat', 'buffcnt')
+
+    def __init__(self):
+        self.elapsed_time = 0.0
+        self.acquired = 0
+        self.tracked = 0
+        self.decoded = 0
+        self.nsat = 0
+        self.buffcnt = 0
+
+    def feed(self, line):
+        key, _, value = line.partition('|')
+        try:
+            if key == 'ETIME':
+                self.elapsed_time = float(value)
+            elif key == 'ACQSV':
+                self.acquired = len(value.split())
+            elif key == 'TRACKED':
+                self.tracked = len(value.split())
+            elif key == 'DECODED':
+                self.decoded = len(value.split())
+            elif key == 'LLA':
+                fields = value.split('|')
+                self.nsat = int(fields[0])
+                self.buffcnt = int(fields[-1])
+                return True
+        except (ValueError, IndexError):
+            pass
+        return False
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DecoderOutputReader:
+    """Czyta stdout i stderr procesu gnssdec linia po linii w wątkach tła (zamiast capture_output).
+
+    Linie trafiają do ograniczonego bufora log (ostatnie log_lines), stdout jest parsowany na bieżąco
+    do DecoderStatus; on_status(status) wywoływane, gdy po bloku statusu zmieniła się liczba satelitów.
+    Proces: Popen(..., stdout=PIPE, stderr=PIPE, text=True).
+    """
+
+    def __init__(self, process, on_status=None, log_lines=DECODER_LOG_LINES):
+        self.log = deque(maxlen=log_lines)
+        self.status = DecoderStatus()
+        self.on_status = on_status
+        self.lines_read = 0
+        self._last_counts = None
+        self._threads = [threading.Thread(target=self._read_stdout, args=(process.stdout,), daemon=True)]
+        if process.stderr is not None:
+            self._threads.append(threading.Thread(target=self._read_stderr, args=(process.stderr,), daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def join(self, timeout=None):
+        """Po zakończeniu procesu - do końca strumieni (EOF)."""
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def tail(self, count=20):
+        return list(self.log)[-count:]
+
+    def _read_stdout(self, stream):
+        status = self.status
+        for line in stream:
+            line = line.rstrip('\n')
+            self.log.append(line)
+            self.lines_read += 1
+            if status.feed(line) and self.on_status:
+                counts = (status.acquired, status.tracked, status.decoded, status.nsat)
+                if counts != self._last_counts:
+                    self._last_counts = counts
+                    self.on_status(status)
+        stream.close()
+
+    def _read_stderr(self, stream):
+        for line in stream:
+            self.log.append(f"[stderr] {line.rstrip()}")
+            self.lines_read += 1
+        stream.close()
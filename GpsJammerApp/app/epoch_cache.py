@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+
+try:
+    from .recording_cache import CACHE_ROOT, load_cached_arrays, store_cached_arrays
+    from .epoch_record import EPOCH_VERSION
+except ImportError:
+    from recording_cache import CACHE_ROOT, load_cached_arrays, store_cached_arrays
+    from epoch_record import EPOCH_VERSION
+
+# Zdekodowane strumienie epok gnssdec (rekordy binarne epoch_record) - ponowna analiza bez dekodowania
+EPOCH_CACHE_DIR = os.path.join(CACHE_ROOT, 'epoch_logs')
+# Limit katalogu (ok. 5 MB na 10 minut nagrania) - najdawniej używane wpisy są usuwane
+EPOCH_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def epoch_cache_params(system_flag, hold_position, decoder_path):
+    """Parametry wpisu: system GNSS, tryb hold i wersja binarki gnssdec (mtime) - zmiana unieważnia wpis."""
+    try:
+        decoder = os.stat(decoder_path).st_mtime_ns
+    except OSError:
+        decoder = 0
+    return f"{system_flag}|hold={int(bool(hold_position))}|gnssdec={decoder}|epoch=v{EPOCH_VERSION}"
+
+
+def load_epoch_log(file_path, params, cache_dir=None):
+    """Bufor rekordów epok nagrania (np.uint8) albo None (brak wpisu / nagranie lub parametry się zmieniły)."""
+    arrays = load_cached_arrays('epochs', file_path, params, cache_dir or EPOCH_CACHE_DIR, keys=['records'])
+    return arrays['records'] if arrays is not None else None
+
+
+def store_epoch_log(file_path, params, log_path, cache_dir=None, max_bytes=EPOCH_CACHE_MAX_BYTES):
+    """Zapisuje log binarny (EpochRecorder) jako wpis cache nagrania."""
+    records = np.fromfile(log_path, dtype=np.uint8)
+    return store_cached_arrays('epochs', file_path, params, {'records': records},
+                               cache_dir or EPOCH_CACHE_DIR, max_bytes)
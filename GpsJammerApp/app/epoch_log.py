@@ -0,0 +1,113 @@
+import json
+import os
+import time
+
+import numpy as np
+
+try:
+    from .epoch_record import EPOCH_MAGIC, HEADER_DTYPE, OBS_DTYPE, BinaryEpoch, encode_epoch, record_size
+except ImportError:
+    from epoch_record import EPOCH_MAGIC, HEADER_DTYPE, OBS_DTYPE, BinaryEpoch, encode_epoch, record_size
+
+# Rozszerzenia logu NDJSON; każde inne - rekordy binarne epoch_record jeden za drugim (jak strumień gnssdec)
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+
+def is_ndjson_log(path):
+    return str(path).lower().endswith(NDJSON_SUFFIXES)
+
+
+class EpochRecorder:
+    """Zapis strumienia epok gnssdec do pliku (do późniejszego odtworzenia bez dekodowania).
+
+    write() przyjmuje epokę w każdej postaci, którą dostaje worker: bajty JSON (POST /data),
+    słownik JSON albo BinaryEpoch. Format wynika z rozszerzenia: .ndjson/.jsonl albo binarny.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.ndjson = is_ndjson_log(path)
+        self.epochs_written = 0
+        self._file = open(path, 'wb')
+
+    def write(self, data):
+        if self.ndjson:
+            if isinstance(data, BinaryEpoch):
+                data = data.to_dict()
+            record = bytes(data).strip() if isinstance(data, (bytes, bytearray)) else \
+                json.dumps(data, separators=(',', ':')).encode()
+            self._file.write(record + b'\n')
+        else:
+            if isinstance(data, (bytes, bytearray)):
+                data = json.loads(data)
+            self._file.write(data.tobytes() if isinstance(data, BinaryEpoch) else encode_epoch(data))
+        self.epochs_written += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_epoch_log(path):
+    """Epoki z logu w kolejności zapisu: słowniki (NDJSON) albo BinaryEpoch (widoki na jeden bufor pliku)."""
+    if is_ndjson_log(path):
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    yield from iter_epoch_records(np.fromfile(path, dtype=np.uint8), os.path.basename(path))
+
+
+def iter_epoch_records(buffer, name=''):
+    """BinaryEpoch z bufora rekordów binarnych (plik logu, wpis cache) - widoki bez kopii."""
+    view = memoryview(buffer)
+    pos = 0
+    while pos < len(buffer):
+        size = record_size(view, pos)
+        if size is None or len(buffer) - pos < size or bytes(view[pos:pos + 4]) != EPOCH_MAGIC:
+            print(f"[LOG EPOK] {name}: urwany rekord po {pos} B - pomijam resztę.")
+            return
+        yield BinaryEpoch(view[pos:pos + size])
+        pos += size
+
+
+def load_epoch_columns(path):
+    """Log jako kolumny: (nagłówki HEADER_DTYPE, obserwacje OBS_DTYPE, początki obserwacji epok).
+
+    Obserwacje epoki i: observations[obs_starts[i]:obs_starts[i + 1]].
+    """
+    epochs = [epoch if isinstance(epoch, BinaryEpoch) else BinaryEpoch(encode_epoch(epoch))
+              for epoch in iter_epoch_log(path)]
+    headers = np.array([epoch.header for epoch in epochs], dtype=HEADER_DTYPE)
+    counts = np.array([len(epoch.observations) for epoch in epochs], dtype=np.int64)
+    obs_starts = np.concatenate(([0], np.cumsum(counts)))
+    observations = np.concatenate([epoch.observations for epoch in epochs]) if epochs \
+        else np.empty(0, dtype=OBS_DTYPE)
+    return headers, observations, obs_starts
+
+
+def replay_epochs(epochs, on_epoch, speed=None):
+    """Podaje epoki (np. iter_epoch_log) do on_epoch; speed=None - najszybciej jak się da, inaczej
+    N-krotność tempa nagrania (według elapsed_time epok). Zwraca liczbę epok."""
+    count = 0
+    start = time.monotonic()
+    first_time = None
+    for epoch in epochs:
+        if speed:
+            elapsed = epoch.elapsed_time if isinstance(epoch, BinaryEpoch) else float(epoch.get('elapsed_time', 0.0))
+            if first_time is None:
+                first_time = elapsed
+            delay = (elapsed - first_time) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        on_epoch(epoch)
+        count += 1
+    return count
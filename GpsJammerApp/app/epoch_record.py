@@ -0,0 +1,118 @@
+import numpy as np
+
+# Binarny rekord epoki gnssdec (sdrout.c: epoch_header_t, epoch_obs_t) - little-endian, bez wyrównania.
+# Rekord: nagłówek, nobs obserwacji, listy PRN (int16): acq_sv, tracked, decoded.
+EPOCH_MAGIC = b'GNEP'
+EPOCH_VERSION = 1
+# Offset pola record_size w nagłówku (ramkowanie strumienia bez dekodowania całości)
+RECORD_SIZE_OFFSET = 8
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'), ('version', '<u2'), ('header_size', '<u2'), ('record_size', '<u4'),
+    ('nobs', '<u2'), ('obs_size', '<u2'), ('n_acq', '<u2'), ('n_tracked', '<u2'), ('n_decoded', '<u2'),
+    ('filter', 'u1'), ('hold', 'u1'), ('nsat', '<i4'), ('reserved', '<u4'),
+    ('elapsed_time', '<f8'), ('lat', '<f8'), ('lon', '<f8'), ('hgt', '<f8'), ('gdop', '<f8'),
+    ('clk_bias', '<f8'), ('buffcnt', '<u8'), ('time', 'S24'),
+])
+OBS_DTYPE = np.dtype([
+    ('prn', '<i4'), ('week', '<i4'), ('tow', '<f8'), ('snr', '<f8'), ('doppler', '<f8'),
+    ('az', '<f8'), ('el', '<f8'), ('residual', '<f8'), ('innovation', '<f8'),
+])
+PRN_DTYPE = np.dtype('<i2')
+# buffcnt w epokach gnssdec liczy próbki I/Q (FILE_BUFFSIZE na odczyt); bajty uint8 na próbkę
+IQ_SAMPLE_BYTES = 2
+FILTER_NAMES = ('WLS', 'EKF')
+POSITION_FIELDS = ('nsat', 'lat', 'lon', 'hgt', 'gdop', 'clk_bias', 'buffcnt')
+
+
+class BinaryEpoch:
+    """Epoka z rekordu binarnego - widoki np.frombuffer na bufor rekordu (bez kopii i słowników).
+
+    header - rekord strukturalny HEADER_DTYPE, observations - tablica OBS_DTYPE,
+    acq_sv / tracked / decoded - tablice PRN.
+    """
+
+    __slots__ = ('header', 'observations', 'acq_sv', 'tracked', 'decoded')
+
+    def __init__(self, buffer):
+        header = np.frombuffer(buffer, HEADER_DTYPE, count=1)[0]
+        if header['magic'] != EPOCH_MAGIC or header['version'] != EPOCH_VERSION:
+            raise ValueError(f"Nieznany rekord epoki: {bytes(header['magic'])!r} v{int(header['version'])}")
+        if header['obs_size'] != OBS_DTYPE.itemsize or header['header_size'] != HEADER_DTYPE.itemsize:
+            raise ValueError("Rekord epoki: niezgodny rozmiar struktur")
+        offset = HEADER_DTYPE.itemsize
+        nobs = int(header['nobs'])
+        self.header = header
+        self.observations = np.frombuffer(buffer, OBS_DTYPE, count=nobs, offset=offset)
+        offset += nobs * OBS_DTYPE.itemsize
+        lists = []
+        for count in (int(header['n_acq']), int(header['n_tracked']), int(header['n_decoded'])):
+            lists.append(np.frombuffer(buffer, PRN_DTYPE, count=count, offset=offset))
+            offset += count * PRN_DTYPE.itemsize
+        self.acq_sv, self.tracked, self.decoded = lists
+
+    @property
+    def elapsed_time(self):
+        return float(self.header['elapsed_time'])
+
+    def tobytes(self):
+        """Rekord binarny epoki (jak w strumieniu gnssdec)."""
+        return b''.join((self.header.tobytes(), self.observations.tobytes(),
+                         self.acq_sv.tobytes(), self.tracked.tobytes(), self.decoded.tobytes()))
+
+    def rebased(self, buffcnt_offset, time_offset):
+        """Kopia epoki z przesuniętym buffcnt i elapsed_time (sklejanie segmentów nagrania)."""
+        epoch = BinaryEpoch(bytearray(self.tobytes()))
+        epoch.header['buffcnt'] += buffcnt_offset
+        epoch.header['elapsed_time'] += time_offset
+        return epoch
+
+    def to_dict(self):
+        """Epoka w układzie JSON z sdrout.c (zgodność, np. zapis logu)."""
+        header = self.header
+        position = {name: header[name].item() for name in POSITION_FIELDS}
+        position['hold'] = bool(header['hold'])
+        return {
+            'elapsed_time': round(float(header['elapsed_time']), 3),
+            'time': header['time'].decode('ascii', 'replace'),
+            'filter': FILTER_NAMES[int(header['filter'])],
+            'acq_sv': self.acq_sv.tolist(),
+            'tracked': self.tracked.tolist(),
+            'decoded': self.decoded.tolist(),
+            'position': position,
+            'observations': [dict(zip(OBS_DTYPE.names, obs.tolist())) for obs in self.observations],
+        }
+
+
+def record_size(buffer, offset=0):
+    """Długość rekordu zaczynającego się w buffer[offset] albo None (za mało bajtów nagłówka)."""
+    if len(buffer) - offset < RECORD_SIZE_OFFSET + 4:
+        return None
+    return int.from_bytes(buffer[offset + RECORD_SIZE_OFFSET:offset + RECORD_SIZE_OFFSET + 4], 'little')
+
+
+def encode_epoch(data):
+    """Rekord binarny ze słownika epoki w układzie JSON (testy, odtwarzanie nagranych epok)."""
+    position = data.get('position', {})
+    observations = data.get('observations', [])
+    lists = [np.asarray(data.get(name, []), dtype=PRN_DTYPE) for name in ('acq_sv', 'tracked', 'decoded')]
+
+    obs = np.zeros(len(observations), dtype=OBS_DTYPE)
+    for name in OBS_DTYPE.names:
+        obs[name] = [o.get(name, 0) for o in observations]
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = EPOCH_MAGIC
+    header['version'] = EPOCH_VERSION
+    header['header_size'] = HEADER_DTYPE.itemsize
+    header['obs_size'] = OBS_DTYPE.itemsize
+    header['nobs'] = len(obs)
+    header['n_acq'], header['n_tracked'], header['n_decoded'] = (len(prns) for prns in lists)
+    header['record_size'] = HEADER_DTYPE.itemsize + obs.nbytes + sum(prns.nbytes for prns in lists)
+    header['filter'] = FILTER_NAMES.index(data.get('filter', 'WLS'))
+    header['hold'] = bool(position.get('hold', False))
+    header['elapsed_time'] = float(data.get('elapsed_time', 0.0))
+    header['time'] = data.get('time', '').encode('ascii')
+    for name in POSITION_FIELDS:
+        header[name] = position.get(name, 0)
+    return b''.join([header.tobytes(), obs.tobytes()] + [prns.tobytes() for prns in lists])
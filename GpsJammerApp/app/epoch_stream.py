@@ -0,0 +1,163 @@
+import itertools
+import json
+import os
+import selectors
+import socket
+import tempfile
+import threading
+
+try:
+    from .epoch_record import EPOCH_MAGIC, BinaryEpoch, record_size
+except ImportError:
+    from epoch_record import EPOCH_MAGIC, BinaryEpoch, record_size
+
+# Zmienna środowiskowa, z której gnssdec (sdrout.c) bierze ścieżkę gniazda strumienia epok
+STREAM_SOCKET_ENV = 'GNSSDEC_STREAM_SOCKET'
+# ... i format rekordów: 'json' albo 'binary' (epoch_record.py)
+STREAM_FORMAT_ENV = 'GNSSDEC_STREAM_FORMAT'
+# Ile bajtów czytamy naraz z połączenia (kilka epok JSON)
+STREAM_READ_BYTES = 1 << 16
+# Co ile sekund pętla sprawdza flagę zatrzymania
+STREAM_POLL_SEC = 0.2
+
+_socket_ids = itertools.count()
+
+
+def default_socket_path():
+    """Unikalna ścieżka gniazda dla procesu (kilka workerów nie koliduje)."""
+    return os.path.join(tempfile.gettempdir(), f"gnssdec-{os.getpid()}-{next(_socket_ids)}.sock")
+
+
+class EpochStreamServer:
+    """Odbiornik epok gnssdec: gniazdo Unix, rekordy JSON rozdzielone '\\n' (NDJSON)
+    albo rekordy binarne (zaczynają się od EPOCH_MAGIC, długość w nagłówku).
+
+    Dekoder trzyma jedno połączenie i nie czeka na odpowiedź - w przeciwieństwie do
+    POST /data, gdzie każda epoka to nowe połączenie, nagłówki HTTP i odpowiedź 200.
+    on_epoch(dane) wywoływane jest w wątku odbiornika, w kolejności epok: słownik JSON
+    albo epoch_record.BinaryEpoch. binary=True prosi dekoder o rekordy binarne.
+    """
+
+    def __init__(self, on_epoch, path=None, binary=False):
+        self.on_epoch = on_epoch
+        self.path = path or default_socket_path()
+        self.binary = binary
+        self.epochs_received = 0
+        self.bad_records = 0
+        self._selector = None
+        self._listener = None
+        self._buffers = {}
+        self._thread = None
+        self._closing = threading.Event()
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.path)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def child_env(self, env=None):
+        """Środowisko procesu gnssdec ze ścieżką gniazda."""
+        return dict(os.environ if env is None else env,
+                    **{STREAM_SOCKET_ENV: self.path, STREAM_FORMAT_ENV: 'binary' if self.binary else 'json'})
+
+    def stop(self, timeout=5.0):
+        """Czyta do końca otwarte połączenia (dekoder już zakończony); gniazdo zamyka wątek odbiornika."""
+        if self._thread is None:
+            return
+        self._closing.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Zasoby zamknie sam wątek, gdy skończy czytać - nie zamykamy ich pod działającym select()
+            print(f"[STRUMIEŃ EPOK] Połączenie wciąż otwarte po {timeout:g} s - odbiornik kończy w tle.")
+        self._thread = None
+
+    def _serve(self):
+        try:
+            while not (self._closing.is_set() and not self._buffers):
+                for key, _ in self._selector.select(STREAM_POLL_SEC):
+                    if key.fileobj is self._listener:
+                        self._accept()
+                    else:
+                        self._read(key.fileobj)
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        for conn in list(self._buffers):
+            self._close(conn)
+        self._selector.unregister(self._listener)
+        self._listener.close()
+        self._selector.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _accept(self):
+        try:
+            conn, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        self._buffers[conn] = b''
+        self._selector.register(conn, selectors.EVENT_READ)
+
+    def _read(self, conn):
+        try:
+            data = conn.recv(STREAM_READ_BYTES)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close(conn)
+            return
+        buffer = self._buffers[conn] + data
+        view = memoryview(buffer)
+        pos = 0
+        while pos < len(buffer):
+            if buffer.startswith(EPOCH_MAGIC, pos):
+                size = record_size(buffer, pos)
+                if size is None or len(buffer) - pos < size:
+                    break
+                self._dispatch(view[pos:pos + size], binary=True)
+                pos += size
+            else:
+                end = buffer.find(b'\n', pos)
+                if end < 0:
+                    break
+                self._dispatch(view[pos:end])
+                pos = end + 1
+        self._buffers[conn] = buffer[pos:]
+
+    def _dispatch(self, record, binary=False):
+        try:
+            if binary:
+                data = BinaryEpoch(record)
+            else:
+                if not bytes(record).strip():
+                    return
+                data = json.loads(bytes(record))
+        except ValueError as e:  # także json.JSONDecodeError
+            self.bad_records += 1
+            print(f"[STRUMIEŃ EPOK] Błędny rekord: {e}")
+            return
+        self.epochs_received += 1
+        try:
+            self.on_epoch(data)
+        except Exception as e:
+            print(f"[STRUMIEŃ EPOK] Błąd: {e}")
+
+    def _close(self, conn):
+        # Ostatni rekord bez '\n' (dekoder przerwany w trakcie zapisu) jest odrzucany
+        self._buffers.pop(conn, None)
+        try:
+            self._selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        conn.close()
@@ -0,0 +1,215 @@
+import os
+import numpy as np
+
+try:
+    from .recording_cache import CACHE_ROOT, load_cached_arrays, store_cached_arrays
+    from .saturation import chunk_histograms, clip_fraction
+except ImportError:
+    from recording_cache import CACHE_ROOT, load_cached_arrays, store_cached_arrays
+    from saturation import chunk_histograms, clip_fraction
+
+# Wiersz magazynu = chunk mocy workera (32768 próbek, 16 ms przy 2.048 MS/s)
+FEATURE_CHUNK_BYTES = 65536
+# Zgrubne widmo: FFT po PSD_BINS próbek, uśrednione w chunku (16 kHz na bin przy 2.048 MS/s)
+PSD_BINS = 128
+# Widmo z co 8. ramki (32 ramki na chunk) - wystarcza do uśrednienia, FFT 8x tańsze
+PSD_FRAME_STEP = 8
+# Skala RTL-SDR: zero w 127.5, pełna skala 127.5
+ADC_OFFSET = 127.5
+ADC_FULL_SCALE = 127.5
+
+FEATURE_CACHE_DIR = os.path.join(CACHE_ROOT, 'features')
+# Histogram i widmo to ok. 1.5 kB na chunk (~350 MB na godzinę nagrania)
+FEATURE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Kolumny skalarne (float32, jedna wartość na chunk):
+#   mean_power     - średnia I²+Q² (jak mapa mocy), peak_power - max I²+Q² próbki
+#   mean_amplitude - średnia |IQ| w skali [-1, 1]
+#   dc_i, dc_q     - składowa stała I / Q (wartość surowa - 127.5)
+#   iq_gain_db     - niezrównoważenie wzmocnienia 10*log10(var I / var Q)
+#   iq_phase_deg   - błąd kwadratury z korelacji I i Q
+#   clip_fraction  - udział składowych 0 albo 255 (nasycenie ADC, saturation.py)
+# oraz histogram (uint32, 256 wartości bajtu I i Q) i psd (float32, PSD_BINS, fftshift).
+SCALAR_COLUMNS = ('mean_power', 'peak_power', 'mean_amplitude', 'dc_i', 'dc_q',
+                  'iq_gain_db', 'iq_phase_deg', 'clip_fraction')
+FEATURE_COLUMNS = SCALAR_COLUMNS + ('histogram', 'psd')
+
+_CENTER_LUT = np.arange(256, dtype=np.float32) - np.float32(ADC_OFFSET)
+_VALUES = np.arange(256, dtype=np.float64) - ADC_OFFSET
+_PSD_WINDOW = np.hanning(PSD_BINS).astype(np.float32)
+
+
+def chunk_features(raw, sample_power, num_chunks):
+    """Kolumny cech dla num_chunks chunków jednego bloku skanu.
+
+    raw - bajty uint8 (I, Q, ...), sample_power - moc I²+Q² próbek z tego samego bloku.
+    Histogram liczony jest bincount po chunkach dla I i Q; z niego wynikają DC, wariancje
+    i nasycenie. Korelacja I/Q na liczbach całkowitych, widmo z co PSD_FRAME_STEP-tej ramki.
+    """
+    raw = np.asarray(raw)
+    chunk_samples = len(sample_power) // num_chunks
+    pw = np.asarray(sample_power)[:num_chunks * chunk_samples].reshape(num_chunks, chunk_samples)
+    pairs = raw[:2 * num_chunks * chunk_samples].reshape(num_chunks, chunk_samples, 2)
+
+    # Histogram osobno dla I (0) i Q (1)
+    counts = chunk_histograms(raw, num_chunks)
+
+    mean = counts @ _VALUES / chunk_samples                        # (chunki, 2)
+    var = counts @ (_VALUES ** 2) / chunk_samples - mean ** 2
+    var = np.maximum(var, 1e-12)
+
+    # Kowariancja nie zależy od przesunięcia - liczona na surowych bajtach
+    raw_iq = np.einsum('ij,ij->i', pairs[:, :, 0], pairs[:, :, 1], dtype=np.int64)
+    cross = raw_iq / chunk_samples - (mean[:, 0] + ADC_OFFSET) * (mean[:, 1] + ADC_OFFSET)
+    correlation = np.clip(cross / np.sqrt(var[:, 0] * var[:, 1]), -1.0, 1.0)
+
+    # Zgrubne widmo (bez DC chunka), moc na bin w skali [-1, 1]: suma binów ~ średnia moc
+    frames_per_chunk = chunk_samples // PSD_BINS
+    if frames_per_chunk:
+        frames = pairs[:, :frames_per_chunk * PSD_BINS].reshape(num_chunks, frames_per_chunk, PSD_BINS, 2)
+        frames = np.take(_CENTER_LUT, frames[:, ::PSD_FRAME_STEP]).view(np.complex64)[..., 0]
+        dc = (mean[:, 0] + 1j * mean[:, 1]).astype(np.complex64)
+        spectra = np.fft.fft((frames - dc[:, None, None]) * _PSD_WINDOW, axis=-1)
+        psd = (spectra.real ** 2 + spectra.imag ** 2).mean(axis=1)
+        psd /= PSD_BINS * np.sum(_PSD_WINDOW ** 2) * ADC_FULL_SCALE ** 2
+        psd = np.fft.fftshift(psd, axes=-1)
+    else:
+        psd = np.zeros((num_chunks, PSD_BINS))
+
+    mean_power = np.mean(pw, axis=1)
+    mean_power += np.float32(1e-10)
+    return {
+        'mean_power': mean_power,
+        'peak_power': pw.max(axis=1),
+        'mean_amplitude': np.mean(np.sqrt(pw), axis=1) / np.float32(ADC_FULL_SCALE),
+        'dc_i': mean[:, 0].astype(np.float32),
+        'dc_q': mean[:, 1].astype(np.float32),
+        'iq_gain_db': (10 * np.log10(var[:, 0] / var[:, 1])).astype(np.float32),
+        'iq_phase_deg': np.degrees(np.arcsin(correlation)).astype(np.float32),
+        'clip_fraction': clip_fraction(counts),
+        'histogram': counts.sum(axis=1).astype(np.uint32),
+        'psd': psd.astype(np.float32),
+    }
+
+
+class FeatureStoreBuilder:
+    """Zbiera kolumny cech bloków w kolejności pliku (callback skanu mocy)."""
+
+    def __init__(self):
+        self.parts = []
+
+    def add(self, columns):
+        self.parts.append(columns)
+
+    def finish(self):
+        if not self.parts:
+            return {name: np.empty((0, 256) if name == 'histogram' else (0, PSD_BINS) if name == 'psd' else 0,
+                                   dtype=np.uint32 if name == 'histogram' else np.float32)
+                    for name in FEATURE_COLUMNS}
+        return {name: np.concatenate([part[name] for part in self.parts]) for name in FEATURE_COLUMNS}
+
+
+def _cache_params(chunk_size_bytes):
+    return f"{chunk_size_bytes}-{PSD_BINS}"
+
+
+class FeatureStore:
+    """Kolumnowy magazyn cech nagrania: jeden wiersz na chunk.
+
+    Kolumny z cache czytane są osobno przy pierwszym użyciu (element npz), więc
+    zapytanie o moc nie wczytuje histogramów ani widm.
+    """
+
+    def __init__(self, file_path, chunk_size_bytes, total_samples, columns=None, cache_dir=None):
+        self.file_path = file_path
+        self.chunk_size_bytes = chunk_size_bytes
+        self.chunk_samples = chunk_size_bytes // 2
+        self.total_samples = int(total_samples)
+        self.num_chunks = -(-self.total_samples // self.chunk_samples)
+        self.cache_dir = cache_dir or FEATURE_CACHE_DIR
+        self._columns = dict(columns) if columns is not None else {}
+
+    def column(self, name):
+        if name not in FEATURE_COLUMNS:
+            raise KeyError(f"Nieznana kolumna cech: {name}")
+        if name not in self._columns:
+            arrays = load_cached_arrays('features', self.file_path, _cache_params(self.chunk_size_bytes),
+                                        self.cache_dir, keys=[name])
+            if arrays is None:
+                raise RuntimeError(f"Magazyn cech nieaktualny: {os.path.basename(self.file_path)}")
+            self._columns[name] = arrays[name]
+        return self._columns[name]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def chunk_counts(self):
+        """Liczba próbek w każdym chunku (ostatni bywa niepełny)."""
+        counts = np.full(self.num_chunks, self.chunk_samples, dtype=np.int64)
+        if self.num_chunks and self.total_samples % self.chunk_samples:
+            counts[-1] = self.total_samples % self.chunk_samples
+        return counts
+
+    def chunk_times(self, sample_rate):
+        """Czas początku każdego chunka [s]."""
+        return np.arange(self.num_chunks) * self.chunk_samples / sample_rate
+
+    def histogram(self, start_chunk=0, end_chunk=None):
+        """Histogram 256 wartości bajtu (I i Q) dla chunków [start_chunk, end_chunk)."""
+        return self.column('histogram')[start_chunk:end_chunk].sum(axis=0, dtype=np.uint64)
+
+    def rows_by_time(self, name, samples_per_row):
+        """Średnia kolumny w wierszach po samples_per_row próbek (chunk należy do wiersza swojego początku)."""
+        values = self.column(name)
+        starts = np.arange(self.num_chunks, dtype=np.int64) * self.chunk_samples
+        boundaries = np.unique(np.searchsorted(starts, np.arange(0, self.total_samples, samples_per_row)))
+        boundaries = boundaries[boundaries < self.num_chunks]
+        counts = np.diff(np.append(boundaries, self.num_chunks))
+        sums = np.add.reduceat(values.astype(np.float64), boundaries, axis=0)
+        return sums / counts.reshape((-1,) + (1,) * (values.ndim - 1))
+
+    def amplitude_after_threshold(self, reader, threshold, candidate_margin=1e-6, max_clip_fraction=None):
+        """Jak iq_io.mean_amplitude_after_threshold, ale pełne chunki biorą średnią z kolumny.
+
+        Z pliku czytane są tylko chunki-kandydaci (moc szczytowa powyżej progu), aż do pierwszej
+        próbki z |IQ| > threshold. Zwraca (indeks, średnia amplituda) albo (None, None).
+        max_clip_fraction: chunki z większym udziałem obciętych składowych (nasycenie ADC,
+        amplituda zaniżona) nie wchodzą do średniej - chyba że nasycone są wszystkie.
+        """
+        peak_amplitude = np.sqrt(self.column('peak_power')) / ADC_FULL_SCALE
+        counts = self.chunk_counts()
+        for chunk in np.flatnonzero(peak_amplitude > threshold * (1 - candidate_margin)):
+            first = int(chunk) * self.chunk_samples
+            amplitude = np.abs(reader.read(first, int(counts[chunk])))
+            above = np.flatnonzero(amplitude > threshold)
+            if len(above) == 0:
+                continue
+            turn_on_index = first + int(above[0])
+            sums = self.column('mean_amplitude')[chunk:].astype(np.float64) * counts[chunk:]
+            sizes = counts[chunk:].copy()
+            sums[0] = float(np.sum(amplitude[above[0]:], dtype=np.float64))
+            sizes[0] -= int(above[0])
+            if max_clip_fraction is not None:
+                keep = self.column('clip_fraction')[chunk:] <= max_clip_fraction
+                if keep.any():
+                    sums, sizes = sums[keep], sizes[keep]
+            return turn_on_index, float(np.sum(sums)) / int(np.sum(sizes))
+        return None, None
+
+
+def load_feature_store(file_path, chunk_size_bytes=FEATURE_CHUNK_BYTES, cache_dir=None):
+    """Magazyn cech z cache (kolumny czytane leniwie) albo None."""
+    cache_dir = cache_dir or FEATURE_CACHE_DIR
+    meta = load_cached_arrays('features', file_path, _cache_params(chunk_size_bytes), cache_dir, keys=['total_samples'])
+    if meta is None:
+        return None
+    return FeatureStore(file_path, chunk_size_bytes, int(meta['total_samples']), cache_dir=cache_dir)
+
+
+def store_feature_store(file_path, chunk_size_bytes, columns, total_samples, cache_dir=None,
+                        max_bytes=FEATURE_CACHE_MAX_BYTES):
+    """Zapisuje kolumny (npz bez kompresji - kolumny czytane osobno). Zwraca FeatureStore."""
+    cache_dir = cache_dir or FEATURE_CACHE_DIR
+    arrays = dict(columns, total_samples=np.int64(total_samples))
+    store_cached_arrays('features', file_path, _cache_params(chunk_size_bytes), arrays, cache_dir, max_bytes)
+    return FeatureStore(file_path, chunk_size_bytes, total_samples, columns=columns, cache_dir=cache_dir)
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+
+# Domyślna pojemność: ok. 7 minut epok co 100 ms
+INGEST_QUEUE_SIZE = 4096
+# Ile epok detektor zdejmuje naraz
+INGEST_BATCH_SIZE = 64
+# Maksymalne czekanie producenta na miejsce w kolejce (tryb plikowy) [s]
+INGEST_PUT_TIMEOUT = 30.0
+
+
+class IngestQueue:
+    """Ograniczona kolejka epok między odbiornikami (HTTP, strumień) a detektorem.
+
+    put(block=True) - tryb plikowy: przy pełnej kolejce producent czeka na miejsce, więc
+    odpowiedź HTTP / odczyt gniazda wstrzymuje gnssdec zamiast gubić epoki. put(block=False)
+    - przechwytywanie na żywo: wypada najstarsza epoka (liczona w dropped), a detektor
+    zostaje przy bieżącym czasie nagrania. drain() zdejmuje epoki partiami. Kolejka
+    i liczniki są pod jedną blokadą (producenci to kilka wątków). Liczniki: stats().
+    """
+
+    def __init__(self, maxlen=INGEST_QUEUE_SIZE):
+        self.maxlen = maxlen
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.blocked = 0          # ile razy producent czekał na miejsce
+        self.max_depth = 0
+        self.last_lag = 0.0       # czas oczekiwania najstarszej epoki ostatniej partii [s]
+        self.max_lag = 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, data, block=True, timeout=INGEST_PUT_TIMEOUT):
+        """Dodaje epokę (z czasem odbioru). Zwraca False, jeśli trzeba było wypchnąć najstarszą.
+
+        block=True czeka na miejsce do timeout sekund (None - bez limitu); epoka wypada
+        dopiero po upływie limitu albo po close(), żeby zatrzymany detektor nie zawiesił
+        odbiorników.
+        """
+        with self._lock:
+            if len(self._items) >= self.maxlen and block and not self._closed:
+                self.blocked += 1
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while len(self._items) >= self.maxlen and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._not_full.wait(remaining)
+            full = len(self._items) >= self.maxlen
+            if full:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append((time.monotonic(), data))
+            self.received += 1
+            depth = len(self._items)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._not_empty.notify()
+        return not full
+
+    def drain(self, max_items=INGEST_BATCH_SIZE, timeout=None):
+        """Do max_items najstarszych epok; czeka do timeout sekund, gdy kolejka jest pusta."""
+        with self._lock:
+            if not self._items and timeout:
+                self._not_empty.wait(timeout)
+            batch = []
+            oldest = None
+            while self._items and len(batch) < max_items:
+                received_at, data = self._items.popleft()
+                if oldest is None:
+                    oldest = received_at
+                batch.append(data)
+            if batch:
+                self._not_full.notify_all()
+                self.processed += len(batch)
+                self.last_lag = time.monotonic() - oldest
+                self.max_lag = max(self.max_lag, self.last_lag)
+        return batch
+
+    def close(self):
+        """Detektor skończył - czekający producenci wracają od razu (nadmiar wypada)."""
+        with self._lock:
+            self._closed = True
+            self._not_full.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'depth': len(self._items),
+                'max_depth': self.max_depth,
+                'capacity': self.maxlen,
+                'received': self.received,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'blocked': self.blocked,
+                'lag_s': self.last_lag,
+                'max_lag_s': self.max_lag,
+            }
@@ -0,0 +1,84 @@
+from bisect import bisect_right
+
+
+class IntervalIndex:
+    """Posortowane, rozłączne przedziały [start, end] (domknięte) z wyszukiwaniem przez bisect.
+
+    Przedziały dopisywane są tylko na końcu (skan idzie w kolejności pliku), więc
+    listy początków i końców pozostają posortowane. Odczyt z innego wątku jest
+    bezpieczny: koniec dopisywany jest przed początkiem, a zmiana końca to jedno przypisanie.
+    """
+
+    def __init__(self, ranges=()):
+        self.starts = []
+        self.ends = []
+        for start, end in ranges:
+            self.append(start, end)
+
+    @classmethod
+    def from_arrays(cls, starts, ends, scale=1):
+        """Przedziały z tablic (np. chunki z high_power_runs) przeskalowane do bajtów."""
+        index = cls()
+        index.starts = [int(s) * scale for s in starts]
+        index.ends = [int(e) * scale for e in ends]
+        return index
+
+    def append(self, start, end):
+        if self.starts and start < self.starts[-1]:
+            raise ValueError(f"Przedział {start} przed ostatnim ({self.starts[-1]})")
+        self.ends.append(int(end))
+        self.starts.append(int(start))
+
+    def extend_last(self, end):
+        """Przesuwa koniec ostatniego (trwającego) przedziału."""
+        self.ends[-1] = int(end)
+
+    def replace_last(self, start, end):
+        """Nowe granice ostatniego przedziału (np. doprecyzowane co do próbki)."""
+        if len(self.starts) > 1 and start < self.starts[-2]:
+            raise ValueError(f"Przedział {start} przed poprzednim ({self.starts[-2]})")
+        self.ends[-1] = int(end)
+        self.starts[-1] = int(start)
+
+    def find(self, position):
+        """Indeks przedziału zawierającego position albo None."""
+        i = bisect_right(self.starts, position) - 1
+        if 0 <= i < len(self.ends) and position <= self.ends[i]:
+            return i
+        return None
+
+    def next_after(self, position):
+        """Pierwszy przedział zaczynający się za position: (start, end) albo None."""
+        i = bisect_right(self.starts, position)
+        if i < len(self.starts) and i < len(self.ends):
+            return self.starts[i], self.ends[i]
+        return None
+
+    def overlapping(self, start, end):
+        """Indeks pierwszego przedziału mającego część wspólną z [start, end] albo None."""
+        i = self.find(start)
+        if i is not None:
+            return i
+        upcoming = bisect_right(self.starts, start)
+        if upcoming < len(self) and self.starts[upcoming] <= end:
+            return upcoming
+        return None
+
+    def distance_to_next(self, position):
+        """0 wewnątrz przedziału, odległość do początku następnego albo None (brak kolejnych)."""
+        if self.find(position) is not None:
+            return 0
+        upcoming = self.next_after(position)
+        return upcoming[0] - position if upcoming is not None else None
+
+    def __len__(self):
+        return min(len(self.starts), len(self.ends))
+
+    def __getitem__(self, i):
+        return self.starts[i], self.ends[i]
+
+    def __iter__(self):
+        return iter(list(zip(self.starts, self.ends)))
+
+    def __repr__(self):
+        return f"IntervalIndex({list(self)})"
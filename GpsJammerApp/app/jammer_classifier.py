@@ -0,0 +1,168 @@
+import numpy as np
+
+try:
+    from .power_scan import IQFile
+except ImportError:
+    from power_scan import IQFile
+
+# STFT: ramki po FFT_SIZE próbek, FRAMES_PER_CHUNK ramek z początku każdego chunka mocy
+FFT_SIZE = 1024
+FRAMES_PER_CHUNK = 8
+# Krótkie ramki obwiedni mocy (impulsy 1 kHz przy 2.048 MS/s trwają ~1000 próbek)
+ENVELOPE_FRAME = 64
+
+# Z długiego przedziału brane są grupy kolejnych chunków rozłożone równomiernie
+GROUP_CHUNKS = 8
+MAX_GROUPS = 8
+
+# Progi klasyfikatora (mediany cech w przedziale)
+PULSED_ENVELOPE_CV = 0.5          # zmienność obwiedni mocy (std / średnia)
+BROADBAND_FLATNESS = 0.4          # płaskość widma (średnia geometryczna / arytmetyczna)
+BROADBAND_KURTOSIS = 2.5          # kurtoza I/Q: szum gaussowski ~3, stała obwiednia ~1.5
+CHIRP_DRIFT_HZ_S = 2000.0         # dryf częstotliwości szczytu
+CW_PEAK_CONCENTRATION = 0.3       # udział energii w binie szczytu (+/- 1 bin)
+
+JAMMER_TYPES = ('cw', 'chirp', 'pulsed', 'broadband', 'unknown')
+JAMMER_TYPE_NAMES = {
+    'cw': 'CW (fala ciągła)',
+    'chirp': 'Chirp (przemiatanie)',
+    'pulsed': 'Impulsowy',
+    'broadband': 'Szerokopasmowy',
+    'unknown': 'Nieokreślony',
+}
+
+_WINDOW = np.hanning(FFT_SIZE).astype(np.float32)
+
+
+def chunk_spectral_features(frames, sample_rate):
+    """Cechy chunków z ramek complex64 o kształcie (chunki, FRAMES_PER_CHUNK, FFT_SIZE) - jedno wsadowe FFT.
+
+    Zwraca słownik tablic (po jednej wartości na chunk): flatness, peak_concentration,
+    peak_freq_hz, kurtosis, envelope_cv.
+    """
+    n_chunks = frames.shape[0]
+    spectra = np.fft.fftshift(np.fft.fft(frames * _WINDOW, axis=-1), axes=-1)
+    psd = spectra.real ** 2 + spectra.imag ** 2 + 1e-12
+
+    # Płaskość uśrednionego widma chunka
+    mean_psd = psd.mean(axis=1)
+    flatness = np.exp(np.mean(np.log(mean_psd), axis=1)) / np.mean(mean_psd, axis=1)
+
+    # Koncentracja energii w szczycie każdej ramki (+/- 1 bin), średnio w chunku
+    peak_bins = np.argmax(psd, axis=-1)
+    total = psd.sum(axis=-1)
+    peak_energy = np.zeros_like(total)
+    for offset in (-1, 0, 1):
+        idx = np.clip(peak_bins + offset, 0, FFT_SIZE - 1)
+        peak_energy += np.take_along_axis(psd, idx[..., None], axis=-1)[..., 0]
+    peak_concentration = (peak_energy / total).mean(axis=1)
+
+    # Częstotliwość szczytu widma chunka z interpolacją paraboliczną (log)
+    k = np.clip(np.argmax(mean_psd, axis=1), 1, FFT_SIZE - 2)
+    rows = np.arange(n_chunks)
+    left, mid, right = (np.log(mean_psd[rows, k + d]) for d in (-1, 0, 1))
+    denom = left - 2 * mid + right
+    delta = np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / np.where(denom == 0, 1, denom), 0.0)
+    peak_freq_hz = (k + delta - FFT_SIZE / 2) * sample_rate / FFT_SIZE
+
+    # Kurtoza składowych I/Q (czwarty moment / wariancja^2)
+    samples = frames.reshape(n_chunks, -1)
+    kurtosis = np.zeros(n_chunks)
+    for part in (samples.real, samples.imag):
+        centered = part - part.mean(axis=1, keepdims=True)
+        var = np.mean(centered ** 2, axis=1)
+        kurtosis += np.mean(centered ** 4, axis=1) / np.maximum(var ** 2, 1e-12) / 2
+
+    # Zmienność obwiedni mocy w krótkich ramkach
+    envelope = (samples.real ** 2 + samples.imag ** 2).reshape(n_chunks, -1, ENVELOPE_FRAME).mean(axis=-1)
+    envelope_cv = envelope.std(axis=1) / np.maximum(envelope.mean(axis=1), 1e-12)
+
+    return {
+        'flatness': flatness,
+        'peak_concentration': peak_concentration,
+        'peak_freq_hz': peak_freq_hz,
+        'kurtosis': kurtosis,
+        'envelope_cv': envelope_cv,
+    }
+
+
+def sample_interval_chunks(first_chunk, last_chunk):
+    """Chunki do analizy przedziału [first_chunk, last_chunk): grupy kolejnych chunków rozłożone równomiernie."""
+    length = last_chunk - first_chunk
+    if length <= GROUP_CHUNKS * MAX_GROUPS:
+        return np.arange(first_chunk, last_chunk)
+    group_starts = np.linspace(first_chunk, last_chunk - GROUP_CHUNKS, MAX_GROUPS).astype(np.int64)
+    return (group_starts[:, None] + np.arange(GROUP_CHUNKS)).ravel()
+
+
+def interval_features(reader, chunk_size_bytes, first_chunk, last_chunk):
+    """Cechy wybranych chunków przedziału - czytane z mmap tylko ramki STFT (nie cały przedział)."""
+    chunk_samples = chunk_size_bytes // 2
+    frame_samples = FRAMES_PER_CHUNK * FFT_SIZE
+    chunks = [c for c in sample_interval_chunks(first_chunk, last_chunk)
+              if (c * chunk_samples + frame_samples) <= reader.num_samples]
+    if not chunks:
+        return None, None
+
+    frames = np.empty((len(chunks), FRAMES_PER_CHUNK, FFT_SIZE), dtype=np.complex64)
+    for row, chunk in enumerate(chunks):
+        frames[row] = reader.read(chunk * chunk_samples, frame_samples).reshape(FRAMES_PER_CHUNK, FFT_SIZE)
+    return np.asarray(chunks), chunk_spectral_features(frames, reader.sample_rate)
+
+
+def _drift_rate(chunks, peak_freq_hz, chunk_duration):
+    # Nachylenie f(t) w każdej grupie kolejnych chunków, mediana |nachylenia|
+    slopes = []
+    breaks = np.flatnonzero(np.diff(chunks) != 1) + 1
+    for group in np.split(np.arange(len(chunks)), breaks):
+        if len(group) < 3:
+            continue
+        t = chunks[group] * chunk_duration
+        f = peak_freq_hz[group]
+        t_centered = t - t.mean()
+        slopes.append(abs(np.sum(t_centered * (f - f.mean())) / np.sum(t_centered ** 2)))
+    return float(np.median(slopes)) if slopes else 0.0
+
+
+def classify_features(summary):
+    """Typ jammera z median cech przedziału."""
+    if summary['envelope_cv'] > PULSED_ENVELOPE_CV:
+        return 'pulsed'
+    if summary['flatness'] > BROADBAND_FLATNESS and summary['kurtosis'] > BROADBAND_KURTOSIS:
+        return 'broadband'
+    if summary['drift_hz_s'] > CHIRP_DRIFT_HZ_S:
+        return 'chirp'
+    if summary['peak_concentration'] > CW_PEAK_CONCENTRATION:
+        return 'cw'
+    return 'unknown'
+
+
+def classify_interval(reader, chunk_size_bytes, first_chunk, last_chunk):
+    """Klasyfikuje przedział wysokiej mocy [first_chunk, last_chunk). Zwraca słownik: type + mediany cech."""
+    chunks, features = interval_features(reader, chunk_size_bytes, first_chunk, last_chunk)
+    if features is None:
+        return {'type': 'unknown'}
+    chunk_duration = (chunk_size_bytes // 2) / reader.sample_rate
+    summary = {name: float(np.median(values)) for name, values in features.items() if name != 'peak_freq_hz'}
+    summary['peak_freq_hz'] = float(np.median(features['peak_freq_hz']))
+    summary['drift_hz_s'] = _drift_rate(chunks, features['peak_freq_hz'], chunk_duration)
+    summary['type'] = classify_features(summary)
+    return summary
+
+
+class JammerClassifier:
+    """Klasyfikacja przedziałów F1 jednego nagrania; czytane są tylko ramki STFT (mmap)."""
+
+    def __init__(self, file_path, chunk_size_bytes, sample_rate=2048000):
+        self.file_path = file_path
+        self.chunk_size_bytes = chunk_size_bytes
+        self.sample_rate = sample_rate
+        self.reader = None
+
+    def classify(self, first_chunk, last_chunk):
+        # Plik mógł urosnąć (tryb śledzenia) - czytnik odświeżany przy każdym przedziale
+        self.reader = IQFile(self.file_path, 'uint8', self.sample_rate)
+        return classify_interval(self.reader, self.chunk_size_bytes, first_chunk, last_chunk)
+
+    def classify_byte_range(self, start_byte, end_byte):
+        return self.classify(start_byte // self.chunk_size_bytes, -(-end_byte // self.chunk_size_bytes))
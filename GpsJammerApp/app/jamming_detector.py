@@ -0,0 +1,363 @@
+import json
+from bisect import bisect_left, insort
+from collections import deque
+
+import numpy as np
+
+try:
+    from .antenna_fusion import FUSION_MIN_AGREE
+    from .epoch_record import BinaryEpoch, IQ_SAMPLE_BYTES
+    from .interval_index import IntervalIndex
+except ImportError:
+    from antenna_fusion import FUSION_MIN_AGREE
+    from epoch_record import BinaryEpoch, IQ_SAMPLE_BYTES
+    from interval_index import IntervalIndex
+
+# Próbkowanie nagrań RTL-SDR (odległość do przedziału F1 w sekundach nagrania)
+SAMPLE_RATE_HZ = 2048000
+
+
+class RollingMedian:
+    """Mediana ostatnich maxlen wartości - okno (deque) i jego posortowana kopia (bisect),
+    zamiast np.median całego okna przy każdej epoce."""
+
+    __slots__ = ('window', 'ordered')
+
+    def __init__(self, maxlen):
+        self.window = deque(maxlen=maxlen)
+        self.ordered = []
+
+    def __len__(self):
+        return len(self.window)
+
+    def append(self, value):
+        if len(self.window) == self.window.maxlen:
+            del self.ordered[bisect_left(self.ordered, self.window[0])]
+        self.window.append(value)
+        insort(self.ordered, value)
+
+    def clear(self):
+        self.window.clear()
+        self.ordered.clear()
+
+    def median(self):
+        n = len(self.ordered)
+        mid = n // 2
+        return self.ordered[mid] if n % 2 else (self.ordered[mid - 1] + self.ordered[mid]) / 2
+
+
+def small_median(values):
+    """np.median dla kilkunastu wartości (residua satelitów epoki) bez narzutu NumPy."""
+    ordered = sorted(values.tolist())
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+
+class JammingDetector:
+    """Detekcja zakłóceń F1-F4 na epokach gnssdec - bez Qt, do GUI (GPSAnalysisThread) i narzędzi offline.
+
+    F1 - epoka w przedziale wysokiej mocy (jamming_byte_ranges, z pre-skanu albo skanu strumieniowego),
+    F2 - spadek C/N0 względem mediany historii, F4 - wysokość poza zakresem; głosy pozostałych anten
+    (fusion, antenna_fusion.AntennaFusion) potwierdzają F2/F4 od razu albo je tłumią.
+
+    Zdarzenia przez wywołania zwrotne (każde opcjonalne):
+      on_jamming_start(reason, safe_position) - potwierdzony atak; safe_position None bez pozycji sprzed ataku,
+      on_jamming_end(event) - koniec ataku (słownik jak w jamming_events),
+      on_power_warning(distance_sec) - przedział F1 za distance_sec sekund nagrania,
+      annotate_event(start_sample, end_sample) - dodatkowe pola zdarzenia (np. typ jammera, nasycenie).
+
+    Pozycje epok i zdarzeń (buffcnt, start_sample, end_sample) są w próbkach, jak podaje gnssdec;
+    przedziały F1 w bajtach pliku - porównuje je current_byte.
+    """
+
+    __slots__ = (
+        'SAMPLE_RATE_HZ', 'F1_LOOKAHEAD_SEC', 'THRESHOLD_CN0_DROP_DB', 'THRESHOLD_RESIDUALS_MEDIAN_M',
+        'THRESHOLD_RESIDUAL_SINGLE_SAT_M', 'MIN_BAD_SATS_FOR_ALARM', 'THRESHOLD_HGT_MAX', 'THRESHOLD_GDOP_MAX',
+        'THRESHOLD_NSAT_MIN', 'required_jamming_duration_sec', 'required_clean_duration_sec',
+        'jamming_byte_ranges', 'fusion',
+        'on_jamming_start', 'on_jamming_end', 'on_power_warning', 'annotate_event',
+        'current_buffcnt', 'current_byte', 'current_lat', 'current_lon', 'current_hgt', 'current_nsat', 'current_gdop',
+        'current_clk_bias', 'current_signal_time', 'current_cn0_avg', 'current_residuals_median',
+        'current_residuals_bad_count', 'cn0_history', 'median_cn0', 'warned_f1_start',
+        'jamming_detected', 'jamming_events', 'potential_jamming_start_signal_time',
+        'potential_jamming_end_signal_time', 'potential_start_buffcnt', 'active_event_start_buffcnt',
+        'active_event_start_time', 'last_position_before_jamming', 'epochs',
+    )
+
+    def __init__(self, jamming_byte_ranges=None, fusion=None, sample_rate=SAMPLE_RATE_HZ,
+                 on_jamming_start=None, on_jamming_end=None, on_power_warning=None, annotate_event=None):
+        self.SAMPLE_RATE_HZ = sample_rate
+        # Ostrzeżenie o zbliżającym się przedziale F1 (w sekundach nagrania)
+        self.F1_LOOKAHEAD_SEC = 2.0
+        self.THRESHOLD_CN0_DROP_DB = 8.0
+        self.THRESHOLD_RESIDUALS_MEDIAN_M = 40.0
+        self.THRESHOLD_RESIDUAL_SINGLE_SAT_M = 800.0
+        self.MIN_BAD_SATS_FOR_ALARM = 2
+        self.THRESHOLD_HGT_MAX = 10000.0
+        self.THRESHOLD_GDOP_MAX = 6.0
+        self.THRESHOLD_NSAT_MIN = 4
+        self.required_jamming_duration_sec = 2.5
+        self.required_clean_duration_sec = 2.0
+
+        # Przedziały F1 [start_byte, end_byte] - posortowane, wyszukiwanie przez bisect
+        self.jamming_byte_ranges = jamming_byte_ranges if jamming_byte_ranges is not None else IntervalIndex()
+        self.fusion = fusion
+
+        self.on_jamming_start = on_jamming_start
+        self.on_jamming_end = on_jamming_end
+        self.on_power_warning = on_power_warning
+        self.annotate_event = annotate_event
+
+        # Zmienne stanu
+        self.current_buffcnt = 0
+        self.current_byte = 0
+        self.current_lat = 0.0
+        self.current_lon = 0.0
+        self.current_hgt = 0.0
+        self.current_nsat = 0
+        self.current_gdop = 0.0
+        self.current_clk_bias = 0.0
+        self.current_signal_time = 0.0
+        self.current_cn0_avg = 0.0
+        self.current_residuals_median = 0.0
+        self.current_residuals_bad_count = 0
+
+        # Historia
+        self.cn0_history = RollingMedian(100)
+        self.median_cn0 = 0.0
+        self.warned_f1_start = None
+
+        # Logika Jammingu
+        self.jamming_detected = False
+        self.jamming_events = []
+        self.potential_jamming_start_signal_time = None
+        self.potential_jamming_end_signal_time = None
+        self.potential_start_buffcnt = 0
+        self.active_event_start_buffcnt = 0
+        self.active_event_start_time = 0.0
+        self.last_position_before_jamming = {
+            'lat': 0.0, 'lon': 0.0, 'hgt': 0.0, 'buffcnt': 0, 'valid': False
+        }
+        self.epochs = 0
+
+    def feed(self, epoch):
+        """Epoka z gnssdec: treść POST /data (bajty JSON), słownik JSON (NDJSON) albo epoch_record.BinaryEpoch.
+
+        Zwraca False, gdy epoka nie niosła pozycji (albo JSON był uszkodzony).
+        """
+        if isinstance(epoch, (bytes, bytearray)):
+            try:
+                epoch = json.loads(epoch)
+            except ValueError:
+                print("Błąd parsowania JSON")
+                return False
+        if isinstance(epoch, BinaryEpoch):
+            # Pola nagłówka i kolumny obserwacji wprost z bufora rekordu
+            header = epoch.header
+            self.current_signal_time = float(header['elapsed_time'])
+            self.update_epoch_position(int(header['buffcnt']), float(header['lat']), float(header['lon']),
+                                       float(header['hgt']), int(header['nsat']), float(header['gdop']),
+                                       float(header['clk_bias']), epoch.observations['snr'],
+                                       epoch.observations['residual'])
+            return True
+
+        position = epoch.get('position', {})
+        observations = epoch.get('observations', [])
+        try:
+            self.current_signal_time = float(epoch.get('elapsed_time', 0.0))
+        except (TypeError, ValueError):
+            pass
+        if not position:
+            return False
+        self.update_epoch_position(
+            position.get('buffcnt', 0), float(position.get('lat', 0.0)), float(position.get('lon', 0.0)),
+            float(position.get('hgt', 0.0)), position.get('nsat', 0), float(position.get('gdop', 0.0)),
+            float(position.get('clk_bias', 0.0)),
+            np.array([obs.get('snr', 0.0) for obs in observations if 'snr' in obs], dtype=np.float64),
+            np.array([obs.get('residual', 0.0) for obs in observations if 'residual' in obs], dtype=np.float64))
+        return True
+
+    def feed_batch(self, epochs):
+        """Epoki po kolei (np. iter_epoch_log); zwraca liczbę epok z pozycją."""
+        feed = self.feed
+        return sum(1 for epoch in epochs if feed(epoch))
+
+    def update_epoch_position(self, buffcnt, lat, lon, hgt, nsat, gdop, clk_bias, snr_values, residuals):
+        """Stan pozycji i statystyki obserwacji epoki (snr_values / residuals - tablice NumPy)."""
+        self.epochs += 1
+        self.current_buffcnt = buffcnt
+        # Przedziały F1 są w bajtach pliku, buffcnt w próbkach - przeliczenie raz na epokę
+        self.current_byte = buffcnt * IQ_SAMPLE_BYTES
+        self.current_lat = lat
+        self.current_lon = lon
+        self.current_hgt = hgt
+        self.current_nsat = nsat
+        self.current_gdop = gdop
+        self.current_clk_bias = clk_bias
+
+        # Analiza obserwacji
+        if len(snr_values):
+            self.current_cn0_avg = float(snr_values.sum()) / len(snr_values)
+            if len(residuals):
+                self.current_residuals_median = small_median(residuals)
+                self.current_residuals_bad_count = int(np.count_nonzero(residuals > self.THRESHOLD_RESIDUAL_SINGLE_SAT_M))
+            else:
+                self.current_residuals_median = 0.0
+                self.current_residuals_bad_count = 0
+        else:
+            self.current_cn0_avg = 0.0
+            self.current_residuals_median = 0.0
+            self.current_residuals_bad_count = 0
+
+        if not self.jamming_detected and self.current_cn0_avg > 0:
+            self.cn0_history.append(self.current_cn0_avg)
+        if len(self.cn0_history) > 10:
+            self.median_cn0 = self.cn0_history.median()
+        else:
+            self.median_cn0 = self.current_cn0_avg
+
+        is_safe = True
+        # Sprawdzenie mapy mocy
+        if self.jamming_byte_ranges:
+            # Jeśli jesteśmy w którymkolwiek zakresie lub po nim
+            if self.current_byte >= self.jamming_byte_ranges[0][0]:
+                is_safe = False
+
+        if self.jamming_detected:
+            is_safe = False
+
+        if is_safe and self.current_lat != 0.0 and self.current_nsat >= 4:
+            self.last_position_before_jamming = {
+                'lat': self.current_lat,
+                'lon': self.current_lon,
+                'hgt': self.current_hgt,
+                'buffcnt': self.current_buffcnt,
+                'valid': True
+            }
+
+        self.check_jamming_conditions()
+
+    def warn_upcoming_power_interval(self):
+        """Ostrzega raz na przedział, gdy do początku kolejnego przedziału F1 zostało mniej niż F1_LOOKAHEAD_SEC."""
+        upcoming = self.jamming_byte_ranges.next_after(self.current_byte)
+        if upcoming is None or upcoming[0] == self.warned_f1_start:
+            return
+        distance_sec = (upcoming[0] - self.current_byte) / IQ_SAMPLE_BYTES / self.SAMPLE_RATE_HZ
+        if distance_sec <= self.F1_LOOKAHEAD_SEC:
+            self.warned_f1_start = upcoming[0]
+            if self.on_power_warning:
+                self.on_power_warning(distance_sec)
+
+    def check_jamming_conditions(self):
+        # F1: MOC
+        flag_f1 = self.jamming_byte_ranges.find(self.current_byte) is not None
+        if not flag_f1 and not self.jamming_detected:
+            self.warn_upcoming_power_interval()
+
+        # F2: JAKOŚĆ
+        flag_f2 = False
+        if len(self.cn0_history) > 40:
+            if self.current_cn0_avg < (self.median_cn0 - self.THRESHOLD_CN0_DROP_DB):
+                flag_f2 = True
+
+        # F3: INTEGRITY
+        flag_f3 = False
+        integrity_fail = (self.current_residuals_median > self.THRESHOLD_RESIDUALS_MEDIAN_M) or \
+                         (self.current_residuals_bad_count >= self.MIN_BAD_SATS_FOR_ALARM)
+
+        # F4: WYSOKOŚĆ
+        flag_hgt = False
+        if self.current_nsat > 0 and abs(self.current_hgt) > self.THRESHOLD_HGT_MAX:
+            flag_hgt = True
+
+        nav_issue = (flag_f3 or flag_hgt) and (self.current_nsat > 0)
+        is_jamming_now = flag_f1 or flag_f2 or nav_issue
+
+        if not self.jamming_detected:
+            if is_jamming_now:
+                if flag_f1:
+                    self.confirm_jamming_start(reason="Moc (Mapowana)")
+                else:
+                    agree, fresh = self.fusion.votes(self.current_buffcnt) if self.fusion else (0, 0)
+                    if fresh and agree == 0:
+                        # Pozostałe anteny widzą czyste niebo - lokalny problem anteny głównej
+                        self.potential_jamming_start_signal_time = None
+                    elif fresh and agree + 1 >= FUSION_MIN_AGREE:
+                        if self.potential_jamming_start_signal_time is None:
+                            self.potential_start_buffcnt = self.current_buffcnt
+                        self.confirm_jamming_start(reason=f"Jakość/Integrity ({agree + 1} anteny)")
+                    elif self.potential_jamming_start_signal_time is None:
+                        self.potential_jamming_start_signal_time = self.current_signal_time
+                        self.potential_start_buffcnt = self.current_buffcnt
+                    elif (self.current_signal_time - self.potential_jamming_start_signal_time) >= self.required_jamming_duration_sec:
+                        self.confirm_jamming_start(reason="Jakość/Integrity")
+            else:
+                self.potential_jamming_start_signal_time = None
+        else:
+            if not is_jamming_now:
+                if self.potential_jamming_end_signal_time is None:
+                    self.potential_jamming_end_signal_time = self.current_signal_time
+                else:
+                    clean_duration = self.current_signal_time - self.potential_jamming_end_signal_time
+                    if clean_duration >= self.required_clean_duration_sec:
+                        self.confirm_jamming_end()
+                        self.potential_jamming_end_signal_time = None
+            else:
+                self.potential_jamming_end_signal_time = None
+
+    def confirm_jamming_start(self, reason="N/A"):
+        self.jamming_detected = True
+
+        start_buffcnt = self.potential_start_buffcnt
+        if reason == "Moc (Mapowana)" and self.jamming_byte_ranges:
+            range_idx = self.jamming_byte_ranges.find(self.current_byte)
+            if range_idx is not None:
+                start_buffcnt = self.jamming_byte_ranges[range_idx][0] // IQ_SAMPLE_BYTES
+        else:
+            start_buffcnt = self.potential_start_buffcnt if self.potential_start_buffcnt > 0 else self.current_buffcnt
+
+        self.active_event_start_buffcnt = start_buffcnt
+        self.active_event_start_time = self.current_signal_time
+
+        if reason.startswith("Jakość/Integrity") and self.potential_jamming_start_signal_time:
+            self.active_event_start_time = self.potential_jamming_start_signal_time
+
+        print(f"[DETEKTOR] 🚨 ATAK POTWIERDZONY! Powód: {reason}")
+        print(f"[DETEKTOR]    Start: {self.active_event_start_time:.2f}s")
+
+        safe_position = self.last_position_before_jamming if self.last_position_before_jamming['valid'] else None
+        if safe_position is None:
+            print("[DETEKTOR] ⚠️ Brak bezpiecznej pozycji przed atakiem!")
+        if self.on_jamming_start:
+            self.on_jamming_start(reason, safe_position)
+
+    def confirm_jamming_end(self):
+        self.jamming_detected = False
+        print(f"[DETEKTOR] ✅ Koniec ataku. (Koniec: {self.current_signal_time:.2f}s)")
+        event = self.close_active_event()
+        if self.on_jamming_end:
+            self.on_jamming_end(event)
+
+    def close_active_event(self):
+        """Zapisuje zdarzenie od startu ataku do bieżącej epoki (też koniec pliku w trakcie jammingu)."""
+        end_time = self.current_signal_time
+        start_sample = self.active_event_start_buffcnt
+        end_sample = self.current_buffcnt
+        event = {
+            'start_sample': start_sample,
+            'end_sample': end_sample,
+            'start_time': self.active_event_start_time,
+            'end_time': end_time,
+            'duration': end_time - self.active_event_start_time,
+        }
+        if self.annotate_event:
+            event.update(self.annotate_event(start_sample, end_sample))
+        self.jamming_events.append(event)
+        return event
+
+    def finish(self):
+        """Koniec epok: zamyka trwające zdarzenie i zwraca listę zdarzeń."""
+        if self.jamming_detected:
+            self.close_active_event()
+            self.jamming_detected = False
+        return self.jamming_events
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+
+try:
+    from .recording_cache import CACHE_ROOT, POWER_CACHE_MAX_BYTES, load_cached_arrays, store_cached_arrays
+except ImportError:
+    from recording_cache import CACHE_ROOT, POWER_CACHE_MAX_BYTES, load_cached_arrays, store_cached_arrays
+
+# Podokna wewnątrz chunka mocy: 256 próbek = 125 us przy 2.048 MS/s
+# (impuls jammera 1 kHz / 50% trwa 0.5 ms - kilka podokien na impuls)
+PEAK_SUBWINDOW_SAMPLES = 256
+# Percentyl mocy podokien odporny na pojedynczy skok szumu
+PEAK_PERCENTILE = 99
+# Wypełnienie: udział podokien z mocą nie mniejszą niż połowa maksimum (-3 dB)
+DUTY_LEVEL = 0.5
+# Tło mocy szczytowej - ten sam percentyl co tło średniej w F1
+PEAK_BASELINE_PERCENTILE = 5
+
+PEAK_CACHE_DIR = os.path.join(CACHE_ROOT, 'power_maps')
+
+
+def chunk_peak_stats(sample_power, num_chunks):
+    """Max, p99 i wypełnienie mocy podokien dla num_chunks chunków z sample_power (moc I²+Q² próbek).
+
+    Jedno przejście: średnie podokien z reshape, statystyki wzdłuż osi podokien.
+    Chunk krótszy niż podokno traktowany jest jako jedno podokno.
+    """
+    sample_power = np.asarray(sample_power)
+    chunk_samples = len(sample_power) // num_chunks
+    sub_count = max(1, chunk_samples // PEAK_SUBWINDOW_SAMPLES)
+    sub_samples = chunk_samples // sub_count
+    rows = sample_power[:num_chunks * chunk_samples].reshape(num_chunks, chunk_samples)
+    sub = rows[:, :sub_count * sub_samples].reshape(num_chunks, sub_count, sub_samples).mean(axis=2)
+
+    maxs = sub.max(axis=1)
+    rank = int(round(PEAK_PERCENTILE / 100.0 * (sub_count - 1)))
+    p99s = np.partition(sub, rank, axis=1)[:, rank]
+    duty = np.mean(sub >= DUTY_LEVEL * maxs[:, None], axis=1)
+    return maxs.astype(np.float32), p99s.astype(np.float32), duty.astype(np.float32)
+
+
+def peak_anomaly_mask(peak_powers, threshold_db, baseline=None):
+    """Chunki, w których moc szczytowa (p99 podokien) przekracza tło szczytowe o threshold_db.
+
+    Wykrywa krótkie impulsy rozmyte w średniej chunka. Zwraca (maska, tło).
+    """
+    peak_powers = np.asarray(peak_powers)
+    if baseline is None:
+        baseline = float(np.percentile(peak_powers, PEAK_BASELINE_PERCENTILE)) if len(peak_powers) else 1.0
+        if baseline <= 0: baseline = 1.0
+    return peak_powers > baseline * 10 ** (threshold_db / 10.0), baseline
+
+
+class PeakStatsBuilder:
+    """Zbiera statystyki szczytowe chunków w kolejności pliku (callback skanu mocy)."""
+
+    def __init__(self):
+        self.parts = []
+
+    def add(self, maxs, p99s, duty):
+        self.parts.append((maxs, p99s, duty))
+
+    def finish(self):
+        if not self.parts:
+            empty = np.empty(0, dtype=np.float32)
+            return {'max': empty, 'p99': empty, 'duty': empty}
+        return {name: np.concatenate([part[i] for part in self.parts])
+                for i, name in enumerate(('max', 'p99', 'duty'))}
+
+
+def _cache_params(chunk_size_bytes):
+    return f"{chunk_size_bytes}-{PEAK_SUBWINDOW_SAMPLES}-{PEAK_PERCENTILE}"
+
+
+def load_peak_profile(file_path, chunk_size_bytes, cache_dir=None):
+    """Statystyki szczytowe z cache ('max', 'p99', 'duty') albo None."""
+    arrays = load_cached_arrays('peaks', file_path, _cache_params(chunk_size_bytes), cache_dir or PEAK_CACHE_DIR)
+    return {name: arrays[name] for name in ('max', 'p99', 'duty')} if arrays is not None else None
+
+
+def store_peak_profile(file_path, chunk_size_bytes, peaks, cache_dir=None, max_bytes=POWER_CACHE_MAX_BYTES):
+    return store_cached_arrays('peaks', file_path, _cache_params(chunk_size_bytes), peaks,
+                               cache_dir or PEAK_CACHE_DIR, max_bytes)
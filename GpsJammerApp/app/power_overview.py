@@ -0,0 +1,71 @@
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QColor, QPen
+from PySide6.QtCore import Qt, QPointF
+
+
+class PowerOverviewStrip(QWidget):
+    """Pasek podglądu mocy całego nagrania rysowany z piramidy mocy.
+
+    Przy każdym rysowaniu pobierany jest poziom piramidy dopasowany do szerokości
+    paska - koszt zależy od liczby pikseli, nie od długości pliku.
+    """
+
+    def __init__(self, parent=None, threshold_db=6.0):
+        super().__init__(parent)
+        self.pyramid = None
+        self.threshold_db = threshold_db
+        self.setMinimumHeight(48)
+        self.setMaximumHeight(64)
+        self.setToolTip("Moc nagrania względem tła [dB] (min / max / średnia)")
+
+    def set_pyramid(self, pyramid, threshold_db=None):
+        self.pyramid = pyramid
+        if threshold_db is not None:
+            self.threshold_db = threshold_db
+        self.setVisible(pyramid is not None)
+        self.update()
+
+    def clear(self):
+        self.set_pyramid(None)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#2c3e50"))
+        if self.pyramid is None or self.pyramid.total_samples == 0:
+            painter.end()
+            return
+
+        width = max(1, self.width())
+        height = self.height()
+        data = self.pyramid.query(0, self.pyramid.total_samples, max_points=width)
+
+        # dB względem tła (5. percentyl średnich), oś od -3 dB do max(+20 dB, szczyt)
+        baseline = max(float(np.percentile(data['mean'], 5)), 1e-10)
+        to_db = lambda x: 10 * np.log10(np.maximum(x, 1e-10) / baseline)
+        low_db, high_db = to_db(data['min']), to_db(data['max'])
+        mean_db = to_db(data['mean'])
+        top_db = max(20.0, float(high_db.max()))
+        bottom_db = -3.0
+        to_y = lambda db: height - 1 - (np.clip(db, bottom_db, top_db) - bottom_db) / (top_db - bottom_db) * (height - 2)
+
+        bin_x = (data['start_sample'] + np.arange(len(mean_db)) * data['bin_samples']) / self.pyramid.total_samples * width
+        # QPointF przyjmuje tylko float Pythona
+        bin_x = bin_x.tolist()
+        y_low, y_high, y_mean = to_y(low_db).tolist(), to_y(high_db).tolist(), to_y(mean_db).tolist()
+
+        # Obwiednia min-max (zakres w obrębie binu)
+        painter.setPen(QPen(QColor("#5d6d7e"), 1))
+        for x, y0, y1 in zip(bin_x, y_low, y_high):
+            painter.drawLine(QPointF(x, y0), QPointF(x, y1))
+
+        # Średnia - czerwona powyżej progu F1
+        for i in range(1, len(bin_x)):
+            color = "#e74c3c" if mean_db[i] > self.threshold_db else "#3498db"
+            painter.setPen(QPen(QColor(color), 1.5))
+            painter.drawLine(QPointF(bin_x[i - 1], y_mean[i - 1]), QPointF(bin_x[i], y_mean[i]))
+
+        painter.setPen(QPen(QColor("#e74c3c"), 1, Qt.DashLine))
+        threshold_y = float(to_y(self.threshold_db))
+        painter.drawLine(QPointF(0, threshold_y), QPointF(width, threshold_y))
+        painter.end()
@@ -0,0 +1,150 @@
+import os
+import numpy as np
+
+try:
+    from .recording_cache import CACHE_ROOT, POWER_CACHE_MAX_BYTES, load_cached_arrays, store_cached_arrays
+except ImportError:
+    from recording_cache import CACHE_ROOT, POWER_CACHE_MAX_BYTES, load_cached_arrays, store_cached_arrays
+
+# Poziomy piramidy: od 2^10 do 2^24 próbek na bin (0.5 ms .. 8 s przy 2.048 MS/s)
+PYRAMID_MIN_LOG2 = 10
+PYRAMID_MAX_LOG2 = 24
+BASE_BIN_SAMPLES = 1 << PYRAMID_MIN_LOG2
+
+# Domyślna liczba punktów zwracanych dla zakresu (mniej więcej szerokość wykresu w px)
+DEFAULT_MAX_POINTS = 2000
+
+PYRAMID_CACHE_DIR = os.path.join(CACHE_ROOT, 'pyramids')
+
+
+def base_bins(sample_power):
+    """Min / max / średnia mocy próbek w binach po BASE_BIN_SAMPLES (ostatni może być niepełny)."""
+    sample_power = np.asarray(sample_power)
+    full = len(sample_power) // BASE_BIN_SAMPLES
+    rows = sample_power[:full * BASE_BIN_SAMPLES].reshape(full, BASE_BIN_SAMPLES)
+    mins = rows.min(axis=1)
+    maxs = rows.max(axis=1)
+    means = rows.mean(axis=1)
+
+    tail = sample_power[full * BASE_BIN_SAMPLES:]
+    if len(tail):
+        mins = np.append(mins, tail.min())
+        maxs = np.append(maxs, tail.max())
+        means = np.append(means, tail.mean())
+    return mins.astype(np.float32), maxs.astype(np.float32), means.astype(np.float32)
+
+
+def _reduce_level(mins, maxs, means, counts):
+    # Łączenie par sąsiednich binów; średnia ważona liczbą próbek (ostatni bin bywa niepełny)
+    even = len(mins) - len(mins) % 2
+    sums = means.astype(np.float64) * counts
+    new_mins = np.minimum(mins[0:even:2], mins[1:even:2])
+    new_maxs = np.maximum(maxs[0:even:2], maxs[1:even:2])
+    new_sums = sums[0:even:2] + sums[1:even:2]
+    new_counts = counts[0:even:2] + counts[1:even:2]
+    if even < len(mins):
+        new_mins = np.append(new_mins, mins[-1])
+        new_maxs = np.append(new_maxs, maxs[-1])
+        new_sums = np.append(new_sums, sums[-1])
+        new_counts = np.append(new_counts, counts[-1])
+    return new_mins, new_maxs, (new_sums / new_counts).astype(np.float32), new_counts
+
+
+class PowerPyramid:
+    """Wielorozdzielcza mapa mocy: dla każdego poziomu 2^k próbek tablice min / max / średnia.
+
+    Zapytanie o dowolny zakres czasu wybiera najgrubszy poziom, który daje co najmniej
+    tyle punktów, ile zmieści się na wykresie - koszt zależy od liczby pikseli, nie od pliku.
+    """
+
+    def __init__(self, levels, total_samples):
+        self.levels = levels                # log2 -> (mins, maxs, means)
+        self.total_samples = int(total_samples)
+
+    @classmethod
+    def from_base(cls, mins, maxs, means, total_samples):
+        counts = np.full(len(mins), BASE_BIN_SAMPLES, dtype=np.int64)
+        if len(counts) and total_samples % BASE_BIN_SAMPLES:
+            counts[-1] = total_samples % BASE_BIN_SAMPLES
+
+        levels = {PYRAMID_MIN_LOG2: (mins, maxs, means)}
+        for log2 in range(PYRAMID_MIN_LOG2 + 1, PYRAMID_MAX_LOG2 + 1):
+            if len(mins) <= 1:
+                break
+            mins, maxs, means, counts = _reduce_level(mins, maxs, means, counts)
+            levels[log2] = (mins, maxs, means)
+        return cls(levels, total_samples)
+
+    def level_for(self, num_samples, max_points=DEFAULT_MAX_POINTS):
+        """Najgrubszy poziom, który dla num_samples próbek daje co najmniej max_points binów."""
+        log2 = PYRAMID_MIN_LOG2
+        while log2 + 1 in self.levels and (num_samples >> (log2 + 1)) >= max_points:
+            log2 += 1
+        return log2
+
+    def query(self, start_sample=0, end_sample=None, max_points=DEFAULT_MAX_POINTS):
+        """Min / max / średnia dla zakresu próbek [start_sample, end_sample).
+
+        Zwraca słownik: 'bin_samples', 'start_sample' (początek pierwszego binu), 'min', 'max', 'mean'.
+        """
+        end_sample = self.total_samples if end_sample is None else min(end_sample, self.total_samples)
+        start_sample = max(0, start_sample)
+        log2 = self.level_for(max(0, end_sample - start_sample), max_points)
+        mins, maxs, means = self.levels[log2]
+        first = start_sample >> log2
+        last = -(-end_sample >> log2)
+        return {
+            'bin_samples': 1 << log2,
+            'start_sample': first << log2,
+            'min': mins[first:last],
+            'max': maxs[first:last],
+            'mean': means[first:last],
+        }
+
+    def to_arrays(self):
+        arrays = {'total_samples': np.int64(self.total_samples)}
+        for log2, (mins, maxs, means) in self.levels.items():
+            arrays[f'min_{log2}'] = mins
+            arrays[f'max_{log2}'] = maxs
+            arrays[f'mean_{log2}'] = means
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        levels = {}
+        for log2 in range(PYRAMID_MIN_LOG2, PYRAMID_MAX_LOG2 + 1):
+            if f'mean_{log2}' in arrays:
+                levels[log2] = (arrays[f'min_{log2}'], arrays[f'max_{log2}'], arrays[f'mean_{log2}'])
+        return cls(levels, int(arrays['total_samples']))
+
+
+class PyramidBuilder:
+    """Zbiera biny bazowe w kolejności pliku (callback skanu mocy) i buduje piramidę."""
+
+    def __init__(self):
+        self.parts = []
+
+    def add(self, mins, maxs, means):
+        self.parts.append((mins, maxs, means))
+
+    def base_arrays(self):
+        if not self.parts:
+            empty = np.empty(0, dtype=np.float32)
+            return empty, empty, empty
+        return tuple(np.concatenate([part[i] for part in self.parts]) for i in range(3))
+
+    def finish(self, total_samples):
+        return PowerPyramid.from_base(*self.base_arrays(), total_samples)
+
+
+def load_power_pyramid(file_path, cache_dir=None):
+    """Piramida mocy z cache albo None (brak wpisu / nagranie się zmieniło)."""
+    arrays = load_cached_arrays('pyramid', file_path, f"{PYRAMID_MIN_LOG2}-{PYRAMID_MAX_LOG2}",
+                                cache_dir or PYRAMID_CACHE_DIR)
+    return PowerPyramid.from_arrays(arrays) if arrays is not None else None
+
+
+def store_power_pyramid(file_path, pyramid, cache_dir=None, max_bytes=POWER_CACHE_MAX_BYTES):
+    """Zapisuje całą piramidę jako jeden plik w katalogu cache."""
+    return store_cached_arrays('pyramid', file_path, f"{PYRAMID_MIN_LOG2}-{PYRAMID_MAX_LOG2}",
+                               pyramid.to_arrays(), cache_dir or PYRAMID_CACHE_DIR, max_bytes)
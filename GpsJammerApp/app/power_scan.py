@@ -0,0 +1,359 @@
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# Wspólny czytnik I/Q (skrypty/iq_io.py) - jak w worker.py
+_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'skrypty')
+if _SCRIPTS_DIR not in sys.path:
+    sys.path.append(_SCRIPTS_DIR)
+from iq_io import IQFile
+
+try:
+    from .recording_cache import load_power_profile, store_power_profile
+    from .power_pyramid import BASE_BIN_SAMPLES, PyramidBuilder, base_bins, load_power_pyramid, store_power_pyramid
+    from .peak_stats import PeakStatsBuilder, chunk_peak_stats, load_peak_profile, store_peak_profile
+    from .saturation import chunk_clip_fraction
+    from .feature_store import FEATURE_CHUNK_BYTES, FeatureStore, FeatureStoreBuilder, chunk_features, load_feature_store, store_feature_store
+except ImportError:
+    from recording_cache import load_power_profile, store_power_profile
+    from power_pyramid import BASE_BIN_SAMPLES, PyramidBuilder, base_bins, load_power_pyramid, store_power_pyramid
+    from peak_stats import PeakStatsBuilder, chunk_peak_stats, load_peak_profile, store_peak_profile
+    from saturation import chunk_clip_fraction
+    from feature_store import FEATURE_CHUNK_BYTES, FeatureStore, FeatureStoreBuilder, chunk_features, load_feature_store, store_feature_store
+
+# Kwadraty (x - 127.5)^2 dla wszystkich 256 wartości bajtu RTL-SDR.
+# Wartości są dokładne w float32, więc I^2 + Q^2 z tablicy jest bit w bit
+# równe obliczeniom na (samples.astype(float32) - 127.5).
+POWER_LUT = (np.arange(256, dtype=np.float32) - np.float32(127.5)) ** 2
+
+# Ile bajtów pliku przetwarzamy jednym wywołaniem NumPy (bufory są współdzielone)
+SCAN_BLOCK_BYTES = 8 * 1024 * 1024
+
+# Tryb wieloprocesowy: minimalny shard i liczba shardów na proces
+MIN_SHARD_CHUNKS = 256
+SHARDS_PER_WORKER = 4
+
+# Tryb śledzenia rosnącego pliku (rtl_sdr wciąż nagrywa)
+FOLLOW_POLL_SEC = 0.25
+FOLLOW_IDLE_TIMEOUT_SEC = 3.0
+
+
+def count_power_chunks(file_size, chunk_size_bytes):
+    """Liczba chunków mocy dla pliku (ostatni może być niepełny)."""
+    usable_bytes = (file_size // 2) * 2
+    return -(-usable_bytes // chunk_size_bytes)
+
+
+def resolve_scan_workers(workers=None):
+    """Liczba procesów skanowania: None/0 -> wszystkie rdzenie."""
+    if not workers or workers < 1:
+        return os.cpu_count() or 1
+    return int(workers)
+
+
+def high_power_runs(mask):
+    """Zamienia maskę chunków na tablice (starts, ends) ciągłych przedziałów True."""
+    mask = np.asarray(mask, dtype=bool)
+    if mask.size == 0 or not mask.any():
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    diffs = np.diff(mask.astype(np.int8))
+    starts = np.where(diffs == 1)[0] + 1
+    ends = np.where(diffs == -1)[0] + 1
+    if mask[0]: starts = np.insert(starts, 0, 0)
+    if mask[-1]: ends = np.append(ends, len(mask))
+    return starts, ends
+
+
+def iter_power_blocks(file_path, chunk_size_bytes, first_chunk=0, last_chunk=None, pyramid_callback=None,
+                      peak_callback=None, feature_callback=None, clip_callback=None):
+    """Generator (indeks pierwszego chunka, moce bloku) - mmap czytany blokami po SCAN_BLOCK_BYTES.
+
+    pyramid_callback(mins, maxs, means) dostaje biny bazowe piramidy mocy z tych samych
+    danych (chunk musi być wielokrotnością BASE_BIN_SAMPLES próbek).
+    peak_callback(maxs, p99s, duty) dostaje statystyki podokien chunków bloku - przed yield bloku.
+    feature_callback(kolumny) dostaje wiersze magazynu cech (feature_store.chunk_features) bloku.
+    clip_callback(udziały) dostaje udział obciętych składowych I/Q chunków (bez pełnego magazynu cech).
+    """
+    file_size = os.path.getsize(file_path)
+    usable_bytes = (file_size // 2) * 2
+    num_chunks = count_power_chunks(file_size, chunk_size_bytes)
+    last_chunk = num_chunks if last_chunk is None else min(last_chunk, num_chunks)
+    if last_chunk <= first_chunk:
+        return
+
+    data = IQFile(file_path, 'uint8').raw
+    chunk_samples = chunk_size_bytes // 2
+    full_last = min(last_chunk, file_size // chunk_size_bytes)
+    full_chunks = max(0, full_last - first_chunk)
+    chunks_per_block = max(1, min(full_chunks, SCAN_BLOCK_BYTES // chunk_size_bytes))
+
+    # Bufory alokowane raz - kolejne bloki tylko je nadpisują
+    squares = np.empty(chunks_per_block * chunk_size_bytes, dtype=np.float32)
+    sample_power = np.empty(chunks_per_block * chunk_samples, dtype=np.float32)
+
+    try:
+        done = 0
+        while done < full_chunks:
+            n = min(chunks_per_block, full_chunks - done)
+            offset = (first_chunk + done) * chunk_size_bytes
+            raw = data[offset:offset + n * chunk_size_bytes]
+            sq = squares[:n * chunk_size_bytes]
+            np.take(POWER_LUT, raw, out=sq)
+
+            # Przeplot I/Q -> moc próbki, potem średnia w każdym wierszu (chunku)
+            iq = sq.reshape(-1, 2)
+            pw = sample_power[:n * chunk_samples]
+            np.add(iq[:, 0], iq[:, 1], out=pw)
+            if pyramid_callback is not None:
+                pyramid_callback(*base_bins(pw))
+            if peak_callback is not None:
+                peak_callback(*chunk_peak_stats(pw, n))
+            if feature_callback is not None:
+                feature_callback(chunk_features(raw, pw, n))
+            if clip_callback is not None:
+                clip_callback(chunk_clip_fraction(raw, n))
+            block = np.mean(pw.reshape(n, chunk_samples), axis=1)
+            block += np.float32(1e-10)
+            yield first_chunk + done, block
+            done += n
+
+        if first_chunk + done < last_chunk:
+            # Niepełny ostatni chunk (bez nieparzystego bajtu na końcu)
+            tail = np.asarray(data[(first_chunk + done) * chunk_size_bytes:usable_bytes])
+            iq = POWER_LUT[tail].reshape(-1, 2)
+            pw = iq[:, 0] + iq[:, 1]
+            if pyramid_callback is not None:
+                pyramid_callback(*base_bins(pw))
+            if peak_callback is not None:
+                peak_callback(*chunk_peak_stats(pw, 1))
+            if feature_callback is not None:
+                feature_callback(chunk_features(tail, pw, 1))
+            if clip_callback is not None:
+                clip_callback(chunk_clip_fraction(tail, 1))
+            block = np.array([np.mean(pw)], dtype=np.float32)
+            block += np.float32(1e-10)
+            yield first_chunk + done, block
+    finally:
+        del data
+
+
+def follow_power_blocks(file_path, chunk_size_bytes, is_active=None, stop_check=None,
+                        poll_interval=FOLLOW_POLL_SEC, idle_timeout=FOLLOW_IDLE_TIMEOUT_SEC, peak_callback=None,
+                        clip_callback=None):
+    """Jak iter_power_blocks, ale dla pliku, który wciąż rośnie.
+
+    Oddaje tylko pełne chunki, dopóki is_active() zwraca True i plik przyrasta.
+    Koniec: is_active() == False albo brak przyrostu przez idle_timeout sekund -
+    wtedy oddawany jest też niepełny ostatni chunk.
+    """
+    done = 0
+    last_growth = time.monotonic()
+    last_size = -1
+    while True:
+        if stop_check is not None and stop_check():
+            return
+        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        if file_size != last_size:
+            last_size = file_size
+            last_growth = time.monotonic()
+
+        complete = file_size // chunk_size_bytes
+        if complete > done:
+            for first_chunk, block in iter_power_blocks(file_path, chunk_size_bytes, done, complete,
+                                                        peak_callback=peak_callback, clip_callback=clip_callback):
+                yield first_chunk, block
+            done = complete
+            continue
+
+        active = is_active() if is_active is not None else True
+        if not active or time.monotonic() - last_growth >= idle_timeout:
+            if os.path.exists(file_path):
+                # Nagrywanie zakończone - dokładamy resztę pliku
+                yield from iter_power_blocks(file_path, chunk_size_bytes, done, peak_callback=peak_callback,
+                                             clip_callback=clip_callback)
+            return
+        time.sleep(poll_interval)
+
+
+def _scan_chunk_range(file_path, chunk_size_bytes, first_chunk, last_chunk, stop_check=None, progress_callback=None,
+                      pyramid_callback=None, peak_callback=None, feature_callback=None):
+    """Moc chunków [first_chunk, last_chunk) - wspólne dla trybu szeregowego i shardów."""
+    powers = np.empty(max(0, last_chunk - first_chunk), dtype=np.float32)
+    done = 0
+    for start, block in iter_power_blocks(file_path, chunk_size_bytes, first_chunk, last_chunk, pyramid_callback,
+                                          peak_callback, feature_callback):
+        if stop_check is not None and stop_check():
+            return powers[:done]
+        powers[start - first_chunk:start - first_chunk + len(block)] = block
+        done += len(block)
+        if progress_callback is not None:
+            progress_callback(done * chunk_size_bytes, len(powers) * chunk_size_bytes)
+    return powers[:done]
+
+
+def _scan_shard(file_path, chunk_size_bytes, first_chunk, last_chunk, with_pyramid=False, with_peaks=False,
+                with_features=False):
+    builder = PyramidBuilder() if with_pyramid else None
+    peaks = PeakStatsBuilder() if with_peaks else None
+    features = FeatureStoreBuilder() if with_features else None
+    powers = _scan_chunk_range(file_path, chunk_size_bytes, first_chunk, last_chunk,
+                               pyramid_callback=builder.add if builder is not None else None,
+                               peak_callback=peaks.add if peaks is not None else None,
+                               feature_callback=features.add if features is not None else None)
+    return (first_chunk, powers, builder.base_arrays() if builder is not None else None,
+            peaks.parts if peaks is not None else None, features.parts if features is not None else None)
+
+
+def _scan_sharded(file_path, chunk_size_bytes, num_chunks, workers, stop_check, progress_callback, pyramid_builder=None,
+                  peak_builder=None, feature_builder=None):
+    # Kilka shardów na proces - równiejsze obciążenie i częstszy postęp
+    bounds = np.linspace(0, num_chunks, workers * SHARDS_PER_WORKER + 1).astype(np.int64)
+    shards = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+    results = {}
+    scanned_chunks = 0
+
+    # spawn zamiast fork - skan bywa uruchamiany z wątku Qt
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(_scan_shard, file_path, chunk_size_bytes, a, b, pyramid_builder is not None,
+                               peak_builder is not None, feature_builder is not None)
+                   for a, b in shards]
+        try:
+            for future in as_completed(futures):
+                first_chunk, powers, base, peak_parts, feature_parts = future.result()
+                results[first_chunk] = (powers, base, peak_parts, feature_parts)
+                scanned_chunks += len(powers)
+                if progress_callback is not None:
+                    progress_callback(scanned_chunks * chunk_size_bytes, num_chunks * chunk_size_bytes)
+                if stop_check is not None and stop_check():
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+    # Scalanie w kolejności pliku; przy przerwaniu zostaje ciągły prefiks
+    merged = []
+    for a, _ in shards:
+        if a not in results:
+            break
+        powers, base, peak_parts, feature_parts = results[a]
+        merged.append(powers)
+        if pyramid_builder is not None:
+            pyramid_builder.add(*base)
+        if peak_builder is not None:
+            peak_builder.parts.extend(peak_parts)
+        if feature_builder is not None:
+            feature_builder.parts.extend(feature_parts)
+    if not merged:
+        return np.empty(0, dtype=np.float32)
+    return np.concatenate(merged)
+
+
+def scan_power_profile(file_path, chunk_size_bytes, stop_check=None, progress_callback=None, workers=1,
+                       pyramid_builder=None, peak_builder=None, feature_builder=None):
+    """Zwraca średnią moc I²+Q² (float32) każdego chunka pliku uint8 czytanego przez mmap.
+
+    Przy workers > 1 plik dzielony jest na shardy na granicach chunków i skanowany
+    w puli procesów; wynik jest bit w bit taki sam jak w trybie szeregowym.
+    Podany pyramid_builder dostaje biny bazowe piramidy mocy, a peak_builder statystyki
+    podokien chunków (max / p99 / wypełnienie), a feature_builder wiersze magazynu cech -
+    w kolejności pliku.
+    """
+    if pyramid_builder is not None and (chunk_size_bytes // 2) % BASE_BIN_SAMPLES:
+        raise ValueError(f"Chunk {chunk_size_bytes} B nie jest wielokrotnością binu piramidy ({BASE_BIN_SAMPLES} próbek)")
+
+    file_size = os.path.getsize(file_path)
+    num_chunks = count_power_chunks(file_size, chunk_size_bytes)
+    workers = min(resolve_scan_workers(workers), max(1, num_chunks // MIN_SHARD_CHUNKS))
+
+    if workers <= 1:
+        return _scan_chunk_range(file_path, chunk_size_bytes, 0, num_chunks, stop_check, progress_callback,
+                                 pyramid_builder.add if pyramid_builder is not None else None,
+                                 peak_builder.add if peak_builder is not None else None,
+                                 feature_builder.add if feature_builder is not None else None)
+    return _scan_sharded(file_path, chunk_size_bytes, num_chunks, workers, stop_check, progress_callback, pyramid_builder,
+                         peak_builder, feature_builder)
+
+
+def load_or_scan_power_profile(file_path, chunk_size_bytes, stop_check=None, progress_callback=None, workers=1, use_cache=True,
+                               with_pyramid=False, with_peaks=False, with_features=False):
+    """Jak scan_power_profile, ale najpierw sprawdza cache (ścieżka, rozmiar, mtime, chunk).
+
+    with_pyramid=True: zwraca (moce, piramida mocy); piramida budowana jest w tym samym
+    przebiegu co mapa mocy (None, jeśli skan przerwano).
+    with_peaks=True: na końcu krotki dochodzi słownik statystyk szczytowych chunków
+    ('max', 'p99', 'duty'), również z tego samego przebiegu (None, jeśli skan przerwano).
+    with_features=True: na końcu krotki dochodzi magazyn cech (FeatureStore) z tego przebiegu.
+    """
+    powers = load_power_profile(file_path, chunk_size_bytes) if use_cache else None
+    pyramid = load_power_pyramid(file_path) if use_cache and with_pyramid else None
+    peaks = load_peak_profile(file_path, chunk_size_bytes) if use_cache and with_peaks else None
+    features = load_feature_store(file_path, chunk_size_bytes) if use_cache and with_features else None
+
+    def result():
+        extras = tuple(value for value, wanted in ((pyramid, with_pyramid), (peaks, with_peaks),
+                                                   (features, with_features)) if wanted)
+        return (powers,) + extras if extras else powers
+
+    cached = [powers, pyramid if with_pyramid else True, peaks if with_peaks else True,
+              features if with_features else True]
+    if all(value is not None for value in cached):
+        print(f"[POWER SCAN] Mapa mocy z cache: {os.path.basename(file_path)}")
+        if progress_callback is not None:
+            file_size = os.path.getsize(file_path)
+            progress_callback(file_size, file_size)
+        return result()
+
+    builder = PyramidBuilder() if with_pyramid else None
+    peak_builder = PeakStatsBuilder() if with_peaks else None
+    feature_builder = FeatureStoreBuilder() if with_features else None
+    powers = scan_power_profile(file_path, chunk_size_bytes, stop_check, progress_callback, workers, builder, peak_builder,
+                                feature_builder)
+
+    # Przerwany skan nie trafia do cache
+    file_size = os.path.getsize(file_path)
+    complete = len(powers) == count_power_chunks(file_size, chunk_size_bytes)
+    if use_cache and complete:
+        store_power_profile(file_path, chunk_size_bytes, powers)
+
+    if complete and with_pyramid:
+        pyramid = builder.finish(file_size // 2)
+        if use_cache:
+            store_power_pyramid(file_path, pyramid)
+    if complete and with_peaks:
+        peaks = peak_builder.finish()
+        if use_cache:
+            store_peak_profile(file_path, chunk_size_bytes, peaks)
+    if complete and with_features:
+        columns = feature_builder.finish()
+        if use_cache:
+            features = store_feature_store(file_path, chunk_size_bytes, columns, file_size // 2)
+        else:
+            features = FeatureStore(file_path, chunk_size_bytes, file_size // 2, columns=columns)
+    return result()
+
+
+def load_or_scan_recording(file_path, chunk_size_bytes=FEATURE_CHUNK_BYTES, **kwargs):
+    """Mapa mocy, piramida, statystyki szczytowe i magazyn cech nagrania uint8 - z cache albo z jednego skanu.
+
+    Wspólny punkt wejścia dla workera i narzędzi (wykres, widmo, triangulacja), więc plik
+    czytany jest raz niezależnie od tego, które narzędzie uruchomiono pierwsze.
+    Zwraca (moce, piramida, statystyki szczytowe, magazyn cech).
+    """
+    return load_or_scan_power_profile(file_path, chunk_size_bytes, with_pyramid=True, with_peaks=True,
+                                      with_features=True, **kwargs)
+
+
+def load_or_scan_pyramid(file_path, chunk_size_bytes=FEATURE_CHUNK_BYTES, **kwargs):
+    """Sama piramida mocy nagrania uint8 (wykres) - z cache albo ze skanu mocy bez statystyk szczytowych i cech.
+
+    Zwraca None, jeśli skan przerwano.
+    """
+    pyramid = load_power_pyramid(file_path) if kwargs.get('use_cache', True) else None
+    if pyramid is not None:
+        return pyramid
+    return load_or_scan_power_profile(file_path, chunk_size_bytes, with_pyramid=True, **kwargs)[1]
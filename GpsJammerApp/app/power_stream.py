@@ -0,0 +1,223 @@
+from collections import deque
+import numpy as np
+
+# Histogram mocy w dB (skala cyfrowa I²+Q²) - stała pamięć niezależnie od długości pliku.
+# Dla uint8 moc chunka mieści się w ok. -3..45 dB, zakres zostawia zapas.
+HIST_MIN_DB = -20.0
+HIST_MAX_DB = 80.0
+HIST_BIN_DB = 0.01
+# Górna granica mocy samego szumu odbiornika: RMS składowej I/Q równe 1/4 zakresu ADC uint8
+# (power_scan.POWER_LUT: (x - 127.5)^2). Chunk rozgrzewki powyżej niej to zakłócenie, nie tło.
+ADC_NOISE_CEILING = 2 * (127.5 / 4) ** 2
+# Ile pierwszych chunków pamiętamy do ponownej oceny, gdy tło z rozgrzewki okaże się zawyżone
+# (nagranie zaczyna się w trakcie jammingu) - ok. 4 min przy chunkach 32768 próbek
+REEVALUATE_CHUNKS = 16384
+
+
+class _HistogramBaseline:
+    """Percentyl mocy z histogramu w dB - narastająco albo w oknie ostatnich window_chunks wartości."""
+
+    def __init__(self, percentile, window_chunks=None):
+        self.percentile = percentile
+        self.num_bins = int(round((HIST_MAX_DB - HIST_MIN_DB) / HIST_BIN_DB))
+        self.histogram = np.zeros(self.num_bins, dtype=np.int64)
+        self.window = deque(maxlen=window_chunks) if window_chunks else None
+        self.baseline = 0.0
+
+    def _to_bins(self, powers):
+        db = 10.0 * np.log10(np.maximum(powers, 1e-10))
+        bins = ((db - HIST_MIN_DB) / HIST_BIN_DB).astype(np.int64)
+        return np.clip(bins, 0, self.num_bins - 1)
+
+    def add(self, powers):
+        """Dodaje moce (czyste chunki) i przelicza tło."""
+        if len(powers) == 0:
+            return
+        bins = self._to_bins(powers)
+        if self.window is not None:
+            # Okno: nowe biny wypychają najstarsze z deque i z histogramu
+            bins = bins[-self.window.maxlen:]
+            n_drop = max(0, len(self.window) + len(bins) - self.window.maxlen)
+            dropped = [self.window.popleft() for _ in range(n_drop)]
+            np.subtract.at(self.histogram, dropped, 1)
+            self.window.extend(bins.tolist())
+        np.add.at(self.histogram, bins, 1)
+        self._update_baseline()
+
+    def _update_baseline(self):
+        total = self.histogram.sum()
+        if total == 0:
+            return
+        target = total * self.percentile / 100.0
+        idx = int(np.searchsorted(np.cumsum(self.histogram), target, side='left'))
+        self.baseline = 10 ** ((HIST_MIN_DB + (idx + 0.5) * HIST_BIN_DB) / 10.0)
+
+    def start(self, powers):
+        # Pierwsze tło liczone dokładnie z bufora rozgrzewki
+        self.baseline = float(np.percentile(powers, self.percentile))
+        if self.baseline <= 0: self.baseline = 1.0
+
+
+class StreamingPowerDetector:
+    """Detektor F1 bez pełnego przebiegu po pliku.
+
+    Tło (baseline) to percentyl mocy chunków uznanych za czyste, liczony z histogramu
+    w dB - narastająco albo w oknie ostatnich `window_chunks` chunków. Pierwsze
+    `warmup_chunks` chunków jest buforowanych, dopóki tło nie jest wiarygodne.
+    Podane moce szczytowe chunków (p99 podokien) mają własne tło - chunk jest w F1,
+    gdy średnia albo szczyt przekracza swoje tło o threshold_db.
+
+    Nagranie zaczynające się w trakcie jammingu zawyża tło z rozgrzewki: chunki ponad progiem
+    szumu ADC (noise_ceiling) nie wchodzą do pierwszego tła, a dopóki nie ma żadnego przedziału,
+    pierwsze reevaluate_chunks chunków jest pamiętanych i oceniane ponownie, gdy tło z histogramu
+    spadnie - przedziały z początku pliku pojawiają się wtedy z opóźnieniem, ale w kolejności.
+    """
+
+    def __init__(self, threshold_db=6.0, percentile=5.0, warmup_chunks=128, window_chunks=None,
+                 noise_ceiling=ADC_NOISE_CEILING, reevaluate_chunks=REEVALUATE_CHUNKS):
+        self.threshold_ratio = 10 ** (threshold_db / 10.0)
+        self.percentile = percentile
+        self.warmup_chunks = warmup_chunks
+        self.window_chunks = window_chunks
+        self.noise_ceiling = noise_ceiling
+        self.reevaluate_chunks = reevaluate_chunks
+
+        self._mean = _HistogramBaseline(percentile, window_chunks)
+        self._peak = _HistogramBaseline(percentile, window_chunks)
+
+        self.chunks_seen = 0
+        self.ranges = []          # zamknięte przedziały [start_chunk, end_chunk)
+        self.open_start = None    # początek trwającego przedziału
+        self._pending = []        # bufor rozgrzewki (max warmup_chunks): (moce, moce szczytowe)
+        self._history = []        # ocenione chunki od początku pliku (do ponownej oceny): (moce, szczyty)
+        self._history_len = 0
+        self._history_thresholds = None  # najniższe progi (średnia, szczyt), z którymi je oceniono
+
+    @property
+    def baseline(self):
+        return self._mean.baseline
+
+    @property
+    def peak_baseline(self):
+        return self._peak.baseline
+
+    @property
+    def threshold_linear(self):
+        return self.baseline * self.threshold_ratio
+
+    @property
+    def peak_threshold_linear(self):
+        return self.peak_baseline * self.threshold_ratio
+
+    def _start_from_warmup(self):
+        powers = np.concatenate([p for p, _ in self._pending])
+        peaks = None
+        if all(pk is not None for _, pk in self._pending):
+            peaks = np.concatenate([pk for _, pk in self._pending])
+            self._peak.start(peaks)
+        self._pending = []
+        self._start_mean(powers)
+        return powers, peaks
+
+    def _start_mean(self, powers):
+        """Tło średniej z rozgrzewki bez chunków ponad progiem szumu ADC; gdy prawie cała
+        rozgrzewka jest ponad nim (jamming od początku) - tło tuż pod tym progiem."""
+        if self.noise_ceiling:
+            quiet = powers[powers <= self.noise_ceiling]
+            if len(quiet) < max(1.0, len(powers) * self.percentile / 100.0):
+                self._mean.baseline = self.noise_ceiling / self.threshold_ratio
+                return
+            powers = quiet
+        self._mean.start(powers)
+
+    def update(self, powers, peak_powers=None):
+        """Dodaje kolejne moce chunków (opcjonalnie też moce szczytowe).
+
+        Zwraca listę zmian: ('start', chunk) / ('end', chunk).
+        """
+        powers = np.asarray(powers, dtype=np.float64)
+        if peak_powers is not None:
+            peak_powers = np.asarray(peak_powers, dtype=np.float64)
+        if self.baseline == 0.0:
+            self._pending.append((powers, peak_powers))
+            if sum(len(p) for p, _ in self._pending) < self.warmup_chunks:
+                return []
+            powers, peak_powers = self._start_from_warmup()
+
+        first = self.chunks_seen
+        self.chunks_seen += len(powers)
+        mask = powers > self.threshold_linear
+        if peak_powers is not None and self.peak_baseline > 0:
+            mask |= peak_powers > self.peak_threshold_linear
+
+        # Do tła trafiają tylko chunki bez jammingu
+        self._mean.add(powers[~mask])
+        if peak_powers is not None:
+            self._peak.add(peak_powers[~mask])
+        remember = self._history is not None and not mask.any()
+
+        changes = []
+        prev_state = [self.open_start is not None]
+        edges = np.flatnonzero(np.diff(np.concatenate((prev_state, mask)).astype(np.int8)))
+        for edge in edges:
+            chunk = first + int(edge)
+            if self.open_start is None:
+                self.open_start = chunk
+                changes.append(('start', chunk))
+            else:
+                self.ranges.append((self.open_start, chunk))
+                self.open_start = None
+                changes.append(('end', chunk))
+        if remember:
+            changes.extend(self._remember(powers, peak_powers))
+        else:
+            self._history = None
+        return changes
+
+    def _remember(self, powers, peak_powers):
+        """Bez przedziałów od początku pliku: zapamiętuje blok i ocenia całą historię ponownie,
+        jeśli tło spadło poniżej tego, z którym ją oceniono. Zwraca zmiany przedziałów z historii."""
+        self._history.append((powers, peak_powers))
+        self._history_len += len(powers)
+        thresholds = (self.threshold_linear, self.peak_threshold_linear)
+        previous = self._history_thresholds
+        self._history_thresholds = thresholds if previous is None else tuple(map(min, previous, thresholds))
+        if previous is None or (thresholds[0] >= previous[0] and thresholds[1] >= previous[1]):
+            if self._history_len > self.reevaluate_chunks:
+                self._history = None
+            return []
+
+        history_powers = np.concatenate([p for p, _ in self._history])
+        mask = history_powers > thresholds[0]
+        if all(pk is not None for _, pk in self._history) and self.peak_baseline > 0:
+            mask |= np.concatenate([pk for _, pk in self._history]) > thresholds[1]
+        if not mask.any():
+            if self._history_len > self.reevaluate_chunks:
+                self._history = None
+            return []
+
+        # Historia zaczyna się od chunka 0 - przedziały wprost z krawędzi maski
+        self._history = None
+        changes = []
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], mask)).astype(np.int8)))
+        for edge in edges:
+            chunk = int(edge)
+            if self.open_start is None:
+                self.open_start = chunk
+                changes.append(('start', chunk))
+            else:
+                self.ranges.append((self.open_start, chunk))
+                self.open_start = None
+                changes.append(('end', chunk))
+        return changes
+
+    def flush(self):
+        """Koniec danych: rozstrzyga bufor rozgrzewki i zamyka trwający przedział."""
+        changes = []
+        if self._pending:
+            changes.extend(self.update(*self._start_from_warmup()))
+        if self.open_start is not None:
+            self.ranges.append((self.open_start, self.chunks_seen))
+            self.open_start = None
+            changes.append(('end', self.chunks_seen))
+        return changes
@@ -0,0 +1,142 @@
+import os
+import hashlib
+import numpy as np
+
+# Katalog cache (można nadpisać zmienną środowiskową)
+CACHE_ROOT = os.environ.get(
+    'GPS_JAMMER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'gps_jammer')
+)
+# Limit rozmiaru katalogu mapy mocy - najdawniej używane wpisy są usuwane
+POWER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Zmiana formatu wpisów -> stare wpisy są traktowane jako nieaktualne
+CACHE_FORMAT_VERSION = 1
+
+
+def recording_identity(file_path):
+    """Tożsamość nagrania: pełna ścieżka, rozmiar i mtime (ns)."""
+    st = os.stat(file_path)
+    return {
+        'path': os.path.realpath(file_path),
+        'size': int(st.st_size),
+        'mtime_ns': int(st.st_mtime_ns),
+    }
+
+
+def cache_entry_path(kind, file_path, params, cache_dir):
+    """Ścieżka wpisu cache dla nagrania i parametrów (np. rozmiaru chunka)."""
+    real_path = os.path.realpath(file_path)
+    digest = hashlib.sha1(f"{real_path}|{params}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(real_path)}.{digest}.{kind}.npz")
+
+
+def touch_entry(entry_path):
+    """Oznacza wpis jako użyty (LRU po mtime)."""
+    try:
+        os.utime(entry_path, None)
+    except OSError:
+        pass
+
+
+def evict_lru(cache_dir, max_bytes, keep=None):
+    """Usuwa najdawniej używane wpisy, dopóki katalog przekracza max_bytes."""
+    try:
+        entries = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if os.path.isfile(path):
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _drop_entry(entry_path):
+    try:
+        os.remove(entry_path)
+    except OSError:
+        pass
+
+
+def load_cached_arrays(kind, file_path, params, cache_dir, keys=None):
+    """Zwraca słownik tablic zapisanych dla nagrania albo None (brak / nieaktualny wpis).
+
+    keys - czytane są tylko te tablice (npz czyta elementy osobno), np. jedna kolumna magazynu cech.
+    """
+    entry = cache_entry_path(kind, file_path, params, cache_dir)
+    if not os.path.exists(entry):
+        return None
+
+    try:
+        identity = recording_identity(file_path)
+        with np.load(entry, allow_pickle=False) as data:
+            valid = (
+                int(data['version']) == CACHE_FORMAT_VERSION and
+                str(data['path']) == identity['path'] and
+                int(data['size']) == identity['size'] and
+                int(data['mtime_ns']) == identity['mtime_ns'] and
+                str(data['params']) == str(params)
+            )
+            arrays = {k: data[k] for k in (data.files if keys is None else keys)} if valid else None
+    except Exception as e:
+        print(f"[CACHE] Uszkodzony wpis {os.path.basename(entry)}: {e}")
+        arrays = None
+        valid = False
+
+    if not valid:
+        # Plik nadpisany / zmieniony / stary format - wpis do usunięcia
+        _drop_entry(entry)
+        return None
+
+    touch_entry(entry)
+    return arrays
+
+
+def store_cached_arrays(kind, file_path, params, arrays, cache_dir, max_bytes):
+    """Zapisuje tablice (atomowo) z tożsamością nagrania i przycina katalog do limitu."""
+    entry = cache_entry_path(kind, file_path, params, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        identity = recording_identity(file_path)
+        tmp_path = entry + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=CACHE_FORMAT_VERSION,
+                path=identity['path'],
+                size=identity['size'],
+                mtime_ns=identity['mtime_ns'],
+                params=str(params),
+                **arrays
+            )
+        os.replace(tmp_path, entry)
+        evict_lru(cache_dir, max_bytes, keep=entry)
+        return True
+    except OSError as e:
+        print(f"[CACHE] Nie udało się zapisać wpisu {kind}: {e}")
+        return False
+
+
+def load_power_profile(file_path, chunk_size_bytes, cache_dir=None):
+    """Zwraca zapisaną mapę mocy albo None (brak wpisu / nagranie się zmieniło)."""
+    cache_dir = cache_dir or os.path.join(CACHE_ROOT, 'power_maps')
+    arrays = load_cached_arrays('powermap', file_path, chunk_size_bytes, cache_dir)
+    return arrays['powers'] if arrays is not None else None
+
+
+def store_power_profile(file_path, chunk_size_bytes, powers, cache_dir=None, max_bytes=POWER_CACHE_MAX_BYTES):
+    """Zapisuje mapę mocy i przycina katalog cache do limitu."""
+    cache_dir = cache_dir or os.path.join(CACHE_ROOT, 'power_maps')
+    store_cached_arrays('powermap', file_path, chunk_size_bytes, {'powers': np.asarray(powers)}, cache_dir, max_bytes)
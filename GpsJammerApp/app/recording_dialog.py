@@ -5,11 +5,13 @@ from PySide6.QtCore import Qt, QTimer, Signal, QObject
 import subprocess
 import threading
 import time
+import os
 
 class RecordingDialog(QDialog):
     log_signal = Signal(str)
     warmup_complete = Signal()
     update_timer = Signal(int) 
+    live_analysis_requested = Signal(list)
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Nagrywanie Sygnałów SDR")
@@ -18,6 +20,7 @@ class RecordingDialog(QDialog):
         
         self.recording_process = None
         self.recording_processes = []
+        self.recording_files = []
         self.is_recording = False
         self.warmup_timer = None
         self.recording_start_time = None
@@ -140,6 +143,15 @@ class RecordingDialog(QDialog):
         biast_layout.addStretch()
         control_layout.addLayout(biast_layout)
 
+        live_layout = QHBoxLayout()
+        live_layout.addWidget(QLabel("Analiza na żywo:"))
+        self.live_analysis_checkbox = QCheckBox()
+        self.live_analysis_checkbox.setChecked(False)
+        self.live_analysis_checkbox.setStyleSheet(self.biast_checkbox.styleSheet())
+        live_layout.addWidget(self.live_analysis_checkbox)
+        live_layout.addStretch()
+        control_layout.addLayout(live_layout)
+
         self.warmup_btn = QPushButton("🔥 Nagrzej odbiornik(i) (60s)")
         self.warmup_btn.clicked.connect(self.warmup_receiver)
         self.warmup_btn.setStyleSheet("""
@@ -493,6 +505,7 @@ class RecordingDialog(QDialog):
         self.filename_edit.setEnabled(False)
         self.biast_checkbox.setEnabled(False)
         self.warmup_btn.setEnabled(False)
+        self.live_analysis_checkbox.setEnabled(False)
         
         self.record_toggle_btn.setText("⏹️ Wyłącz nagrywanie")
         self.record_toggle_btn.setStyleSheet("""
@@ -518,10 +531,12 @@ class RecordingDialog(QDialog):
         self.is_recording = True
         self.recording_start_time = time.time()
         self.recording_processes = []
+        self.recording_files = []
         
         for i in range(num_sdrs):
             base_name = filename.rsplit('.', 1)[0] if '.' in filename else filename
             output_file = f"{i}_{base_name}.bin"
+            self.recording_files.append(os.path.abspath(output_file))
             
             cmd = ['rtl_sdr', '-f', str(frequency_hz), '-s', str(sample_rate_hz), 
                    '-g', 'list', '-d', str(i), output_file]
@@ -569,6 +584,14 @@ class RecordingDialog(QDialog):
         timer_t.start()
         
         self.log_message("✅ Nagrywanie aktywne!")
+        
+        if self.live_analysis_checkbox.isChecked() and self.recording_processes:
+            self.log_message("📡 Analiza na żywo: śledzenie nagrywanych plików")
+            self.live_analysis_requested.emit(list(self.recording_files))
+    
+    def recording_active(self):
+        """Dla analizy na żywo: True, dopóki rtl_sdr zapisuje pliki."""
+        return self.is_recording
     
     def stop_recording(self):
         self.log_message("⏹️ Zatrzymuję nagrywanie")
@@ -597,6 +620,7 @@ class RecordingDialog(QDialog):
         self.filename_edit.setEnabled(True)
         self.biast_checkbox.setEnabled(True)
         self.warmup_btn.setEnabled(True)
+        self.live_analysis_checkbox.setEnabled(True)
 
         self.record_toggle_btn.setText("▶️ Włącz nagrywanie")
         self.record_toggle_btn.setStyleSheet("""
@@ -0,0 +1,51 @@
+import numpy as np
+
+# Nasycenie ADC RTL-SDR: składowa I albo Q na granicy zakresu uint8 (0 lub 255).
+# Silny jammer obcina próbki, więc moc chunka jest zaniżona (J/N i RSSI niedoszacowane).
+ADC_MIN_CODE = 0
+ADC_MAX_CODE = 255
+# Chunk nasycony: ponad 1% składowych na granicy zakresu (szum bez jammera: praktycznie 0)
+SATURATION_CLIP_FRACTION = 0.01
+
+
+def chunk_histograms(raw, num_chunks):
+    """Histogram 256 wartości bajtu osobno dla I (0) i Q (1) każdego chunka: tablica (chunki, 2, 256).
+
+    raw - bajty uint8 (I, Q, ...) num_chunks równych chunków; jeden bincount na składową chunka.
+    """
+    raw = np.asarray(raw)
+    chunk_samples = len(raw) // 2 // num_chunks
+    pairs = raw[:2 * num_chunks * chunk_samples].reshape(num_chunks, chunk_samples, 2)
+    counts = np.empty((num_chunks, 2, 256), dtype=np.int64)
+    for i in range(num_chunks):
+        counts[i, 0] = np.bincount(pairs[i, :, 0], minlength=256)
+        counts[i, 1] = np.bincount(pairs[i, :, 1], minlength=256)
+    return counts
+
+
+def clip_fraction(counts):
+    """Udział składowych I/Q równych 0 albo 255 dla histogramów (chunki, 2, 256)."""
+    clipped = (counts[:, :, ADC_MIN_CODE] + counts[:, :, ADC_MAX_CODE]).sum(axis=1)
+    return (clipped / np.maximum(counts.sum(axis=(1, 2)), 1)).astype(np.float32)
+
+
+def chunk_clip_fraction(raw, num_chunks):
+    """Udział obciętych składowych w każdym z num_chunks chunków bloku (skan strumieniowy)."""
+    return clip_fraction(chunk_histograms(raw, num_chunks))
+
+
+def saturated_mask(clip_fractions, limit=SATURATION_CLIP_FRACTION):
+    return np.asarray(clip_fractions) > limit
+
+
+def saturation_summary(clip_fractions, first_chunk, last_chunk, limit=SATURATION_CLIP_FRACTION):
+    """Nasycenie chunków [first_chunk, last_chunk): max udział obciętych, udział nasyconych chunków."""
+    window = np.asarray(clip_fractions)[max(0, first_chunk):max(first_chunk + 1, last_chunk)]
+    if len(window) == 0:
+        return {'saturated': False, 'clip_fraction': 0.0, 'saturated_fraction': 0.0}
+    mask = saturated_mask(window, limit)
+    return {
+        'saturated': bool(mask.any()),
+        'clip_fraction': float(window.max()),
+        'saturated_fraction': float(mask.mean()),
+    }
@@ -0,0 +1,178 @@
+import subprocess
+import threading
+
+try:
+    from .epoch_stream import EpochStreamServer
+    from .epoch_record import BinaryEpoch, IQ_SAMPLE_BYTES
+except ImportError:
+    from epoch_stream import EpochStreamServer
+    from epoch_record import BinaryEpoch, IQ_SAMPLE_BYTES
+
+# Bufor odczytu gnssdec (sdr.h: dtype 2 x FILE_BUFFSIZE) - granice segmentów na jego wielokrotnościach,
+# żeby buffcnt segmentu po przesunięciu trafiał w tę samą siatkę co przy dekodowaniu całego pliku
+GNSSDEC_READ_BYTES = 2 * 16384
+# Rozbieg segmentu: akwizycja, śledzenie i dekodowanie efemeryd (ramka GPS - 30 s)
+SEGMENT_WARMUP_SEC = 40.0
+# Najkrótszy segment (bez rozbiegu), dla którego opłaca się osobny proces
+SEGMENT_MIN_SEC = 60.0
+# Co ile sekund oczekiwanie na segmenty sprawdza stop_check
+STOP_POLL_SEC = 0.25
+
+
+def plan_segments(file_bytes, num_segments, sample_rate, warmup_sec=SEGMENT_WARMUP_SEC, min_sec=SEGMENT_MIN_SEC):
+    """Podział nagrania na segmenty [(decode_start, keep_start, end)] w bajtach.
+
+    gnssdec segmentu czyta [decode_start, end); zostają epoki z [keep_start, end), wcześniejsze to rozbieg.
+    Liczba segmentów ograniczona tak, by każdy miał co najmniej min_sec nagrania.
+    """
+    bytes_per_sec = sample_rate * IQ_SAMPLE_BYTES
+    num_segments = max(1, min(num_segments, int(file_bytes // (min_sec * bytes_per_sec))))
+    step = file_bytes / num_segments
+    starts = [int(round(step * i / GNSSDEC_READ_BYTES)) * GNSSDEC_READ_BYTES for i in range(num_segments)]
+    warmup = int(warmup_sec * bytes_per_sec) // GNSSDEC_READ_BYTES * GNSSDEC_READ_BYTES
+    ends = starts[1:] + [file_bytes]
+    return [(max(0, start - warmup), start, end) for start, end in zip(starts, ends)]
+
+
+class SegmentStitcher:
+    """Składa epoki segmentów w jeden strumień, jakby pochodził z jednego gnssdec.
+
+    Epoki segmentu i wychodzą dopiero po zakończeniu segmentów 0..i-1 (segment 0 - na bieżąco).
+    Odrzuca rozbieg, buffcnt przesuwa o początek odczytu segmentu, a elapsed_time (zegar gnssdec
+    od startu procesu) tak, by czas rósł dalej od ostatniej epoki poprzedniego segmentu.
+    """
+
+    def __init__(self, segments, on_epoch):
+        self.segments = segments
+        self.on_epoch = on_epoch
+        self.emitted = 0
+        self.dropped_warmup = 0
+        self._pending = [[] for _ in segments]
+        self._done = [False] * len(segments)
+        self._current = 0
+        self._lock = threading.Lock()
+        self._last_time = None
+        self._time_offsets = [None] * len(segments)
+        self._prev_times = [None] * len(segments)
+
+    def add(self, index, data):
+        """Epoka z odbiornika segmentu index (wywoływane z wątków odbiorników)."""
+        with self._lock:
+            if index == self._current:
+                self._emit(index, data)
+            else:
+                self._pending[index].append(data)
+
+    def finish(self, index):
+        """Segment skończony (dekoder zakończony, strumień dociągnięty)."""
+        with self._lock:
+            self._done[index] = True
+            while self._current < len(self.segments) and self._done[self._current]:
+                self._current += 1
+                if self._current < len(self.segments):
+                    for data in self._pending[self._current]:
+                        self._emit(self._current, data)
+                    self._pending[self._current] = []
+
+    def _emit(self, index, data):
+        decode_start, keep_start, end = self.segments[index]
+        binary = isinstance(data, BinaryEpoch)
+        if binary:
+            buffcnt = int(data.header['buffcnt'])
+            elapsed = float(data.header['elapsed_time'])
+        else:
+            buffcnt = data.get('position', {}).get('buffcnt', 0)
+            elapsed = float(data.get('elapsed_time', 0.0))
+        buffcnt_offset = decode_start // IQ_SAMPLE_BYTES
+        position_bytes = (buffcnt + buffcnt_offset) * IQ_SAMPLE_BYTES
+        if position_bytes >= end and index < len(self.segments) - 1:
+            # Epoka z granicy segmentów - zachowuje ją następny segment
+            return
+
+        if self._time_offsets[index] is None:
+            if position_bytes < keep_start:
+                self._prev_times[index] = elapsed
+                self.dropped_warmup += 1
+                return
+            if self._last_time is None:
+                self._time_offsets[index] = 0.0
+            else:
+                # Odstęp jak między tą epoką a poprzednią (odrzuconą) w jej własnym strumieniu
+                prev = self._prev_times[index]
+                gap = elapsed - prev if prev is not None else 0.0
+                self._time_offsets[index] = self._last_time + gap - elapsed
+        time_offset = self._time_offsets[index]
+
+        if binary:
+            data = data.rebased(buffcnt_offset, time_offset)
+        else:
+            data = dict(data, elapsed_time=round(elapsed + time_offset, 3),
+                        position=dict(data.get('position', {}), buffcnt=buffcnt + buffcnt_offset))
+        self._last_time = elapsed + time_offset
+        self.emitted += 1
+        self.on_epoch(data)
+
+
+class SegmentedDecoder:
+    """gnssdec równolegle na segmentach nagrania (-S/-N), epoki sklejone przez SegmentStitcher.
+
+    command - polecenie gnssdec z plikiem na końcu (jak dla całego nagrania),
+    segments - plan_segments(...). Każdy segment ma własne gniazdo strumienia epok.
+    stop_check() zwracające True przerywa wszystkie procesy gnssdec (przycisk Stop).
+    """
+
+    def __init__(self, command, on_epoch, segments, binary=True, env=None, stop_check=None):
+        self.command = command
+        self.segments = segments
+        self.binary = binary
+        self.env = env
+        self.stop_check = stop_check
+        self.stitcher = SegmentStitcher(segments, on_epoch)
+        self.returncodes = [None] * len(segments)
+        self._processes = []
+
+    def segment_command(self, index):
+        decode_start, _, end = self.segments[index]
+        options = ['-S', str(decode_start)]
+        if index < len(self.segments) - 1:
+            options += ['-N', str(end - decode_start)]
+        return self.command[:-1] + options + self.command[-1:]
+
+    def run(self):
+        """Dekoduje wszystkie segmenty i czeka na koniec; CalledProcessError jak subprocess.run(check=True)."""
+        streams = []
+        for index in range(len(self.segments)):
+            stream = EpochStreamServer(lambda data, index=index: self.stitcher.add(index, data), binary=self.binary)
+            stream.start()
+            streams.append(stream)
+        waiters = []
+        try:
+            for index, stream in enumerate(streams):
+                process = subprocess.Popen(self.segment_command(index), env=stream.child_env(self.env),
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                self._processes.append(process)
+                waiter = threading.Thread(target=self._wait_segment, args=(index, process, stream), daemon=True)
+                waiter.start()
+                waiters.append(waiter)
+        finally:
+            for waiter in waiters:
+                while waiter.is_alive():
+                    waiter.join(STOP_POLL_SEC)
+                    if self.stop_check is not None and self.stop_check():
+                        self.terminate()
+            for stream in streams[len(waiters):]:
+                stream.stop()
+        for index, code in enumerate(self.returncodes):
+            if code:
+                raise subprocess.CalledProcessError(code, self.segment_command(index))
+
+    def terminate(self):
+        """Kończy działające procesy segmentów (epoki już przesłane zostają)."""
+        for process in self._processes:
+            if process.poll() is None:
+                process.terminate()
+
+    def _wait_segment(self, index, process, stream):
+        self.returncodes[index] = process.wait()
+        stream.stop()
+        self.stitcher.finish(index)
@@ -1,9 +1,12 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, 
                              QLabel, QDoubleSpinBox, QSpinBox, 
-                             QPushButton, QGroupBox, QGridLayout, QMessageBox, QCheckBox)
+                             QPushButton, QGroupBox, QGridLayout, QMessageBox, QCheckBox,
+                             QProgressBar)
 from PySide6.QtCore import Qt
 import os
 
+from .worker import CalibrationThread
+
 class SettingsDialog(QDialog):
     def __init__(self, parent=None, num_files=0, file_paths=None):
         super().__init__(parent)
@@ -12,6 +15,7 @@ class SettingsDialog(QDialog):
         self.resize(400, 350)
         self.num_files = num_files
         self.file_paths = file_paths if file_paths else []
+        self.calibration_thread = None
         
         self.setStyleSheet("""
         QDialog {
@@ -145,6 +149,19 @@ class SettingsDialog(QDialog):
         """)
         analysis_layout.addWidget(self.hold_position_checkbox, 3, 1)
         
+        analysis_layout.addWidget(QLabel("Procesy skanu mocy:"), 4, 0)
+        self.scan_workers = QSpinBox()
+        self.scan_workers.setRange(1, os.cpu_count() or 1)
+        self.scan_workers.setValue(os.cpu_count() or 1)
+        self.scan_workers.setStyleSheet(self.get_spinbox_style())
+        analysis_layout.addWidget(self.scan_workers, 4, 1)
+        
+        analysis_layout.addWidget(QLabel("Skan mocy strumieniowo:"), 5, 0)
+        self.stream_power_checkbox = QCheckBox()
+        self.stream_power_checkbox.setChecked(False)
+        self.stream_power_checkbox.setStyleSheet(self.hold_position_checkbox.styleSheet())
+        analysis_layout.addWidget(self.stream_power_checkbox, 5, 1)
+        
         self.calibrate_btn = QPushButton("Oblicz próg")
         self.calibrate_btn.clicked.connect(self.on_calibrate_clicked)
         self.calibrate_btn.setStyleSheet("""
@@ -166,7 +183,13 @@ class SettingsDialog(QDialog):
             background-color: #21618c;
         }
         """)
-        analysis_layout.addWidget(self.calibrate_btn, 4, 0, 1, 2)
+        analysis_layout.addWidget(self.calibrate_btn, 6, 0, 1, 2)
+        
+        self.calibration_progress = QProgressBar()
+        self.calibration_progress.setRange(0, 100)
+        self.calibration_progress.setFormat("Kalibracja: %p%")
+        self.calibration_progress.setVisible(False)
+        analysis_layout.addWidget(self.calibration_progress, 7, 0, 1, 2)
         
         layout.addWidget(analysis_group)
         
@@ -224,46 +247,54 @@ class SettingsDialog(QDialog):
     def on_calibrate_clicked(self):
         if self.num_files == 0:
             QMessageBox.warning(self, "Brak plików", "Brak plików do kalibracji")
-        elif self.num_files >= 1:
-            import subprocess
-            import re
-            
-            first_file = self.file_paths[0]
-            script_path = os.path.join(os.path.dirname(__file__), 'checkIfJamming.py')
-            
-            try:
-                result = subprocess.run(
-                    ['python', script_path, first_file, '--kalibruj'],
-                    capture_output=True,
-                    text=True,
-                    timeout=120
-                )
-                
-                output = result.stdout
-                print(output)
-                
-                match = re.search(r'Sugerowany <próg_mocy> \(Mediana \* 4\.8\):\s*([\d.]+)', output)
-                
-                if match:
-                    suggested_threshold = float(match.group(1))
-                    self.threshold.setValue(suggested_threshold)
-                    QMessageBox.information(
-                        self, 
-                        "Kalibracja zakończona", 
-                        f"Obliczony próg detekcji: {suggested_threshold:.2f}\n\n"
-                        f"Wartość została automatycznie wpisana."
-                    )
-                else:
-                    QMessageBox.warning(
-                        self, 
-                        "Błąd kalibracji", 
-                        "Nie udało się odczytać wartości progu z wyniku kalibracji."
-                    )
-                    
-            except subprocess.TimeoutExpired:
-                QMessageBox.critical(self, "Błąd", "Kalibracja przekroczyła limit czasu (120s)")
-            except Exception as e:
-                QMessageBox.critical(self, "Błąd", f"Błąd podczas kalibracji:\n{str(e)}")
+            return
+
+        # Drugie kliknięcie w trakcie kalibracji = przerwanie
+        if self.calibration_thread and self.calibration_thread.isRunning():
+            self.calibration_thread.stop_requested = True
+            self.calibrate_btn.setEnabled(False)
+            self.calibrate_btn.setText("Przerywanie...")
+            return
+
+        self.calibration_thread = CalibrationThread(self.file_paths[0], scan_workers=self.scan_workers.value())
+        self.calibration_thread.progress_update.connect(self.calibration_progress.setValue)
+        self.calibration_thread.calibration_complete.connect(self.on_calibration_complete)
+        self.calibration_thread.calibration_failed.connect(self.on_calibration_failed)
+        self.calibration_thread.finished.connect(self.on_calibration_finished)
+
+        self.calibration_progress.setValue(0)
+        self.calibration_progress.setVisible(True)
+        self.calibrate_btn.setText("Przerwij kalibrację")
+        self.calibration_thread.start()
+
+    def on_calibration_complete(self, stats):
+        suggested_threshold = stats['suggested_threshold']
+        self.threshold.setValue(suggested_threshold)
+        percentiles = stats['percentiles']
+        QMessageBox.information(
+            self, 
+            "Kalibracja zakończona", 
+            f"Obliczony próg detekcji: {suggested_threshold:.2f}\n\n"
+            f"Mediana mocy: {stats['median']:.2f}\n"
+            f"Percentyl 5 / 95 / 99: {percentiles[5]:.2f} / {percentiles[95]:.2f} / {percentiles[99]:.2f}\n"
+            f"Moc szczytowa (max): {stats['max']:.2f}\n\n"
+            f"Wartość została automatycznie wpisana."
+        )
+
+    def on_calibration_failed(self, message):
+        QMessageBox.critical(self, "Błąd", f"Błąd podczas kalibracji:\n{message}")
+
+    def on_calibration_finished(self):
+        self.calibration_progress.setVisible(False)
+        self.calibrate_btn.setText("Oblicz próg")
+        self.calibrate_btn.setEnabled(True)
+
+    def done(self, result):
+        # Zamknięcie okna przerywa trwającą kalibrację
+        if self.calibration_thread and self.calibration_thread.isRunning():
+            self.calibration_thread.stop_requested = True
+            self.calibration_thread.wait()
+        super().done(result)
     
     def update_antenna_state(self):
         disabled_label_style = "color: #95a5a6;"
@@ -361,7 +392,9 @@ class SettingsDialog(QDialog):
                 'frequency': float(frequency_text),
                 'threshold': int(self.threshold.value()),
                 'sample_rate': float(sample_rate_text),
-                'hold_position': self.hold_position_checkbox.isChecked()
+                'hold_position': self.hold_position_checkbox.isChecked(),
+                'scan_workers': self.scan_workers.value(),
+                'stream_power': self.stream_power_checkbox.isChecked()
             }
         }
     
@@ -384,6 +417,11 @@ class SettingsDialog(QDialog):
             hold_position = params.get('hold_position', False)
             self.hold_position_checkbox.setChecked(hold_position)
             
+            scan_workers = params.get('scan_workers', os.cpu_count() or 1)
+            self.scan_workers.setValue(int(scan_workers))
+            
+            self.stream_power_checkbox.setChecked(params.get('stream_power', False))
+            
             frequency = params.get('frequency', 1575.42)
             sample_rate = params.get('sample_rate', 2.048)
             self.frequency_label.setText(f"{frequency:.2f} MHz")
@@ -11,6 +11,8 @@ from PySide6.QtCore import Qt, QTimer
 
 from . import config
 from .worker import GPSAnalysisThread
+from .power_overview import PowerOverviewStrip
+from .jammer_classifier import JAMMER_TYPE_NAMES
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -485,6 +487,11 @@ class MainWindow(QMainWindow):
         }
         """)
         analysis_layout.addWidget(self.progress_bar)
+
+        # Podgląd mocy całego nagrania (z piramidy mocy, po skanie F1)
+        self.power_overview = PowerOverviewStrip()
+        self.power_overview.setVisible(False)
+        analysis_layout.addWidget(self.power_overview)
         
         layout.addWidget(analysis_group)
         
@@ -567,6 +574,9 @@ class MainWindow(QMainWindow):
         try:
             from .recording_dialog import RecordingDialog
             dialog = RecordingDialog(self)
+            dialog.live_analysis_requested.connect(
+                lambda files: self.start_live_analysis(files, dialog.recording_active)
+            )
             dialog.exec()
         except ImportError as e:
             self.results_text.setPlainText(f"Błąd importu okna nagrywania: {e}")
@@ -650,7 +660,13 @@ class MainWindow(QMainWindow):
             basenames = [os.path.basename(p) for p in file_paths_sorted]
             self.file_display.setPlainText("\n".join(basenames))
         
-    def start_analysis(self):
+    def start_live_analysis(self, file_paths, recording_active):
+        """Analiza nagrania w toku - worker śledzi rosnący plik do końca nagrywania."""
+        self.current_files = file_paths
+        self.file_display.setPlainText("\n".join(os.path.basename(p) for p in file_paths))
+        self.start_analysis(follow_recording=recording_active)
+        
+    def start_analysis(self, follow_recording=None):
         if not hasattr(self, 'current_files') or not self.current_files:
             self.results_text.setPlainText("Najpierw wybierz plik(i) do analizy!")
             return
@@ -673,6 +689,7 @@ class MainWindow(QMainWindow):
         
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
+        self.power_overview.clear()
         
         hold_position_status = "✅ WŁĄCZONE" if self.current_settings['analysis_params'].get('hold_position', False) else "❌ WYŁĄCZONE"
         self.results_text.setPlainText(
@@ -686,13 +703,19 @@ class MainWindow(QMainWindow):
             power_threshold=self.current_settings['analysis_params'].get('threshold', 120.0),
             antenna_positions=self.current_settings.get('antenna_positions'),
             satellite_system=self.selected_satellite_system,
-            hold_position=self.current_settings['analysis_params'].get('hold_position', False)
+            hold_position=self.current_settings['analysis_params'].get('hold_position', False),
+            scan_workers=self.current_settings['analysis_params'].get('scan_workers'),
+            stream_power=self.current_settings['analysis_params'].get('stream_power', False),
+            follow_recording=follow_recording if callable(follow_recording) else None
         )
+        self.decoder_status = None
         self.analysis_thread.progress_update.connect(self.update_progress)
+        self.analysis_thread.decoder_status.connect(self.update_decoder_status)
         self.analysis_thread.analysis_complete.connect(self.analysis_finished)
         self.analysis_thread.new_position_data.connect(self.update_map_position)
         self.analysis_thread.new_analysis_text.connect(self.update_analysis_text)
         self.analysis_thread.triangulation_complete.connect(self.on_triangulation_result)
+        self.analysis_thread.power_overview_ready.connect(self.power_overview.set_pyramid)
         self.analysis_thread.finished.connect(self.on_analysis_thread_finished)
         
         self.analysis_thread.start()
@@ -712,6 +735,7 @@ class MainWindow(QMainWindow):
  # Ustawienia progress baru
     def update_progress(self, value, state="normal"):
         self.progress_bar.setValue(value)
+        self.progress_state = state
 
         if state == "jamming":
             self.progress_bar.setFormat("🚨 Znaleziono zakłócenia, analizowanie...")
@@ -730,9 +754,22 @@ class MainWindow(QMainWindow):
                 print(f"[UI] Błąd przy próbie pokazania pozycji jammera po zakończeniu analizy: {e}")
 
         elif value > 0:
-            self.progress_bar.setFormat(f"Analiza: {value}%")
+            self.progress_bar.setFormat(f"Analiza: {value}%{self.decoder_status_text()}")
         else:
-            self.progress_bar.setFormat("Przygotowanie analizy...")
+            self.progress_bar.setFormat(f"Przygotowanie analizy...{self.decoder_status_text()}")
+
+    def update_decoder_status(self, status):
+        self.decoder_status = status
+        # Tylko odświeżenie napisu w zwykłym stanie (bez nadpisywania jammingu / triangulacji)
+        if getattr(self, 'progress_state', "normal") == "normal":
+            self.update_progress(self.progress_bar.value())
+
+    def decoder_status_text(self):
+        status = getattr(self, 'decoder_status', None)
+        if not status:
+            return ""
+        return (f" | SV: akwizycja {status['acquired']}, śledzone {status['tracked']}, "
+                f"zdekodowane {status['decoded']}, w pozycji {status['nsat']}")
         
     def update_map_position(self, lat, lon):
         if not self.is_map_centered:
@@ -866,6 +903,15 @@ class MainWindow(QMainWindow):
             
             if first_result.get('type') == 'jamming':
                 jamming_text = "🚨 Wykryto jamming w pliku!\n\n"
+                for event in points:
+                    saturated = (event.get('saturation') or {}).get('saturated')
+                    if event.get('jammer_type') or saturated:
+                        jamming_text += (f"Zdarzenie {event['event_number']} ({event['start_time']:.2f}s - "
+                                         f"{event['end_time']:.2f}s): "
+                                         f"{JAMMER_TYPE_NAMES[event['jammer_type'] or 'unknown']}")
+                        if saturated:
+                            jamming_text += f" - nasycenie ADC ({event['saturation']['clip_fraction']:.1%} obciętych)"
+                        jamming_text += "\n"
                 self.results_text.setPlainText(jamming_text)
                 
                 triangulation = first_result.get('triangulation')
@@ -9,27 +9,60 @@ import numpy as np
 from collections import deque
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import datetime
+import functools
+import heapq
+import tempfile
 
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'skrypty'))
 from triangulateRSSI import triangulate_jammer_location
+from iq_io import IQFile, count_samples
+from change_point import refine_intervals
+from .power_scan import load_or_scan_recording, resolve_scan_workers, high_power_runs, iter_power_blocks, follow_power_blocks, count_power_chunks
+from .power_stream import StreamingPowerDetector
+from .interval_index import IntervalIndex
+from .jammer_classifier import JammerClassifier, JAMMER_TYPE_NAMES
+from .peak_stats import peak_anomaly_mask
+from .saturation import saturated_mask, saturation_summary
+from .epoch_stream import EpochStreamServer
+from .epoch_record import BinaryEpoch, IQ_SAMPLE_BYTES
+from .ingest_queue import IngestQueue, INGEST_QUEUE_SIZE, INGEST_BATCH_SIZE
+from .decoder_output import DecoderOutputReader
+from .decoder_caps import decoder_capabilities, LEGACY_HTTP_PORT, CAP_HTTP_PORT, CAP_STREAM, CAP_BINARY, CAP_FOLLOW, CAP_SEGMENT
+from .epoch_log import EpochRecorder, replay_epochs, iter_epoch_log, iter_epoch_records
+from .epoch_cache import epoch_cache_params, load_epoch_log, store_epoch_log
+from .segment_decoder import SegmentedDecoder, plan_segments
+from .antenna_fusion import AntennaNavState, AntennaFusion, FUSION_WINDOW_SEC
+from .jamming_detector import JammingDetector
+from .checkIfJamming import calibration_stats
+
+# Zmienna środowiskowa z portem POST /data dla gnssdec (sdrout.c); port 0 = wolny port z systemu,
+# więc kilka analiz może działać równolegle na jednej maszynie
+HTTP_PORT_ENV = 'GNSSDEC_HTTP_PORT'
+# Ścieżka logu epok anteny głównej (epoch_log.py: .ndjson albo binarny) - do odtwarzania bez gnssdec
+EPOCH_LOG_ENV = 'GPS_JAMMER_EPOCH_LOG'
 
 # [FIX] Klasa serwera z wymuszonym ponownym użyciem portu
 # Zapobiega błędowi "Address already in use" przy restarcie analizy
 class ReusableHTTPServer(HTTPServer):
     allow_reuse_address = True
+    # Worker, do którego trafiają epoki z tego serwera (osobny dla każdej analizy) i numer anteny
+    thread_instance = None
+    antenna = 0
 
 class _DataReceiverHandler(BaseHTTPRequestHandler):
-    thread_instance = None
+    @property
+    def thread_instance(self):
+        return self.server.thread_instance
 
     def do_POST(self):
         if self.path == '/data':
             try:
                 content_length = int(self.headers.get('Content-Length', 0))
                 body = self.rfile.read(content_length)
-                data = json.loads(body.decode('utf-8'))
                 
+                # Tylko do kolejki - JSON parsuje wątek detektora, dekoder dostaje 200 od razu
                 if self.thread_instance:
-                    self.thread_instance.process_incoming_data(data)
+                    self.thread_instance.enqueue_epoch(body, self.server.antenna)
                     
                 try:
                     self.send_response(200)
@@ -41,13 +74,6 @@ class _DataReceiverHandler(BaseHTTPRequestHandler):
                 except (BrokenPipeError, ConnectionResetError):
                     pass
                     
-            except json.JSONDecodeError:
-                print("Błąd parsowania JSON")
-                try:
-                    self.send_response(400)
-                    self.end_headers()
-                except (BrokenPipeError, ConnectionResetError):
-                    pass
             except Exception as e:
                 print(f"[HTTP HANDLER] Błąd: {e}")
                 try:
@@ -74,25 +100,38 @@ class GPSAnalysisThread(QThread):
     jamming_analysis_complete = Signal(list) 
     triangulation_complete = Signal(dict)
     jamming_detected_realtime = Signal(bool, dict)
+    power_overview_ready = Signal(object)
+    # Stan gnssdec z jego wyjścia: acquired / tracked / decoded / nsat (decoder_output.DecoderStatus)
+    decoder_status = Signal(dict)
 
-    def __init__(self, file_paths, power_threshold=6.0, antenna_positions=None, satellite_system='GPS', hold_position=False):
+    def __init__(self, file_paths, power_threshold=6.0, antenna_positions=None, satellite_system='GPS', hold_position=False, scan_workers=None, stream_power=False, follow_recording=None):
         super().__init__()
         self.file_paths = file_paths
         
         self.POWER_CHUNK_SIZE = 32768 
+        # Liczba procesów skanu mocy (None -> wszystkie rdzenie)
+        self.POWER_SCAN_WORKERS = resolve_scan_workers(scan_workers)
+        # Tryb strumieniowy: F1 liczone w tle równolegle z gnssdec, bez pełnego pre-skanu
+        self.stream_power = stream_power
+        # Tryb śledzenia nagrania: callable zwracające True, dopóki rtl_sdr pisze plik
+        # (True = koniec po braku przyrostu pliku). Wymusza skan strumieniowy i gnssdec -f.
+        self.follow_recording = follow_recording
+        if follow_recording:
+            self.stream_power = True
+        self.SAMPLE_RATE_HZ = 2048000
         
         # Progi Naukowe
         # Ignorujemy argument power_threshold na rzecz stałej 6.0dB (ITU-R)
         self.THRESHOLD_POWER_RISE_DB = 6.0
         print(f"[GPS THREAD] Próg detekcji mocy (ITU-R): {self.THRESHOLD_POWER_RISE_DB} dB")
-        
-        self.THRESHOLD_CN0_DROP_DB = 8.0 
-        self.THRESHOLD_RESIDUALS_MEDIAN_M = 40.0
-        self.THRESHOLD_RESIDUAL_SINGLE_SAT_M = 800.0 
-        self.MIN_BAD_SATS_FOR_ALARM = 2
-        self.THRESHOLD_HGT_MAX = 10000.0 
-        self.THRESHOLD_GDOP_MAX = 6.0 
-        self.THRESHOLD_NSAT_MIN = 4   
+
+        # Detekcja F1-F4 na epokach (jamming_detector.py, bez Qt): progi, stan pozycji, zdarzenia.
+        # Wątek tylko podaje epoki i zamienia wywołania zwrotne na sygnały GUI.
+        self.detector = JammingDetector(sample_rate=self.SAMPLE_RATE_HZ,
+                                        on_jamming_start=self.on_detector_start,
+                                        on_jamming_end=self.on_detector_end,
+                                        on_power_warning=self.on_detector_power_warning,
+                                        annotate_event=self.describe_event)
         
         self.antenna_positions = antenna_positions if antenna_positions else {
             'antenna1': [0.0, 0.0],
@@ -104,61 +143,67 @@ class GPSAnalysisThread(QThread):
         if satellite_system == 'GPS':
             self.gnss_system_flag = '-g'
         elif satellite_system == 'GLONASS':
-            self.gnss_system_flag = '-n'
-        elif satellite_system == 'Galileo':
             self.gnss_system_flag = '-l'
+        elif satellite_system == 'Galileo':
+            self.gnss_system_flag = '-a'
         else:
             self.gnss_system_flag = '-g'
         
         self.hold_position = hold_position
         
-        # Zmienne stanu
-        self.current_buffcnt = 0
-        self.current_lat = 0.0
-        self.current_lon = 0.0
-        self.current_hgt = 0.0
-        self.current_nsat = 0
-        self.current_gdop = 0.0
-        self.current_clk_bias = 0.0
-        self.current_signal_time = 0.0
-        
-        self.current_cn0_avg = 0.0 
-        self.current_residuals_median = 0.0 
-        self.current_residuals_bad_count = 0 
-        
         # Zmienne Mocy
         self.power_map = [] 
+        # Statystyki podokien chunków: 'max', 'p99', 'duty' (impulsy rozmyte w średniej)
+        self.peak_map = None
+        # Kolumnowy magazyn cech chunków (feature_store.FeatureStore) z tego samego skanu
+        self.feature_store = None
+        # Udział obciętych składowych I/Q (0/255) w chunkach mocy - nasycenie ADC
+        self.clip_map = None
         self.global_baseline_power = 0.0 
         self.current_iq_power = 0.0 
         self.power_map_ready = False
         self.total_file_bytes = 0 
         self.power_detection_enabled = True
+        # Typ jammera (cechy widmowe) dla przedziałów F1: start_byte -> słownik cech z 'type'
+        self.jammer_types = {}
+        # Nasycenie ADC przedziałów F1: start_byte -> saturation_summary
+        self.range_saturation = {}
+        self.power_thread = None
         self.jamming_start_byte_offset = None 
         
-        # Historia
-        self.cn0_history = deque(maxlen=100) 
-        self.median_cn0 = 0.0
-        
-        # Logika Jammingu
-        self.jamming_detected = False
-        self.jamming_events = [] 
-        
-        self.potential_jamming_start_signal_time = None 
-        self.potential_jamming_end_signal_time = None 
-        self.potential_start_buffcnt = 0 
-        self.active_event_start_buffcnt = 0 
-        self.active_event_start_time = 0.0
-        
-        self.required_jamming_duration_sec = 2.5 
-        self.required_clean_duration_sec = 2.0   
-        
         self.last_safe_position_buffer = deque(maxlen=50) 
-        self.last_position_before_jamming = {
-            'lat': 0.0, 'lon': 0.0, 'hgt': 0.0, 'buffcnt': 0, 'valid': False
-        } 
         
         self.http_server = None
         self.http_thread = None
+        self.http_port = None
+        # Strumień epok gnssdec (gniazdo Unix, NDJSON); POST /data zostaje dla starszych binarek
+        self.epoch_stream = None
+        # Rekordy binarne epok w strumieniu (gnssdec bez ich obsługi i tak wysyła JSON)
+        self.BINARY_EPOCHS = True
+        # Kolejka epok między odbiornikami a detektorem (ingest_queue.py) i wątek, który ją opróżnia
+        self.ingest = IngestQueue(INGEST_QUEUE_SIZE)
+        self.ingest_thread = None
+        self.ingest_stop = threading.Event()
+        # Pozostałe anteny (file_paths[1:]): własny gnssdec, odbiorniki i flagi nawigacyjne,
+        # głosujące przy potwierdzaniu ataku (antenna_fusion.py)
+        self.FUSE_ANTENNAS = True
+        # Dekodowanie offline w segmentach równolegle (segment_decoder.py): maks. liczba procesów
+        # gnssdec dla anteny głównej (np. self.POWER_SCAN_WORKERS); 1 - jeden gnssdec na cały plik
+        self.DECODE_SEGMENTS = 1
+        # Możliwości binarki gnssdec (decoder_caps.py, gnssdec -V) - ustalane na starcie run()
+        self.decoder_caps = frozenset()
+        # Czytnik wyjścia gnssdec anteny głównej (bufor ostatnich linii, stan akwizycji i śledzenia)
+        self.decoder_output = None
+        # Zapis epok anteny głównej w kolejności przetwarzania (replay_epoch_log odtwarza go bez gnssdec)
+        self.EPOCH_LOG_PATH = os.environ.get(EPOCH_LOG_ENV)
+        self.epoch_recorder = None
+        # Cache zdekodowanych epok (epoch_cache.py): ponowna analiza tego samego nagrania bez gnssdec
+        self.USE_EPOCH_CACHE = True
+        # Logi tymczasowe epok dekodowanych anten (indeks -> EpochRecorder), do cache po udanym dekodowaniu
+        self.cache_recorders = {}
+        self.antenna_receivers = []
+        self.antenna_processes = []
+        self.fusion = None
         self.jamming_thread = None
         self.triangulation_thread = None
         self.total_samples = 0
@@ -181,15 +226,22 @@ class GPSAnalysisThread(QThread):
         if self.file_paths:
             self.calculate_file_samples() 
             
+    @property
+    def jamming_byte_ranges(self):
+        """Przedziały F1 detektora - skan mocy (pełny albo strumieniowy) wypełnia je na bieżąco."""
+        return self.detector.jamming_byte_ranges
+
+    @jamming_byte_ranges.setter
+    def jamming_byte_ranges(self, ranges):
+        self.detector.jamming_byte_ranges = ranges
+
     def calculate_file_samples(self):
         try:
             if not self.file_paths or not os.path.exists(self.file_paths[0]):
                 return
             file_path = self.file_paths[0]
-            file_size = os.path.getsize(file_path)
-            self.total_file_bytes = file_size 
-            bytes_per_sample = 2 
-            self.total_samples = file_size // bytes_per_sample
+            self.total_file_bytes = os.path.getsize(file_path)
+            self.total_samples = count_samples(file_path, 'uint8')
             self.estimated_total_samples = self.total_samples
         except Exception as e:
             print(f"[PROGRESS] Błąd przy obliczaniu próbek: {e}")
@@ -205,38 +257,31 @@ class GPSAnalysisThread(QThread):
         self.progress_update.emit(0, "scanning_power")
         
         try:
-            dt = np.uint8 
             chunk_size_bytes = self.POWER_CHUNK_SIZE * 2 
-            temp_powers = []
-            
             self.total_file_bytes = os.path.getsize(file_path)
             
-            with open(file_path, 'rb') as f:
-                processed_bytes = 0
-                while not self.stop_requested:
-                    raw_data = f.read(chunk_size_bytes)
-                    if not raw_data: break
-                    
-                    samples = np.frombuffer(raw_data, dtype=dt)
-                    # KOREKTA RTL-SDR (0..255 -> -127.5..127.5)
-                    samples_f = samples.astype(np.float32) - 127.5
-                    
-                    i = samples_f[0::2]
-                    q = samples_f[1::2]
-                    min_len = min(len(i), len(q))
-                    
-                    power = i[:min_len]**2 + q[:min_len]**2
-                    avg_pow = np.mean(power) + 1e-10
-                    temp_powers.append(avg_pow)
-                    
-                    processed_bytes += len(raw_data)
-                    
-                    if self.total_file_bytes > 0:
-                        progress = int((processed_bytes / self.total_file_bytes) * 10)
-                        if progress % 2 == 0: 
-                             self.progress_update.emit(progress, "scanning_power")
+            def report_progress(processed_bytes, total_bytes):
+                if total_bytes > 0:
+                    progress = int((processed_bytes / total_bytes) * 10)
+                    if progress % 2 == 0: 
+                         self.progress_update.emit(progress, "scanning_power")
 
-            self.power_map = np.array(temp_powers)
+            # mmap + tablica kwadratów, bez kopii float32 dla każdego chunka.
+            # Piramida mocy (podgląd w GUI), statystyki szczytowe i magazyn cech (wykres, widmo,
+            # triangulacja) powstają w tym samym przebiegu.
+            self.power_map, pyramid, self.peak_map, self.feature_store = load_or_scan_recording(
+                file_path, chunk_size_bytes,
+                stop_check=lambda: self.stop_requested,
+                progress_callback=report_progress,
+                workers=self.POWER_SCAN_WORKERS
+            )
+            if pyramid is not None:
+                self.power_overview_ready.emit(pyramid)
+            if self.feature_store is not None:
+                self.clip_map = self.feature_store['clip_fraction']
+                saturated = int(np.count_nonzero(saturated_mask(self.clip_map)))
+                if saturated:
+                    print(f"[POWER SCAN] {saturated} chunków z nasyconym ADC (moc zaniżona).")
             
             if len(self.power_map) > 0:
                 self.global_baseline_power = np.percentile(self.power_map, 5) 
@@ -245,25 +290,30 @@ class GPSAnalysisThread(QThread):
                 threshold_ratio = 10**(self.THRESHOLD_POWER_RISE_DB / 10.0) 
                 power_threshold_linear = self.global_baseline_power * threshold_ratio
                 
-                jamming_indices = np.where(self.power_map > power_threshold_linear)[0]
+                jamming_mask = self.power_map > power_threshold_linear
+                if self.peak_map is not None:
+                    # Krótkie / impulsowe zakłócenia: szczyt chunka ponad tłem szczytowym
+                    peak_mask, _ = peak_anomaly_mask(self.peak_map['p99'], self.THRESHOLD_POWER_RISE_DB)
+                    peak_only = int(np.count_nonzero(peak_mask & ~jamming_mask))
+                    if peak_only:
+                        print(f"[POWER SCAN] {peak_only} chunków F1 tylko z mocy szczytowej (impulsy).")
+                    jamming_mask |= peak_mask
+                jamming_indices = np.where(jamming_mask)[0]
                 
                 # Wykrywanie przedziałów
-                self.jamming_byte_ranges = []
+                self.jamming_byte_ranges = IntervalIndex()
                 if len(jamming_indices) > 0:
-                    jamming_mask = self.power_map > power_threshold_linear
-                    diffs = np.diff(jamming_mask.astype(int))
-                    starts = np.where(diffs == 1)[0] + 1
-                    ends = np.where(diffs == -1)[0] + 1
-                    
-                    if jamming_mask[0]: starts = np.insert(starts, 0, 0)
-                    if jamming_mask[-1]: ends = np.append(ends, len(self.power_map))
-                    
-                    for s, e in zip(starts, ends):
-                        start_byte = s * chunk_size_bytes
-                        end_byte = e * chunk_size_bytes
-                        self.jamming_byte_ranges.append((start_byte, end_byte))
+                    starts, ends = high_power_runs(jamming_mask)
+                    # Granice co do próbki - czytane są tylko okna wokół przejść
+                    refined = refine_intervals(IQFile(file_path, 'uint8'), starts, ends,
+                                               self.POWER_CHUNK_SIZE, self.power_map)
+                    self.jamming_byte_ranges = IntervalIndex((2 * s, 2 * e) for s, e in refined)
                         
                     print(f"[POWER SCAN] Wykryto {len(self.jamming_byte_ranges)} okresów wysokiej mocy (F1).")
+                    classifier = JammerClassifier(file_path, chunk_size_bytes, self.SAMPLE_RATE_HZ)
+                    for start_byte, end_byte in self.jamming_byte_ranges:
+                        self.classify_power_range(classifier, start_byte, end_byte)
+                        self.check_range_saturation(start_byte, end_byte)
                 else:
                     print(f"[POWER SCAN] Nie wykryto skoku mocy powyżej progu {self.THRESHOLD_POWER_RISE_DB} dB.")
             
@@ -274,199 +324,323 @@ class GPSAnalysisThread(QThread):
             print(f"[POWER SCAN] BŁĄD: {e}")
             self.power_map_ready = False
 
-    def process_incoming_data(self, data):
+    def stream_power_profile(self):
+        """Skan mocy w tle: przedziały F1 pojawiają się w miarę czytania pliku."""
+        file_path = self.file_paths[0]
+        chunk_size_bytes = self.POWER_CHUNK_SIZE * 2
+        print(f"[POWER STREAM] Skanowanie strumieniowe (uint8): {os.path.basename(file_path)}")
+
         try:
-            position = data.get('position', {})
-            observations = data.get('observations', [])
-            elapsed_str = data.get('elapsed_time', 0.0)
-            try:
-                self.current_signal_time = float(elapsed_str)
-            except: pass
-
-            if position:
-                self.current_buffcnt = position.get('buffcnt', 0) 
-                self.current_lat = float(position.get('lat', 0.0))
-                self.current_lon = float(position.get('lon', 0.0))
-                self.current_hgt = float(position.get('hgt', 0.0))
-                self.current_nsat = position.get('nsat', 0)
-                self.current_gdop = float(position.get('gdop', 0.0))
-                self.current_clk_bias = float(position.get('clk_bias', 0.0))
-                
-                # Aktualizacja mocy
-                if self.power_map_ready and self.total_file_bytes > 0:
-                    ratio = self.current_buffcnt / self.total_file_bytes
-                    ratio = max(0.0, min(1.0, ratio))
-                    idx = int(ratio * len(self.power_map))
-                    idx = min(idx, len(self.power_map)-1)
-                    self.current_iq_power = self.power_map[idx]
-
-                # Analiza obserwacji
-                snr_values = [obs.get('snr', 0.0) for obs in observations if 'snr' in obs]
-                if snr_values:
-                    self.current_cn0_avg = np.mean(snr_values)
-                    residuals = [obs.get('residual', 0.0) for obs in observations if 'residual' in obs]
-                    if residuals:
-                        self.current_residuals_median = np.median(residuals)
-                        bad_sats = sum(1 for r in residuals if r > self.THRESHOLD_RESIDUAL_SINGLE_SAT_M)
-                        self.current_residuals_bad_count = bad_sats
+            detector = StreamingPowerDetector(threshold_db=self.THRESHOLD_POWER_RISE_DB)
+            classifier = JammerClassifier(file_path, chunk_size_bytes, self.SAMPLE_RATE_HZ)
+            # Statystyki szczytowe i nasycenie bloku przychodzą z callbacków tuż przed samym blokiem
+            block_peaks = []
+            block_clips = []
+
+            if self.follow_recording:
+                # Plik rośnie - mapa mocy rośnie razem z nim
+                is_active = self.follow_recording if callable(self.follow_recording) else None
+                blocks = follow_power_blocks(
+                    file_path, chunk_size_bytes,
+                    is_active=is_active,
+                    stop_check=lambda: self.stop_requested,
+                    peak_callback=lambda *stats: block_peaks.append(stats),
+                    clip_callback=block_clips.append
+                )
+                power_buffer = np.zeros(1024, dtype=np.float32)
+                self.power_map = power_buffer[:0]
+            else:
+                blocks = iter_power_blocks(file_path, chunk_size_bytes,
+                                           peak_callback=lambda *stats: block_peaks.append(stats),
+                                           clip_callback=block_clips.append)
+                self.total_file_bytes = os.path.getsize(file_path)
+                power_buffer = np.zeros(count_power_chunks(self.total_file_bytes, chunk_size_bytes), dtype=np.float32)
+                self.power_map = power_buffer
+            clip_buffer = np.zeros(len(power_buffer), dtype=np.float32)
+            self.clip_map = clip_buffer[:len(self.power_map)]
+            self.power_map_ready = True
+
+            def apply_changes(changes):
+                for kind, chunk in changes:
+                    if kind == 'start':
+                        self.jamming_byte_ranges.append(chunk * chunk_size_bytes, chunk * chunk_size_bytes)
+                        start_sec = chunk * self.POWER_CHUNK_SIZE / self.SAMPLE_RATE_HZ
+                        self.new_analysis_text.emit(f"⚠️ [F1] Wzrost mocy od {start_sec:.2f}s nagrania")
                     else:
-                        self.current_residuals_median = 0.0
-                        self.current_residuals_bad_count = 0
-                else:
-                    self.current_cn0_avg = 0.0
-                    self.current_residuals_median = 0.0
-                    self.current_residuals_bad_count = 0
-
-                if not self.jamming_detected and self.current_cn0_avg > 0:
-                    self.cn0_history.append(self.current_cn0_avg)
-                if len(self.cn0_history) > 10: 
-                    self.median_cn0 = np.median(self.cn0_history)
-                else:
-                    self.median_cn0 = self.current_cn0_avg 
+                        self.jamming_byte_ranges.extend_last(chunk * chunk_size_bytes)
+                        self.refine_last_power_range(file_path, chunk)
+                        self.classify_power_range(classifier, *self.jamming_byte_ranges[-1])
+                        self.check_range_saturation(*self.jamming_byte_ranges[-1])
+                # Trwający przedział rośnie razem ze skanem
+                if detector.open_start is not None:
+                    self.jamming_byte_ranges.extend_last(detector.chunks_seen * chunk_size_bytes)
+                if detector.baseline > 0:
+                    self.global_baseline_power = detector.baseline
 
-                self.update_progress_bar()
-                
-                is_safe = True
-                # Sprawdzenie mapy mocy
-                if self.jamming_byte_ranges:
-                    # Jeśli jesteśmy w którymkolwiek zakresie lub po nim
-                    if self.current_buffcnt >= self.jamming_byte_ranges[0][0]:
-                        is_safe = False
-                
-                if self.jamming_detected:
-                    is_safe = False
+            for first_chunk, powers in blocks:
+                if self.stop_requested:
+                    return
+                end_chunk = first_chunk + len(powers)
+                if end_chunk > len(power_buffer):
+                    grown = np.zeros(max(end_chunk, 2 * len(power_buffer)), dtype=np.float32)
+                    grown[:len(power_buffer)] = power_buffer
+                    power_buffer = grown
+                    grown = np.zeros(len(power_buffer), dtype=np.float32)
+                    grown[:len(clip_buffer)] = clip_buffer
+                    clip_buffer = grown
+                power_buffer[first_chunk:end_chunk] = powers
+                if block_clips:
+                    clip_buffer[first_chunk:end_chunk] = block_clips.pop()
+                self.clip_map = clip_buffer[:end_chunk] if self.follow_recording else clip_buffer
+                if self.follow_recording:
+                    self.power_map = power_buffer[:end_chunk]
+                    self.total_file_bytes = end_chunk * chunk_size_bytes
+                    self.total_samples = self.total_file_bytes // 2
+                    self.estimated_total_samples = self.total_samples
+                peak_powers = block_peaks.pop()[1] if block_peaks else None
+                apply_changes(detector.update(powers, peak_powers))
+            apply_changes(detector.flush())
+
+            if self.jamming_byte_ranges:
+                print(f"[POWER STREAM] Wykryto {len(self.jamming_byte_ranges)} okresów wysokiej mocy (F1).")
+            else:
+                print(f"[POWER STREAM] Nie wykryto skoku mocy powyżej progu {self.THRESHOLD_POWER_RISE_DB} dB.")
+
+        except Exception as e:
+            print(f"[POWER STREAM] BŁĄD: {e}")
+
+    def refine_last_power_range(self, file_path, end_chunk):
+        """Zamknięty przedział strumienia: granice co do próbki z okien wokół przejść."""
+        start_chunk = self.jamming_byte_ranges[-1][0] // (self.POWER_CHUNK_SIZE * 2)
+        try:
+            # Plik mógł urosnąć (tryb śledzenia) - czytnik otwierany dla każdego przedziału
+            reader = IQFile(file_path, 'uint8')
+            (start_sample, end_sample), = refine_intervals(reader, [start_chunk], [end_chunk], self.POWER_CHUNK_SIZE,
+                                                           self.power_map[:end_chunk + 1])
+            self.jamming_byte_ranges.replace_last(2 * start_sample, 2 * end_sample)
+        except Exception as e:
+            print(f"[POWER STREAM] Nie udało się doprecyzować granic przedziału: {e}")
+
+    def classify_power_range(self, classifier, start_byte, end_byte):
+        """Typ jammera dla zamkniętego przedziału F1 (cechy STFT z ramek przedziału)."""
+        try:
+            features = classifier.classify_byte_range(start_byte, end_byte)
+        except Exception as e:
+            print(f"[KLASYFIKATOR] BŁĄD: {e}")
+            features = {'type': 'unknown'}
+        self.jammer_types[start_byte] = features
+        start_sec = start_byte / 2 / self.SAMPLE_RATE_HZ
+        print(f"[KLASYFIKATOR] Przedział od {start_sec:.2f}s: {features['type']} "
+              f"(płaskość {features.get('flatness', 0):.2f}, koncentracja {features.get('peak_concentration', 0):.2f}, "
+              f"dryf {features.get('drift_hz_s', 0):.0f} Hz/s, CV obwiedni {features.get('envelope_cv', 0):.2f})")
+        self.new_analysis_text.emit(f"🔎 [F1] Typ zakłócenia od {start_sec:.2f}s: {JAMMER_TYPE_NAMES[features['type']]}")
+
+    def check_range_saturation(self, start_byte, end_byte):
+        """Nasycenie ADC w przedziale F1 - obcięte próbki zaniżają moc (J/N) i RSSI."""
+        summary = self.saturation_for(start_byte, end_byte)
+        self.range_saturation[start_byte] = summary
+        if summary['saturated']:
+            start_sec = start_byte / 2 / self.SAMPLE_RATE_HZ
+            print(f"[SATURACJA] Przedział od {start_sec:.2f}s: {summary['saturated_fraction']:.0%} chunków nasyconych "
+                  f"(max {summary['clip_fraction']:.1%} obciętych składowych) - moc zaniżona.")
+            self.new_analysis_text.emit(f"⚠️ [F1] Nasycenie ADC od {start_sec:.2f}s - moc zakłócenia zaniżona")
+
+    def saturation_for(self, start_byte, end_byte):
+        """saturation_summary chunków mocy pokrywających [start_byte, end_byte)."""
+        if self.clip_map is None:
+            return saturation_summary([], 0, 0)
+        chunk_size_bytes = self.POWER_CHUNK_SIZE * 2
+        return saturation_summary(self.clip_map, start_byte // chunk_size_bytes, -(-end_byte // chunk_size_bytes))
+
+    def jammer_type_for(self, start_byte, end_byte):
+        """Typ jammera przedziału F1 pokrywającego się ze zdarzeniem albo None (zdarzenie bez F1)."""
+        range_idx = self.jamming_byte_ranges.overlapping(start_byte, end_byte)
+        if range_idx is None:
+            return None
+        return self.jammer_types.get(self.jamming_byte_ranges[range_idx][0], {}).get('type')
+
+    def wait_for_recording_file(self, timeout_sec=10.0):
+        """Tryb śledzenia: czeka, aż rtl_sdr utworzy plik i zapisze pierwsze dane."""
+        file_path = self.file_paths[0]
+        deadline = time.monotonic() + timeout_sec
+        while not self.stop_requested and time.monotonic() < deadline:
+            if os.path.exists(file_path) and os.path.getsize(file_path) >= self.POWER_CHUNK_SIZE * 2:
+                return True
+            time.sleep(0.2)
+        return False
+
+    def start_power_stream(self):
+        self.jamming_byte_ranges = IntervalIndex()
+        self.power_thread = threading.Thread(target=self.stream_power_profile)
+        self.power_thread.daemon = True
+        self.power_thread.start()
+
+    def enqueue_epoch(self, data, antenna=0):
+        """Wywoływane przez odbiorniki (HTTP, strumień). antenna - indeks w file_paths.
 
-                if is_safe and self.current_lat != 0.0 and self.current_nsat >= 4:
-                     self.last_position_before_jamming = {
-                        'lat': self.current_lat,
-                        'lon': self.current_lon,
-                        'hgt': self.current_hgt,
-                        'buffcnt': self.current_buffcnt,
-                        'valid': True
-                    }
+        Plik: przy pełnej kolejce czeka (gnssdec zwalnia), żeby nie gubić epok. Nagrywanie
+        na żywo (follow_recording): nie blokuje, wypada najstarsza epoka.
+        """
+        live = bool(self.follow_recording)
+        if not self.ingest.put((antenna, data), block=not live) and self.ingest.dropped == 1:
+            if live:
+                print(f"[WORKER] Kolejka epok pełna ({self.ingest.maxlen}) - najstarsze epoki są pomijane.")
+            else:
+                print(f"[WORKER] Detektor nie nadąża ({self.ingest.maxlen} epok w kolejce) - "
+                      f"pomijam najstarsze epoki.")
+
+    def start_ingest(self):
+        if self.EPOCH_LOG_PATH:
+            try:
+                self.epoch_recorder = EpochRecorder(self.EPOCH_LOG_PATH)
+            except OSError as e:
+                print(f"[WORKER] Nie można zapisać logu epok: {e}")
+        self.ingest = IngestQueue(INGEST_QUEUE_SIZE)
+        self.ingest_stop.clear()
+        self.ingest_thread = threading.Thread(target=self.ingest_loop, daemon=True)
+        self.ingest_thread.start()
+
+    def ingest_loop(self):
+        """Detektor: zdejmuje epoki partiami; tekst i pozycja do GUI raz na partię."""
+        while True:
+            batch = self.ingest.drain(INGEST_BATCH_SIZE, timeout=0.1)
+            if not batch:
+                if self.ingest_stop.is_set():
+                    break
+                continue
+            self.process_batch(batch)
+
+    def process_batch(self, batch):
+        """Partia epok (antena, dane): antena 0 - pełna detekcja, pozostałe - głosy anten."""
+        last = len(batch) - 1
+        for i, (antenna, data) in enumerate(batch):
+            if self.cache_recorders:
+                self.record_cache_epoch(antenna, data)
+            if antenna:
+                self.process_antenna_epoch(antenna, data)
+            else:
+                if self.epoch_recorder:
+                    self.record_epoch(data)
+                self.process_incoming_data(data, emit_status=(i == last))
+
+    def stop_ingest(self):
+        """Po zatrzymaniu odbiorników: detektor kończy to, co zostało w kolejce."""
+        if self.ingest_thread is None:
+            return
+        self.ingest_stop.set()
+        self.ingest_thread.join()
+        self.ingest_thread = None
+        self.ingest.close()
+        if self.epoch_recorder:
+            print(f"[WORKER] Log epok: {self.epoch_recorder.epochs_written} epok -> {self.epoch_recorder.path}")
+            self.epoch_recorder.close()
+            self.epoch_recorder = None
+        stats = self.ingest.stats()
+        print(f"[WORKER] Kolejka epok: {stats['processed']}/{stats['received']} epok, "
+              f"pominięte {stats['dropped']}, wstrzymania {stats['blocked']}, "
+              f"maks. głębokość {stats['max_depth']}/{stats['capacity']}, "
+              f"maks. opóźnienie {stats['max_lag_s'] * 1000:.1f} ms")
+
+    def record_epoch(self, data):
+        try:
+            self.epoch_recorder.write(data)
+        except (OSError, ValueError) as e:
+            print(f"[WORKER] Log epok przerwany: {e}")
+            self.epoch_recorder.close()
+            self.epoch_recorder = None
+
+    def replay_epoch_log(self, path, speed=None):
+        """Detektor na epokach z logu (epoch_log.py) zamiast gnssdec - np. po zmianie progów.
 
-                self.check_jamming_conditions()
+        speed=None - najszybciej, inaczej N-krotność tempa nagrania. F1 wymaga wcześniejszego
+        precalculate_power_profile(). Zwraca listę zdarzeń jak jamming_events.
+        """
+        if speed:
+            replay_epochs(iter_epoch_log(path), self.detector.feed, speed)
+        else:
+            self.detector.feed_batch(iter_epoch_log(path))
+        return self.detector.finish()
+
+    def process_antenna_epoch(self, antenna, data):
+        """Epoka anteny pomocniczej: tylko flagi nawigacyjne do głosowania (bez GUI i mapy mocy)."""
+        try:
+            if isinstance(data, (bytes, bytearray)):
+                data = json.loads(data)
+            if isinstance(data, BinaryEpoch):
+                header = data.header
+                self.fusion.states[antenna - 1].update(int(header['buffcnt']), int(header['nsat']), float(header['hgt']),
+                                                       data.observations['snr'])
+                return
+            position = data.get('position', {})
+            if not position:
+                return
+            observations = data.get('observations', [])
+            self.fusion.states[antenna - 1].update(
+                position.get('buffcnt', 0), position.get('nsat', 0), float(position.get('hgt', 0.0)),
+                np.array([obs.get('snr', 0.0) for obs in observations if 'snr' in obs], dtype=np.float64))
+        except Exception as e:
+            print(f"[WORKER] Błąd epoki anteny {antenna + 1}: {e}")
 
+    def process_incoming_data(self, data, emit_status=True):
+        """Epoka anteny głównej do detektora; emit_status - postęp, linia statusu i pozycja do GUI."""
+        try:
+            self.detector.feed(data)
+            if not emit_status:
+                return
+            detector = self.detector
+            self.update_progress_bar()
+            self.update_iq_power()
             pwr_db = 0.0
             if self.global_baseline_power > 0 and self.current_iq_power > 0:
                 pwr_db = 10 * np.log10(self.current_iq_power / self.global_baseline_power)
             
-            txt = f"[{self.current_signal_time:.2f}s, Lat:{self.current_lat:.6f}, Lon:{self.current_lon}, Pwr:{pwr_db:.1f}dB]"
+            txt = f"[{detector.current_signal_time:.2f}s, Lat:{detector.current_lat:.6f}, Lon:{detector.current_lon}, Pwr:{pwr_db:.1f}dB]"
             self.new_analysis_text.emit(txt)
             
-            if not self.jamming_detected and (self.current_lat != 0.0 or self.current_lon != 0.0):
-                self.new_position_data.emit(self.current_lat, self.current_lon, self.current_hgt)
+            if not detector.jamming_detected and (detector.current_lat != 0.0 or detector.current_lon != 0.0):
+                self.new_position_data.emit(detector.current_lat, detector.current_lon, detector.current_hgt)
                     
         except Exception as e:
             print(f"[WORKER] Błąd: {e}")
 
-    def check_jamming_conditions(self):
-        # F1: MOC
-        flag_f1 = False
-        if self.jamming_byte_ranges:
-            for start_byte, end_byte in self.jamming_byte_ranges:
-                if start_byte <= self.current_buffcnt <= end_byte:
-                    flag_f1 = True
-                    break
-        
-        # F2: JAKOŚĆ
-        flag_f2 = False
-        if len(self.cn0_history) > 40: 
-            if self.current_cn0_avg < (self.median_cn0 - self.THRESHOLD_CN0_DROP_DB):
-                flag_f2 = True
-
-        # F3: INTEGRITY
-        flag_f3 = False
-        integrity_fail = (self.current_residuals_median > self.THRESHOLD_RESIDUALS_MEDIAN_M) or \
-                         (self.current_residuals_bad_count >= self.MIN_BAD_SATS_FOR_ALARM)
-        
-        # F4: WYSOKOŚĆ
-        flag_hgt = False
-        if self.current_nsat > 0 and abs(self.current_hgt) > self.THRESHOLD_HGT_MAX:
-            flag_hgt = True
-
-        nav_issue = (flag_f3 or flag_hgt) and (self.current_nsat > 0)
-        is_jamming_now = flag_f1 or flag_f2 or nav_issue
-        
-        if not self.jamming_detected:
-            if is_jamming_now:
-                if flag_f1:
-                     self.confirm_jamming_start(reason="Moc (Mapowana)")
-                else:
-                    if self.potential_jamming_start_signal_time is None:
-                        self.potential_jamming_start_signal_time = self.current_signal_time
-                        self.potential_start_buffcnt = self.current_buffcnt
-                    elif (self.current_signal_time - self.potential_jamming_start_signal_time) >= self.required_jamming_duration_sec:
-                        self.confirm_jamming_start(reason="Jakość/Integrity")
-            else:
-                self.potential_jamming_start_signal_time = None
-        else:
-            if not is_jamming_now:
-                if self.potential_jamming_end_signal_time is None:
-                    self.potential_jamming_end_signal_time = self.current_signal_time
-                else:
-                    clean_duration = self.current_signal_time - self.potential_jamming_end_signal_time
-                    if clean_duration >= self.required_clean_duration_sec:
-                        self.confirm_jamming_end()
-                        self.potential_jamming_end_signal_time = None
-            else:
-                self.potential_jamming_end_signal_time = None
+    def update_iq_power(self):
+        """Moc I/Q z mapy mocy w miejscu bieżącej epoki (linia statusu)."""
+        if self.power_map_ready and self.total_file_bytes > 0:
+            ratio = self.detector.current_byte / self.total_file_bytes
+            ratio = max(0.0, min(1.0, ratio))
+            idx = int(ratio * len(self.power_map))
+            idx = min(idx, len(self.power_map)-1)
+            self.current_iq_power = self.power_map[idx]
 
-    def confirm_jamming_start(self, reason="N/A"):
-        self.jamming_detected = True
-        
-        start_byte = self.potential_start_buffcnt
-        if reason == "Moc (Mapowana)" and self.jamming_byte_ranges:
-             for s, e in self.jamming_byte_ranges:
-                 if s <= self.current_buffcnt <= e:
-                     start_byte = s
-                     break
-        else:
-             start_byte = self.potential_start_buffcnt if self.potential_start_buffcnt > 0 else self.current_buffcnt
+    def on_detector_start(self, reason, safe_position):
+        if safe_position is not None:
+            self.jamming_detected_realtime.emit(True, safe_position)
 
-        self.active_event_start_buffcnt = start_byte
-        self.active_event_start_time = self.current_signal_time
-        
-        if reason == "Jakość/Integrity" and self.potential_jamming_start_signal_time:
-             self.active_event_start_time = self.potential_jamming_start_signal_time
+    def on_detector_end(self, event):
+        self.jamming_detected_realtime.emit(False, {})
 
-        print(f"[DETEKTOR] 🚨 ATAK POTWIERDZONY! Powód: {reason}")
-        print(f"[DETEKTOR]    Start: {self.active_event_start_time:.2f}s")
-        
-        if self.last_position_before_jamming['valid']:
-            self.jamming_detected_realtime.emit(True, self.last_position_before_jamming)
-        else:
-            print("[DETEKTOR] ⚠️ Brak bezpiecznej pozycji przed atakiem!")
+    def on_detector_power_warning(self, distance_sec):
+        self.new_analysis_text.emit(f"🔶 [F1] Wzrost mocy za {distance_sec:.2f}s nagrania")
 
-    def confirm_jamming_end(self):
-        self.jamming_detected = False
-        end_time = self.current_signal_time
-        print(f"[DETEKTOR] ✅ Koniec ataku. (Koniec: {end_time:.2f}s)")
-        
-        start_sample = self.active_event_start_buffcnt
-        end_sample = self.current_buffcnt
-        
-        event_data = {
-            'start_sample': start_sample,
-            'end_sample': end_sample,
-            'start_time': self.active_event_start_time,
-            'end_time': end_time,
-            'duration': end_time - self.active_event_start_time
+    def describe_event(self, start_sample, end_sample):
+        """Pola zdarzenia z analizy mocy: typ jammera i nasycenie ADC (granice zdarzenia w próbkach - buffcnt)."""
+        start_byte, end_byte = start_sample * IQ_SAMPLE_BYTES, end_sample * IQ_SAMPLE_BYTES
+        return {
+            'jammer_type': self.jammer_type_for(start_byte, end_byte),
+            'saturation': self.saturation_for(start_byte, end_byte)
         }
-        
-        self.jamming_events.append(event_data)
-        self.jamming_detected_realtime.emit(False, {})
 
     def get_best_safe_position(self):
         if not self.last_safe_position_buffer:
-            return self.last_position_before_jamming 
+            return self.detector.last_position_before_jamming 
         return self.last_safe_position_buffer[0]
 
     def update_progress_bar(self):
-        if self.total_samples > 0 and self.current_buffcnt > 0:
+        buffcnt = self.detector.current_buffcnt
+        if self.total_samples > 0 and buffcnt > 0:
             current_total = max(self.total_samples, self.estimated_total_samples)
-            progress_percent = min(100, int((self.current_buffcnt / current_total) * 100))
-            if self.jamming_detected:
+            progress_percent = min(100, int((buffcnt / current_total) * 100))
+            if self.detector.jamming_detected:
                 status = "triangulating" if (self.triangulation_thread and self.triangulation_thread.is_alive()) else "jamming"
                 self.progress_update.emit(progress_percent, status)
             else:
@@ -476,69 +650,97 @@ class GPSAnalysisThread(QThread):
 
     def run(self):
         self.stop_requested = False
-        _DataReceiverHandler.thread_instance = self
         
         print("[WORKER] Uruchamianie wątku analizy...")
+        self.decoder_caps = decoder_capabilities(self.gnssdec_path)
 
         # 1. SERVER
         try:
-            server_address = ('127.0.0.1', 1234)
+            # Starszy gnssdec nie czyta portu ze środowiska - wysyła na stały LEGACY_HTTP_PORT
+            server_address = ('127.0.0.1', 0 if CAP_HTTP_PORT in self.decoder_caps else LEGACY_HTTP_PORT)
             # [FIX] Używamy ReusableHTTPServer
             self.http_server = ReusableHTTPServer(server_address, _DataReceiverHandler)
+            self.http_server.thread_instance = self
+            self.http_port = self.http_server.server_address[1]
             self.http_thread = threading.Thread(target=self.http_server.serve_forever)
             self.http_thread.daemon = True 
             self.http_thread.start()
-            print("[WORKER] Serwer HTTP uruchomiony (port 1234).") 
+            print(f"[WORKER] Serwer HTTP uruchomiony (port {self.http_port}).") 
         except Exception as e:
             print(f"[WORKER] Błąd serwera: {e}")
             return
+
+        try:
+            if CAP_STREAM in self.decoder_caps:
+                self.epoch_stream = EpochStreamServer(self.enqueue_epoch, binary=self.binary_epochs())
+                self.epoch_stream.start()
+                print(f"[WORKER] Strumień epok: {self.epoch_stream.path}")
+        except OSError as e:
+            print(f"[WORKER] Strumień epok niedostępny ({e}) - tylko HTTP.")
+            self.epoch_stream = None
+        self.start_ingest()
         
         file1 = self.file_paths[0] if self.file_paths else None
         if not file1: return
 
-        # 2. PRE-SCAN
-        self.precalculate_power_profile()
+        if self.follow_recording and not self.wait_for_recording_file():
+            print(f"[WORKER] Brak danych w nagrywanym pliku: {file1}")
+            self.shutdown_server()
+            return
+
+        # 2. PRE-SCAN (albo skan strumieniowy w tle)
+        if self.stream_power:
+            self.start_power_stream()
+        else:
+            self.precalculate_power_profile()
         
         if self.stop_requested:
             self.shutdown_server()
             return
 
-        # 3. GNSSDEC
+        # 3. GNSSDEC (antena główna; pozostałe anteny równolegle) albo epoki z cache
+        decoded = False
         try:
-            print(f"[WORKER] Uruchamianie analizy {self.gnssdec_path}...")
-            gnssdec_command = [self.gnssdec_path, self.gnss_system_flag]
-            if self.hold_position:
-                gnssdec_command.append('-h')
-            gnssdec_command.append(file1)
-            
-            self.current_signal_time = 0.0
-            self.cn0_history.clear()
+            self.detector.current_signal_time = 0.0
+            self.detector.cn0_history.clear()
             
-            subprocess.run(gnssdec_command, check=True, capture_output=True, text=True)
-            print(f"[WORKER] Analiza gnssdec zakończona.")
+            cached_logs = self.load_cached_epochs()
+            if cached_logs:
+                print(f"[WORKER] Epoki z cache ({len(cached_logs)} ant.) - gnssdec pominięty.")
+                self.replay_cached_epochs(cached_logs)
+            else:
+                print(f"[WORKER] Uruchamianie analizy {self.gnssdec_path}...")
+                self.start_epoch_cache_recording()
+                if self.FUSE_ANTENNAS and CAP_HTTP_PORT in self.decoder_caps:
+                    self.start_antenna_decoders()
+                elif self.FUSE_ANTENNAS and len(self.file_paths) > 1:
+                    # Wszystkie gnssdec wysyłałyby na ten sam stały port - epoki anten by się pomieszały
+                    print("[WORKER] gnssdec bez portu ze środowiska - pozostałe anteny nie są dekodowane.")
+                gnssdec_env = self.gnssdec_env(self.http_port, self.epoch_stream)
+                segments = self.plan_decode_segments(file1)
+                if len(segments) == 1 or not self.decode_segments(file1, segments, gnssdec_env):
+                    self.run_decoder(self.gnssdec_command(file1), gnssdec_env)
+                decoded = True
+                print(f"[WORKER] Analiza gnssdec zakończona.")
             
         except Exception as e:
             print(f"[WORKER] Błąd procesu gnssdec: {e}")
+            if self.decoder_output:
+                for line in self.decoder_output.tail(10):
+                    print(f"[GNSSDEC] {line}")
             
         finally:
+            self.wait_antenna_decoders()
             self.progress_update.emit(100, "completed")
             self.shutdown_server()
+            self.store_epoch_cache(decoded and not self.stop_requested)
+            if self.power_thread and self.power_thread.is_alive():
+                self.power_thread.join(timeout=5.0)
             
             # Jeśli plik się skończył, a jamming trwa, zamykamy zdarzenie
-            if self.jamming_detected:
+            if self.detector.jamming_detected:
                 print("[WORKER] Plik zakończony w trakcie aktywnego jammingu. Zamykanie zdarzenia.")
-                end_time = self.current_signal_time
-                start_sample = self.active_event_start_buffcnt
-                end_sample = self.current_buffcnt
-                
-                event_data = {
-                    'start_sample': start_sample,
-                    'end_sample': end_sample,
-                    'start_time': self.active_event_start_time,
-                    'end_time': end_time,
-                    'duration': end_time - self.active_event_start_time
-                }
-                self.jamming_events.append(event_data)
+                self.detector.close_active_event()
                 
                 # [FIX] Uruchom triangulację, jeśli jest jamming
                 print("[WORKER] Uruchamiam triangulację na koniec pliku...")
@@ -547,8 +749,8 @@ class GPSAnalysisThread(QThread):
                     self.triangulation_thread.join()
             
             result_info = []
-            if self.jamming_events:
-                 for i, ev in enumerate(self.jamming_events):
+            if self.detector.jamming_events:
+                 for i, ev in enumerate(self.detector.jamming_events):
                     result_info.append({
                         'type': 'jamming',
                         'event_number': i + 1,
@@ -557,6 +759,8 @@ class GPSAnalysisThread(QThread):
                         'start_time': ev['start_time'],
                         'end_time': ev['end_time'],
                         'duration': ev['duration'],
+                        'jammer_type': ev['jammer_type'],
+                        'saturation': ev['saturation'],
                         'triangulation': self.triangulation_result
                     })
             else:
@@ -572,13 +776,13 @@ class GPSAnalysisThread(QThread):
                     return
 
                 print(f"[TRIANGULACJA] Start obliczeń...")
-                final_position = self.last_position_before_jamming
+                final_position = self.detector.last_position_before_jamming
                 if final_position['valid']:
                     ref_lat = final_position['lat']
                     ref_lon = final_position['lon']
                 else:
-                    ref_lat = self.current_lat if self.current_lat != 0.0 else 50.0
-                    ref_lon = self.current_lon if self.current_lon != 0.0 else 20.0
+                    ref_lat = self.detector.current_lat if self.detector.current_lat != 0.0 else 50.0
+                    ref_lon = self.detector.current_lon if self.detector.current_lon != 0.0 else 20.0
                 
                 test_files = self.get_test_files_for_triangulation()
                 antenna_positions_meters = [
@@ -638,17 +842,272 @@ class GPSAnalysisThread(QThread):
     def on_jamming_detected(self, events):
         pass
 
+    def gnssdec_command(self, file_path):
+        command = [self.gnssdec_path, self.gnss_system_flag]
+        if self.hold_position:
+            command.append('-h')
+        if self.follow_recording:
+            if CAP_FOLLOW in self.decoder_caps:
+                command.append('-f')
+            else:
+                print("[WORKER] gnssdec bez -f - dekodowanie tylko dotychczas zapisanej części nagrania.")
+        command.append(file_path)
+        return command
+
+    def binary_epochs(self):
+        """Rekordy binarne w strumieniu - gdy włączone i obsługiwane przez gnssdec."""
+        return self.BINARY_EPOCHS and CAP_BINARY in self.decoder_caps
+
+    def gnssdec_env(self, http_port, epoch_stream):
+        """Środowisko gnssdec: port POST /data i (jeśli działa) gniazdo strumienia epok."""
+        env = epoch_stream.child_env() if epoch_stream else dict(os.environ)
+        env[HTTP_PORT_ENV] = str(http_port)
+        return env
+
+    def run_decoder(self, command, env):
+        """gnssdec z wyjściem czytanym na bieżąco; CalledProcessError jak subprocess.run(check=True)."""
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   bufsize=1, errors='replace', env=env)
+        self.decoder_output = DecoderOutputReader(process, on_status=self.on_decoder_status)
+        returncode = process.wait()
+        self.decoder_output.join()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, command)
+
+    def on_decoder_status(self, status):
+        """Wątek czytnika wyjścia: zmiana liczby satelitów w akwizycji / śledzeniu / zdekodowanych."""
+        self.decoder_status.emit(status.to_dict())
+
+    def plan_decode_segments(self, file_path):
+        """Segmenty równoległego dekodowania; jeden segment = zwykły gnssdec na całym pliku."""
+        if self.follow_recording or self.DECODE_SEGMENTS <= 1 or not self.epoch_stream \
+                or CAP_SEGMENT not in self.decoder_caps:
+            return [(0, 0, None)]
+        return plan_segments(os.path.getsize(file_path), self.DECODE_SEGMENTS, self.SAMPLE_RATE_HZ)
+
+    def decode_segments(self, file_path, segments, env):
+        """False, gdy gnssdec odrzucił opcje segmentów (błąd bez żadnej epoki) - wtedy jeden przebieg."""
+        decoder = SegmentedDecoder(self.gnssdec_command(file_path), self.enqueue_epoch, segments,
+                                   binary=self.binary_epochs(), env=env, stop_check=lambda: self.stop_requested)
+        print(f"[WORKER] Dekodowanie w {len(segments)} segmentach równolegle.")
+        try:
+            decoder.run()
+        except subprocess.CalledProcessError as e:
+            if decoder.stitcher.emitted or decoder.stitcher.dropped_warmup or self.stop_requested:
+                raise
+            print(f"[WORKER] gnssdec nie dekoduje segmentów (kod {e.returncode}) - jeden przebieg na całym pliku.")
+            return False
+        finally:
+            print(f"[WORKER] Sklejono {decoder.stitcher.emitted} epok "
+                  f"(pominięty rozbieg: {decoder.stitcher.dropped_warmup}).")
+        return True
+
+    def start_antenna_receivers(self, antenna):
+        """Serwer HTTP (wolny port) i strumień epok anteny pomocniczej -> (serwer, wątek, strumień)."""
+        http_server = ReusableHTTPServer(('127.0.0.1', 0), _DataReceiverHandler)
+        http_server.thread_instance = self
+        http_server.antenna = antenna
+        http_thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        http_thread.start()
+        epoch_stream = None
+        try:
+            if CAP_STREAM in self.decoder_caps:
+                epoch_stream = EpochStreamServer(functools.partial(self.enqueue_epoch, antenna=antenna),
+                                                 binary=self.binary_epochs())
+                epoch_stream.start()
+        except OSError:
+            epoch_stream = None
+        return http_server, http_thread, epoch_stream
+
+    def start_antenna_decoders(self):
+        """gnssdec dla każdej anteny pomocniczej - równolegle z anteną główną, epoki do wspólnej kolejki."""
+        antennas = self.setup_antenna_fusion()
+        for antenna in antennas:
+            try:
+                http_server, http_thread, epoch_stream = self.start_antenna_receivers(antenna)
+            except OSError as e:
+                print(f"[WORKER] Antena {antenna + 1}: brak odbiornika epok ({e}).")
+                continue
+            self.antenna_receivers.append((http_server, http_thread, epoch_stream))
+            env = self.gnssdec_env(http_server.server_address[1], epoch_stream)
+            process = subprocess.Popen(self.gnssdec_command(self.file_paths[antenna]), env=env,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.antenna_processes.append((antenna, process))
+        print(f"[WORKER] Równoległe dekodowanie anten: {', '.join(str(a + 1) for a, _ in self.antenna_processes)}")
+
+    def wait_antenna_decoders(self):
+        for antenna, process in self.antenna_processes:
+            if self.stop_requested:
+                process.terminate()
+            if process.wait() != 0:
+                print(f"[WORKER] gnssdec anteny {antenna + 1} zakończony kodem {process.returncode}.")
+                self.discard_cache_recording(antenna)
+        self.antenna_processes = []
+
+    def setup_antenna_fusion(self):
+        """Stan głosowania anten pomocniczych; zwraca indeksy anten z istniejącym plikiem."""
+        self.fusion = None
+        antennas = [i for i, path in enumerate(self.file_paths) if i > 0 and os.path.exists(path)]
+        if antennas:
+            # Indeks anteny i -> states[i - 1]; antena bez pliku nigdy nie głosuje
+            states = [AntennaNavState(self.detector.THRESHOLD_CN0_DROP_DB, self.detector.THRESHOLD_HGT_MAX)
+                      for _ in self.file_paths[1:]]
+            self.fusion = AntennaFusion(states, int(FUSION_WINDOW_SEC * self.SAMPLE_RATE_HZ))
+        self.detector.fusion = self.fusion
+        return antennas
+
+    def decoded_antennas(self):
+        """Anteny, których epoki daje gnssdec (i które trafiają do cache).
+
+        Pozostałe anteny tylko z CAP_HTTP_PORT - jak w run(); starszy gnssdec dekoduje samą główną.
+        """
+        antennas = [0]
+        if self.FUSE_ANTENNAS and CAP_HTTP_PORT in self.decoder_caps:
+            antennas += [i for i, path in enumerate(self.file_paths) if i > 0 and os.path.exists(path)]
+        return antennas
+
+    def epoch_cache_params(self):
+        return epoch_cache_params(self.gnss_system_flag, self.hold_position, self.gnssdec_path)
+
+    def load_cached_epochs(self):
+        """Bufory epok z cache dla wszystkich dekodowanych anten (antena -> rekordy) albo None.
+
+        Tylko komplet - częściowy cache dałby inne głosowanie anten niż pełne dekodowanie.
+        """
+        if not self.USE_EPOCH_CACHE or self.follow_recording:
+            return None
+        params = self.epoch_cache_params()
+        logs = {}
+        for antenna in self.decoded_antennas():
+            records = load_epoch_log(self.file_paths[antenna], params)
+            if records is None:
+                return None
+            logs[antenna] = records
+        return logs
+
+    def replay_cached_epochs(self, logs):
+        """Epoki z cache tą samą ścieżką co z kolejki (process_batch), anteny scalone po buffcnt."""
+        if len(logs) > 1:
+            self.setup_antenna_fusion()
+
+        def keyed(antenna, records):
+            # Przy równym buffcnt najpierw anteny pomocnicze - główna widzi już ich głos
+            for epoch in iter_epoch_records(records):
+                yield int(epoch.header['buffcnt']), antenna == 0, antenna, epoch
+
+        streams = [keyed(antenna, records) for antenna, records in logs.items()]
+        batch = []
+        for _, _, antenna, epoch in heapq.merge(*streams, key=lambda item: item[:3]):
+            batch.append((antenna, epoch))
+            if len(batch) >= INGEST_BATCH_SIZE:
+                self.process_batch(batch)
+                batch = []
+                if self.stop_requested:
+                    return
+        if batch:
+            self.process_batch(batch)
+
+    def start_epoch_cache_recording(self):
+        self.cache_recorders = {}
+        if not self.USE_EPOCH_CACHE or self.follow_recording:
+            return
+        for antenna in self.decoded_antennas():
+            fd, path = tempfile.mkstemp(prefix='gnssdec-epochs-', suffix='.gnep')
+            os.close(fd)
+            self.cache_recorders[antenna] = EpochRecorder(path)
+
+    def record_cache_epoch(self, antenna, data):
+        recorder = self.cache_recorders.get(antenna)
+        if recorder is None:
+            return
+        try:
+            recorder.write(data)
+        except (OSError, ValueError) as e:
+            print(f"[WORKER] Zapis epok do cache przerwany: {e}")
+            self.discard_cache_recording(antenna)
+
+    def discard_cache_recording(self, antenna):
+        recorder = self.cache_recorders.pop(antenna, None)
+        if recorder:
+            recorder.close()
+            os.remove(recorder.path)
+
+    def store_epoch_cache(self, success):
+        """Po dekodowaniu (kolejka już opróżniona): logi anten do cache, pliki tymczasowe usuwane."""
+        params = self.epoch_cache_params()
+        stored = 0
+        for antenna, recorder in self.cache_recorders.items():
+            recorder.close()
+            if success and recorder.epochs_written:
+                stored += store_epoch_log(self.file_paths[antenna], params, recorder.path)
+            os.remove(recorder.path)
+        if stored:
+            print(f"[WORKER] Epoki zapisane w cache ({stored} ant.).")
+        self.cache_recorders = {}
+
     def shutdown_server(self):
+        for http_server, http_thread, epoch_stream in self.antenna_receivers:
+            if epoch_stream:
+                epoch_stream.stop()
+            http_server.shutdown()
+            http_thread.join()
+            http_server.server_close()
+        self.antenna_receivers = []
+        if self.fusion:
+            print(f"[WORKER] Epoki anten pomocniczych: {[state.epochs for state in self.fusion.states]}")
+        if self.epoch_stream:
+            # Po zakończeniu gnssdec: dociągnięcie epok z bufora gniazda
+            self.epoch_stream.stop()
+            print(f"[WORKER] Strumień epok: {self.epoch_stream.epochs_received} epok.")
+            self.epoch_stream = None
         if self.http_server:
             self.http_server.shutdown() 
             self.http_thread.join() 
             self.http_server = None
+        self.stop_ingest()
 
     def get_current_position_data(self):
+        detector = self.detector
         return {
-            'buffcnt': self.current_buffcnt,
-            'lat': self.current_lat,
-            'lon': self.current_lon,
-            'nsat': self.current_nsat,
-            'jamming': self.jamming_detected
-        }
\ No newline at end of file
+            'buffcnt': detector.current_buffcnt,
+            'lat': detector.current_lat,
+            'lon': detector.current_lon,
+            'nsat': detector.current_nsat,
+            'jamming': detector.jamming_detected
+        }
+
+
+class CalibrationThread(QThread):
+    """Kalibracja progu mocy w tle (mapa mocy z cache, jeśli jest) - okno ustawień pozostaje responsywne."""
+    progress_update = Signal(int)
+    calibration_complete = Signal(dict)
+    calibration_failed = Signal(str)
+
+    def __init__(self, file_path, scan_workers=1):
+        super().__init__()
+        self.file_path = file_path
+        self.scan_workers = scan_workers
+        self.stop_requested = False
+
+    def run(self):
+        def report_progress(processed_bytes, total_bytes):
+            if total_bytes > 0:
+                self.progress_update.emit(int(processed_bytes * 100 / total_bytes))
+
+        try:
+            stats = calibration_stats(
+                self.file_path,
+                workers=self.scan_workers,
+                stop_check=lambda: self.stop_requested,
+                progress_callback=report_progress
+            )
+        except Exception as e:
+            self.calibration_failed.emit(str(e))
+            return
+
+        if self.stop_requested:
+            return
+        if stats is None:
+            self.calibration_failed.emit("Plik jest pusty lub nie zawiera poprawnych danych.")
+        else:
+            self.calibration_complete.emit(stats)
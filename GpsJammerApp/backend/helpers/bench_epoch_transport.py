@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Porównanie przepustowości transportu epok gnssdec -> worker:
+  http   - jak send_json_http: nowe połączenie TCP, POST /data, czekanie na odpowiedź 200
+  stream - jak send_stream: jedno połączenie na gnieździe Unix, rekordy NDJSON bez odpowiedzi
+  binary - ten sam strumień, rekordy binarne (epoch_record.py) dekodowane np.frombuffer
+Klient w Pythonie odtwarza zachowanie sdrout.c; odbiorca HTTP robi to samo co _DataReceiverHandler.
+Odbiorca w każdym trybie liczy średnie SNR i medianę residuów epoki (jak worker).
+Uruchom: python3 bench_epoch_transport.py [liczba_epok] [liczba_satelitów]
+"""
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from app.epoch_stream import EpochStreamServer
+from app.epoch_record import BinaryEpoch, encode_epoch
+
+
+def make_epoch(index, nsat):
+    """Epoka o układzie jak w updateNavStatusWin (sdrout.c)."""
+    observations = [{"prn": prn, "tow": 345600.0 + index * 0.1, "week": 2390, "snr": 42.5,
+                     "doppler": -1234.5, "az": 123.4, "el": 45.6, "residual": 1.2, "innovation": -0.8}
+                    for prn in range(1, nsat + 1)]
+    return {
+        "elapsed_time": index * 0.1, "time": "2025-12-01 11:31:09.542", "filter": "WLS",
+        "acq_sv": list(range(1, nsat + 1)), "tracked": list(range(1, nsat + 1)), "decoded": list(range(1, nsat + 1)),
+        "position": {"nsat": nsat, "lat": 50.0089812, "lon": 19.9828712, "hgt": 230.1, "gdop": 1.52,
+                     "clk_bias": 1.23456e-04, "buffcnt": index * 327680, "hold": False},
+        "observations": observations,
+    }
+
+
+class Counter:
+    def __init__(self, expected):
+        self.count = 0
+        self.expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, data):
+        if isinstance(data, BinaryEpoch):
+            snr, residuals = data.observations['snr'], data.observations['residual']
+        else:
+            observations = data.get('observations', [])
+            snr = np.array([obs['snr'] for obs in observations if 'snr' in obs])
+            residuals = np.array([obs['residual'] for obs in observations if 'residual' in obs])
+        if len(snr):
+            np.mean(snr)
+            np.median(residuals)
+        self.count += 1
+        if self.count >= self.expected:
+            self.done.set()
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    on_epoch = None
+
+    def do_POST(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(content_length)
+        self.on_epoch(json.loads(body.decode('utf-8')))
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            response_body = b'{"status":"ok"}'
+            self.send_header('Content-Length', str(len(response_body)))
+            self.end_headers()
+            self.wfile.write(response_body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_http(records):
+    counter = Counter(len(records))
+    BenchHandler.on_epoch = counter
+    httpd = HTTPServer(('127.0.0.1', 0), BenchHandler)
+    host, port = httpd.server_address
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    start = time.perf_counter()
+    for record in records:
+        sock = socket.create_connection((host, port))
+        sock.sendall(b"POST /data HTTP/1.1\r\nHost: %s:%d\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\nConnection: close\r\n\r\n" % (host.encode(), port, len(record)) + record)
+        sock.recv(256)
+        sock.close()
+    counter.done.wait(30)
+    elapsed = time.perf_counter() - start
+
+    httpd.shutdown()
+    httpd.server_close()
+    return elapsed, counter.count
+
+
+def bench_stream(records, separator=b'\n'):
+    counter = Counter(len(records))
+    server = EpochStreamServer(counter)
+    server.start()
+
+    start = time.perf_counter()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(server.path)
+    for record in records:
+        sock.sendall(record + separator)
+    sock.close()
+    counter.done.wait(30)
+    elapsed = time.perf_counter() - start
+
+    server.stop()
+    return elapsed, counter.count
+
+
+def main():
+    num_epochs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    nsat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    epochs = [make_epoch(i, nsat) for i in range(num_epochs)]
+    records = [json.dumps(epoch, separators=(',', ':')).encode() for epoch in epochs]
+    binary_records = [encode_epoch(epoch) for epoch in epochs]
+    print(f"{num_epochs} epok po {len(records[0])} B JSON / {len(binary_records[0])} B binarnie ({nsat} satelitów)")
+
+    results = {}
+    for name, bench in (('http', lambda: bench_http(records)), ('stream', lambda: bench_stream(records)),
+                        ('binary', lambda: bench_stream(binary_records, b''))):
+        elapsed, received = bench()
+        results[name] = elapsed
+        print(f"  {name:6s}: {received} epok w {elapsed:.3f} s - {received / elapsed:9.0f} epok/s, "
+              f"{elapsed / max(received, 1) * 1e6:7.1f} us/epokę")
+    print(f"Przyspieszenie strumienia: {results['http'] / results['stream']:.1f}x, "
+          f"binarnego: {results['http'] / results['binary']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
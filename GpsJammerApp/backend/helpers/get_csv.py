@@ -3,19 +3,30 @@
 import argparse
 import csv
 import json
+import os
 import signal
 import subprocess
+import sys
 import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
 from typing import Optional
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from app.jamming_detector import JammingDetector
+from app.decoder_caps import CAP_HTTP_PORT, LEGACY_HTTP_PORT, decoder_capabilities
+
+# Port odbiorcy POST /data przekazywany do gnssdec (sdrout.c)
+HTTP_PORT_ENV = "GNSSDEC_HTTP_PORT"
+
 
 class CSVRequestHandler(BaseHTTPRequestHandler):
     writer: Optional[csv.writer] = None
     csv_file = None
     lock = threading.Lock()
     header_written = False
+    # Detektor F2-F4 (bez mapy mocy F1) - kolumna "jamming", gdy podano --detect
+    detector: Optional[JammingDetector] = None
 
     def do_POST(self):
         if self.path != "/data":
@@ -41,8 +52,12 @@ class CSVRequestHandler(BaseHTTPRequestHandler):
         lon = position.get("lon")
 
         with self.lock:
+            row = [elapsed, lat, lon]
+            if self.detector:
+                self.detector.feed(data)
+                row.append(int(self.detector.jamming_detected))
             if self.writer:
-                self.writer.writerow([elapsed, lat, lon])
+                self.writer.writerow(row)
                 if self.csv_file:
                     self.csv_file.flush()
 
@@ -74,6 +89,17 @@ def parse_args():
         action="store_true",
         help="włącza tryb hold pozycji w gnssdec",
     )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=0,
+        help="port odbiorcy HTTP (domyślnie 0 - dowolny wolny port)",
+    )
+    parser.add_argument(
+        "--detect",
+        action="store_true",
+        help="dodaj kolumnę jamming (detektor F2-F4 na epokach) i wypisz zdarzenia",
+    )
     parser.add_argument(
         "--help",
         action="help",
@@ -109,7 +135,15 @@ def main():
         stem = stem[:-4]
     csv_path = input_path.with_name(f"{stem}.csv")
 
-    server = HTTPServer(("127.0.0.1", 1234), CSVRequestHandler)
+    listen_port = args.port
+    if CAP_HTTP_PORT not in decoder_capabilities(str(gnssdec_path)):
+        # starszy gnssdec ignoruje GNSSDEC_HTTP_PORT i wysyła zawsze na stały port
+        if args.port not in (0, LEGACY_HTTP_PORT):
+            print(f"gnssdec nie obsługuje --port, używam {LEGACY_HTTP_PORT}")
+        listen_port = LEGACY_HTTP_PORT
+
+    server = HTTPServer(("127.0.0.1", listen_port), CSVRequestHandler)
+    port = server.server_address[1]
     retcode = 0
 
     with csv_path.open("w", newline="") as csv_file:
@@ -117,7 +151,11 @@ def main():
         CSVRequestHandler.writer = writer
         CSVRequestHandler.header_written = False
         CSVRequestHandler.csv_file = csv_file
-        writer.writerow(["elapsed_time", "lat", "lon"])
+        CSVRequestHandler.detector = JammingDetector() if args.detect else None
+        header = ["elapsed_time", "lat", "lon"]
+        if args.detect:
+            header.append("jamming")
+        writer.writerow(header)
 
         server_thread = threading.Thread(
             target=server.serve_forever, name="HTTPServer", daemon=True
@@ -128,8 +166,9 @@ def main():
         if args.hold:
             cmd.append("-h")
         cmd.append(str(input_path))
+        env = dict(os.environ, **{HTTP_PORT_ENV: str(port)})
         proc = subprocess.Popen(
-            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env
         )
 
         try:
@@ -142,6 +181,12 @@ def main():
             server.server_close()
             server_thread.join()
 
+    if CSVRequestHandler.detector:
+        events = CSVRequestHandler.detector.finish()
+        print(f"Zdarzenia zakłócenia: {len(events)}")
+        for event in events:
+            print(f"  {event['start_time']:.2f}s - {event['end_time']:.2f}s ({event['duration']:.2f}s)")
+
     if retcode != 0:
         raise SystemExit(retcode)
 
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Odtwarzanie zapisanego strumienia epok gnssdec w detektorze (bez ponownego dekodowania).
+Log zapisuje worker, gdy ustawiona jest zmienna GPS_JAMMER_EPOCH_LOG=<plik.ndjson|plik.gnep>.
+Uruchom: python3 replay_epochs.py <log> [--recording plik.bin] [--speed N] [--set PROG=wartość ...]
+  --recording  nagranie I/Q - mapa mocy F1 (z cache) i długość pliku do postępu
+  --speed      N-krotność tempa nagrania (domyślnie najszybciej jak się da)
+  --set        nadpisanie progu detektora (JammingDetector), np. --set THRESHOLD_CN0_DROP_DB=6
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from app.worker import GPSAnalysisThread
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Detektor na zapisanym logu epok gnssdec")
+    parser.add_argument("log", help="log epok (.ndjson/.jsonl albo binarny)")
+    parser.add_argument("--recording", help="nagranie I/Q (uint8) dla F1")
+    parser.add_argument("--speed", type=float, default=None, help="N-krotność tempa nagrania")
+    parser.add_argument("--set", action="append", default=[], metavar="PROG=WARTOŚĆ",
+                        help="nadpisanie progu detektora")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    worker = GPSAnalysisThread([args.recording] if args.recording else [])
+    for assignment in args.set:
+        name, _, value = assignment.partition('=')
+        if not hasattr(worker.detector, name):
+            raise SystemExit(f"Nieznany próg: {name}")
+        setattr(worker.detector, name, type(getattr(worker.detector, name))(value))
+    if args.recording:
+        worker.precalculate_power_profile()
+
+    start = time.perf_counter()
+    events = worker.replay_epoch_log(args.log, speed=args.speed)
+    elapsed = time.perf_counter() - start
+
+    print(f"Odtworzono log {os.path.basename(args.log)} w {elapsed * 1000:.1f} ms")
+    if not events:
+        print("Brak zdarzeń zakłócenia.")
+    for i, event in enumerate(events, 1):
+        print(f"  #{i}: {event['start_time']:.2f}s - {event['end_time']:.2f}s ({event['duration']:.2f}s), "
+              f"próbki {event['start_sample']}-{event['end_sample']}")
+
+
+if __name__ == '__main__':
+    main()
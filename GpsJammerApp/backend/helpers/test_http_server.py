@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 """
 Prosty serwer HTTP do odbierania danych JSON z gnssdec
-Uruchom: python3 test_http_server.py
+Uruchom: python3 test_http_server.py [port]
+Port inny niż domyślny 1234 przekaż dekoderowi: GNSSDEC_HTTP_PORT=<port> gnssdec ...
 """
 
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import json
 import datetime
 import os
+import sys
 
 # Plik do zapisu danych
 LOG_FILE = "nowy.txt"
@@ -59,9 +61,10 @@ class JSONHandler(BaseHTTPRequestHandler):
         pass
 
 if __name__ == '__main__':
-    server_address = ('127.0.0.1', 1234)
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1234
+    server_address = ('127.0.0.1', port)
     httpd = HTTPServer(server_address, JSONHandler)
-    print(f"Serwer HTTP nasłuchuje na http://127.0.0.1:1234")
+    print(f"Serwer HTTP nasłuchuje na http://127.0.0.1:{httpd.server_address[1]}")
     print(f"Dane będą zapisywane do pliku: {LOG_FILE}")
     print("Czekam na dane z gnssdec...\n")
     try:
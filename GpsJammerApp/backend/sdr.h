@@ -36,6 +36,9 @@ extern "C" {
 #endif
 
 extern int hold_enabled;
+extern int follow_enabled;
+extern uint64_t segment_start;
+extern int64_t segment_bytes;
 
 #define ROUND(x) ((int)floor((x) + 0.5))
 #define PI 3.1415926535897932
@@ -55,6 +58,8 @@ extern int hold_enabled;
 #define DTYPEIQ 2
 #define MEMBUFFLEN 5000
 #define FILE_BUFFSIZE 16384
+#define FOLLOW_POLL_MS 50
+#define FOLLOW_IDLE_TIMEOUT_MS 3000
 #define NFFTTHREAD 4
 #define ACQINTG_L1CA 10
 #define ACQINTG_G1 10
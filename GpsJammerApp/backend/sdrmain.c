@@ -19,6 +19,14 @@ sdrch_t sdrch[MAXSAT] = {{0}};
 sdrekf_t sdrekf = {0};
 sdrgui_t sdrgui = {0};
 int hold_enabled = 0;
+int follow_enabled = 0;
+/* -S/-N: dekodowanie fragmentu pliku (bajt początkowy, liczba bajtów; -1 - do końca) */
+uint64_t segment_start = 0;
+int64_t segment_bytes = -1;
+
+/* Możliwości tej wersji (-V) - worker sprawdza je, zanim użyje zmiennych środowiskowych
+ * i opcji spoza pierwotnego zestawu -g/-a/-l/-h (starsza binarka odrzuca -V i wypisuje użycie) */
+#define GNSSDEC_CAPS "http-port stream binary follow segment"
 
 int main(int argc, char **argv) {
     int sys_type = SYS_GPS;  /* default to GPS */
@@ -26,15 +34,19 @@ int main(int argc, char **argv) {
     int opt;
 
     if (argc < 2) {
-        printf("Użycie: %s [-g|-a|-l|-h] <plik_do_analizy>\n", argv[0]);
+        printf("Użycie: %s [-g|-a|-l|-h|-f|-V] [-S bajt] [-N bajty] <plik_do_analizy>\n", argv[0]);
         printf("  -g    tryb GPS (domyślny)\n");
         printf("  -a    tryb Galileo\n");
         printf("  -l    tryb GLONASS\n");
         printf("  -h    włącza system hold pozycji\n");
+        printf("  -f    śledzi rosnący plik (nagrywanie w toku)\n");
+        printf("  -S B  zaczyna od bajtu B pliku\n");
+        printf("  -N B  dekoduje tylko B bajtów\n");
+        printf("  -V    wypisuje możliwości (CAPS|...) i kończy\n");
         return 1;
     }
 
-    while ((opt = getopt(argc, argv, "galh")) != -1) {
+    while ((opt = getopt(argc, argv, "galhfVS:N:")) != -1) {
         switch (opt) {
         case 'g':
             sys_type = SYS_GPS;
@@ -48,20 +60,35 @@ int main(int argc, char **argv) {
         case 'h':
             hold_enabled = 1;
             break;
+        case 'f':
+            follow_enabled = 1;
+            break;
+        case 'V':
+            printf("CAPS|%s\n", GNSSDEC_CAPS);
+            return 0;
+        case 'S':
+            segment_start = strtoull(optarg, NULL, 10);
+            break;
+        case 'N':
+            segment_bytes = strtoll(optarg, NULL, 10);
+            break;
         default:
-            printf("Użycie: %s [-g|-a|-l|-h] <plik_do_analizy>\n", argv[0]);
+            printf("Użycie: %s [-g|-a|-l|-h|-f|-V] [-S bajt] [-N bajty] <plik_do_analizy>\n", argv[0]);
             return 1;
         }
     }
 
     if (optind >= argc) {
         printf("Błąd: brak nazwy pliku\n");
-        printf("Użycie: %s [-g|-a|-l|-h] <plik_do_analizy>\n", argv[0]);
+        printf("Użycie: %s [-g|-a|-l|-h|-f|-V] [-S bajt] [-N bajty] <plik_do_analizy>\n", argv[0]);
         return 1;
     }
 
     input_file = argv[optind];
 
+    /* Linie statusu (ETIME|, ACQSV|, LLA|...) czytane na bieżąco przez worker - bez buforowania blokami w potoku */
+    setvbuf(stdout, NULL, _IOLBF, 0);
+
     if (loadinit(&sdrini, input_file, sys_type) < 0) {
         return -1;
     }
@@ -1,14 +1,83 @@
 #include "sdr.h"
 #include <arpa/inet.h>
+#include <errno.h>
 #include <netinet/in.h>
 #include <sys/socket.h>
+#include <sys/uio.h>
+#include <sys/un.h>
 #include <unistd.h>
 
 #define HTTP_HOST "127.0.0.1"
 #define HTTP_PORT 1234
+/* Port odbiorcy POST /data (worker wybiera wolny port); bez zmiennej - HTTP_PORT */
+#define HTTP_PORT_ENV "GNSSDEC_HTTP_PORT"
+/* Ścieżka gniazda Unix strumienia epok (ustawiana przez worker Pythona) */
+#define STREAM_SOCKET_ENV "GNSSDEC_STREAM_SOCKET"
+/* Format strumienia: "json" (domyślnie) albo "binary" (rekord epoch_header_t + obserwacje) */
+#define STREAM_FORMAT_ENV "GNSSDEC_STREAM_FORMAT"
+
+/* Binarny rekord epoki (little-endian, bez wyrównania):
+ * nagłówek, nobs obserwacji, potem listy PRN (int16): acq_sv, tracked, decoded.
+ * Układ musi zgadzać się z GpsJammerApp/app/epoch_record.py. */
+#define EPOCH_MAGIC "GNEP"
+#define EPOCH_VERSION 1
+
+typedef struct __attribute__((packed)) {
+    char magic[4];
+    uint16_t version;
+    uint16_t header_size;
+    uint32_t record_size;
+    uint16_t nobs;
+    uint16_t obs_size;
+    uint16_t n_acq;
+    uint16_t n_tracked;
+    uint16_t n_decoded;
+    uint8_t filter; /* 0 - WLS, 1 - EKF */
+    uint8_t hold;
+    int32_t nsat;
+    uint32_t reserved;
+    double elapsed_time;
+    double lat;
+    double lon;
+    double hgt;
+    double gdop;
+    double clk_bias;
+    uint64_t buffcnt;
+    char time[24];
+} epoch_header_t;
+
+typedef struct __attribute__((packed)) {
+    int32_t prn;
+    int32_t week;
+    double tow;
+    double snr;
+    double doppler;
+    double az;
+    double el;
+    double residual;
+    double innovation;
+} epoch_obs_t;
+
+_Static_assert(sizeof(epoch_header_t) == 112, "epoch_header_t: zły rozmiar");
+_Static_assert(sizeof(epoch_obs_t) == 64, "epoch_obs_t: zły rozmiar");
+
+/* Trwałe połączenie strumienia epok (-1: brak) */
+static int stream_sock = -1;
+
+/* Port z HTTP_PORT_ENV (odczytany raz), inaczej domyślny HTTP_PORT */
+static int http_port(void) {
+    static int port = 0;
+    if (port == 0) {
+        const char *env = getenv(HTTP_PORT_ENV);
+        long value = env ? strtol(env, NULL, 10) : 0;
+        port = (value > 0 && value < 65536) ? (int)value : HTTP_PORT;
+    }
+    return port;
+}
 
 static int send_json_http(const char *json_data) {
     int sock;
+    int port = http_port();
     struct sockaddr_in server;
     char request[8192];
     int json_len = strlen(json_data);
@@ -25,7 +94,7 @@ static int send_json_http(const char *json_data) {
     setsockopt(sock, SOL_SOCKET, SO_SNDTIMEO, &timeout, sizeof(timeout));
 
     server.sin_family = AF_INET;
-    server.sin_port = htons(HTTP_PORT);
+    server.sin_port = htons(port);
     server.sin_addr.s_addr = inet_addr(HTTP_HOST);
 
     if (connect(sock, (struct sockaddr *)&server, sizeof(server)) < 0) {
@@ -41,7 +110,7 @@ static int send_json_http(const char *json_data) {
              "Connection: close\r\n"
              "\r\n"
              "%s",
-             HTTP_HOST, HTTP_PORT, json_len, json_data);
+             HTTP_HOST, port, json_len, json_data);
 
     if (send(sock, request, strlen(request), 0) < 0) {
         close(sock);
@@ -56,6 +125,100 @@ static int send_json_http(const char *json_data) {
     return 0;
 }
 
+/* Strumień epok: jedno połączenie na gnieździe Unix, rekordy bez nagłówków HTTP
+ * i bez czekania na odpowiedź. Wysyła data1 i data2 (może być puste) jednym wywołaniem.
+ * Zwraca -1, gdy strumień jest niedostępny (brak zmiennej środowiskowej / odbiorcy). */
+static int send_stream(const void *data1, size_t len1, const void *data2, size_t len2) {
+    const char *path = getenv(STREAM_SOCKET_ENV);
+    if (path == NULL || path[0] == '\0') {
+        return -1;
+    }
+
+    if (stream_sock < 0) {
+        struct sockaddr_un server;
+        if (strlen(path) >= sizeof(server.sun_path)) {
+            return -1;
+        }
+        int sock = socket(AF_UNIX, SOCK_STREAM, 0);
+        if (sock == -1) {
+            return -1;
+        }
+
+        struct timeval timeout;
+        timeout.tv_sec = 1;
+        timeout.tv_usec = 0;
+        setsockopt(sock, SOL_SOCKET, SO_SNDTIMEO, &timeout, sizeof(timeout));
+
+        memset(&server, 0, sizeof(server));
+        server.sun_family = AF_UNIX;
+        strcpy(server.sun_path, path);
+        if (connect(sock, (struct sockaddr *)&server, sizeof(server)) < 0) {
+            close(sock);
+            return -1;
+        }
+        stream_sock = sock;
+    }
+
+    // Oba fragmenty jednym wywołaniem (MSG_NOSIGNAL - bez SIGPIPE po zamknięciu odbiorcy)
+    struct iovec iov[2];
+    iov[0].iov_base = (void *)data1;
+    iov[0].iov_len = len1;
+    iov[1].iov_base = (void *)data2;
+    iov[1].iov_len = len2;
+
+    struct msghdr msg;
+    memset(&msg, 0, sizeof(msg));
+    msg.msg_iov = iov;
+    msg.msg_iovlen = len2 > 0 ? 2 : 1;
+
+    while (msg.msg_iovlen > 0) {
+        ssize_t sent = sendmsg(stream_sock, &msg, MSG_NOSIGNAL);
+        if (sent < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
+            close(stream_sock);
+            stream_sock = -1;
+            return -1;
+        }
+        // Niepełny zapis: przesunięcie po wysłanych bajtach
+        while (msg.msg_iovlen > 0 && (size_t)sent >= msg.msg_iov[0].iov_len) {
+            sent -= msg.msg_iov[0].iov_len;
+            msg.msg_iov++;
+            msg.msg_iovlen--;
+        }
+        if (msg.msg_iovlen > 0) {
+            msg.msg_iov[0].iov_base = (char *)msg.msg_iov[0].iov_base + sent;
+            msg.msg_iov[0].iov_len -= sent;
+        }
+    }
+    return 0;
+}
+
+static int stream_binary_enabled(void) {
+    const char *format = getenv(STREAM_FORMAT_ENV);
+    return format != NULL && strcmp(format, "binary") == 0;
+}
+
+/* Epoka JSON: strumień (rekord + '\n'), a gdy niedostępny - POST /data */
+static void send_epoch_json(const char *json_data) {
+    if (send_stream(json_data, strlen(json_data), "\n", 1) == 0) {
+        return;
+    }
+    send_json_http(json_data);
+}
+
+/* Dopisuje do listy PRN kanały z ustawioną flagą; zwraca liczbę dopisanych */
+static uint16_t append_prn_list(int16_t *list, const int *prn, const int *flag, int used_ch) {
+    uint16_t n = 0;
+    for (int i = 0; i < used_ch; i++) {
+        if (flag[i] == 1) {
+            list[n++] = (int16_t)prn[i];
+        }
+    }
+    return n;
+}
+
 void init_sdrgui_messages() {
     for (int i = 0; i < MAX_MESSAGES; i++) {
         sdrgui.messages[i] = NULL;
@@ -101,6 +264,9 @@ extern void updateNavStatusWin(int counter) {
     char str1[10];
     char json_buffer[16384];
     int json_pos = 0;
+    char time_str[24];
+    static unsigned char epoch_record[sizeof(epoch_header_t) + MAXSAT * sizeof(epoch_obs_t) +
+                                      3 * MAXSAT * sizeof(int16_t)];
 
     mlock(hobsvecmtx);
     int used_ch = sdrini.nch < MAXSAT ? sdrini.nch : MAXSAT;
@@ -209,6 +375,7 @@ extern void updateNavStatusWin(int counter) {
             utc_tm.tm_year + 1900, utc_tm.tm_mon + 1, utc_tm.tm_mday,
             utc_tm.tm_hour, utc_tm.tm_min, utc_tm.tm_sec,
             (int)(gps_tow * 1000) % 1000);
+    snprintf(time_str, sizeof(time_str), "%s", bufferNav);
 
     json_pos = 0;
     JSON_APPEND("{");
@@ -328,7 +495,57 @@ extern void updateNavStatusWin(int counter) {
         json_buffer[sizeof(json_buffer) - 1] = '\0';
     }
 
-    send_json_http(json_buffer);
+    if (stream_binary_enabled()) {
+        epoch_header_t header;
+        memset(&header, 0, sizeof(header));
+        memcpy(header.magic, EPOCH_MAGIC, 4);
+        header.version = EPOCH_VERSION;
+        header.header_size = sizeof(epoch_header_t);
+        header.obs_size = sizeof(epoch_obs_t);
+        header.filter = sdrini.ekfFilterOn ? 1 : 0;
+        header.hold = hold_applied ? 1 : 0;
+        header.nsat = nsat;
+        header.elapsed_time = sdrstat.elapsedTime;
+        header.lat = lat;
+        header.lon = lon;
+        header.hgt = hgt;
+        header.gdop = gdop;
+        header.clk_bias = clkBias / CTIME;
+        header.buffcnt = (uint64_t)sdrstat.buffcnt * FILE_BUFFSIZE;
+        memcpy(header.time, time_str, sizeof(header.time));
+
+        epoch_obs_t *obs = (epoch_obs_t *)(epoch_record + sizeof(epoch_header_t));
+        for (int i = 0; i < nsat && header.nobs < MAXSAT; i++) {
+            int prn_val = sdrstat.obsValidList[i];
+            if (prn_val < 1 || prn_val > MAXSAT) {
+                continue;
+            }
+            const double *o = &obs_v[(prn_val - 1) * 11];
+            epoch_obs_t *dst = &obs[header.nobs++];
+            dst->prn = (int32_t)o[0];
+            dst->tow = o[6];
+            dst->week = (int32_t)o[7];
+            dst->snr = o[8];
+            dst->doppler = o[5];
+            dst->az = o[9];
+            dst->el = o[10];
+            dst->residual = rk1_v[prn_val - 1];
+            dst->innovation = vk1_v[prn_val - 1];
+        }
+
+        int16_t *lists = (int16_t *)(obs + header.nobs);
+        header.n_acq = append_prn_list(lists, prn, flagacq, used_ch);
+        header.n_tracked = append_prn_list(lists + header.n_acq, prn, flagsync, used_ch);
+        header.n_decoded = append_prn_list(lists + header.n_acq + header.n_tracked, prn, flagdec, used_ch);
+        header.record_size = sizeof(epoch_header_t) + header.nobs * sizeof(epoch_obs_t) +
+                             (header.n_acq + header.n_tracked + header.n_decoded) * sizeof(int16_t);
+        memcpy(epoch_record, &header, sizeof(header));
+
+        if (send_stream(epoch_record, header.record_size, NULL, 0) == 0) {
+            return;
+        }
+    }
+    send_epoch_json(json_buffer);
 
 #undef JSON_APPEND
 }
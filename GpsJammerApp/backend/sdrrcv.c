@@ -9,6 +9,10 @@ extern int rcvinit(sdrini_t *ini) {
         SDRPRINTF("error: failed to open file: %s\n", ini->file);
         return -1;
     }
+    if (segment_start > 0 && fseeko(ini->fp, (off_t)segment_start, SEEK_SET) != 0) {
+        SDRPRINTF("error: failed to seek to byte %llu\n", (unsigned long long)segment_start);
+        return -1;
+    }
 
     sdrstat.fendbuffsize = FILE_BUFFSIZE;
     sdrstat.buffsize = 2 * FILE_BUFFSIZE * MEMBUFFLEN;
@@ -58,20 +62,42 @@ extern int rcvgetbuff(sdrini_t *ini, uint64_t buffloc, int n, int ftype,
     return 0;
 }
 
+/* tryb -f: czas bez przyrostu pliku, po którym uznajemy nagrywanie za zakończone */
+static int follow_idle_ms = 0;
+
 extern void file_pushtomembuf(void) {
     size_t nread = 0;
+    size_t nwant = sdrini.dtype[0] * FILE_BUFFSIZE;
+    uint64_t consumed = (uint64_t)sdrstat.buffcnt * nwant;
+
+    /* -N: koniec fragmentu jak koniec pliku (niepełny ostatni bufor kończy dekodowanie) */
+    if (segment_bytes >= 0 && consumed + nwant > (uint64_t)segment_bytes) {
+        sdrstat.stopflag = ON;
+        SDRPRINTF("end of segment!\n");
+        return;
+    }
 
     mlock(hbuffmtx);
     if (sdrini.fp != NULL) {
         nread = fread(&sdrstat.buff[(sdrstat.buffcnt % MEMBUFFLEN) *
                                     sdrini.dtype[0] * FILE_BUFFSIZE],
-                      1, sdrini.dtype[0] * FILE_BUFFSIZE, sdrini.fp);
+                      1, nwant, sdrini.fp);
     }
     unmlock(hbuffmtx);
 
     if ((sdrini.fp != NULL && (int)nread < sdrini.dtype[0] * FILE_BUFFSIZE)) {
+        if (follow_enabled && follow_idle_ms < FOLLOW_IDLE_TIMEOUT_MS) {
+            /* plik wciąż nagrywany - cofamy niepełny odczyt i czekamy na dane */
+            fseek(sdrini.fp, -(long)nread, SEEK_CUR);
+            clearerr(sdrini.fp);
+            sleepms(FOLLOW_POLL_MS);
+            follow_idle_ms += FOLLOW_POLL_MS;
+            return;
+        }
         sdrstat.stopflag = ON;
         SDRPRINTF("end of file!\n");
+    } else {
+        follow_idle_ms = 0;
     }
 
     mlock(hreadmtx);
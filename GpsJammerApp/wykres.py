@@ -4,55 +4,37 @@ import os
 import sys
 import argparse
 
+from app.power_scan import load_or_scan_pyramid
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skrypty'))
+from iq_io import IQFile
+
 # ==========================================================================
 # SZYBKA KONFIGURACJA
 DEFAULT_FILE_PATH = "" 
 # ==========================================================================
 
-def read_chunk(f, chunk_size, dtype_enum):
-    """Czyta i konwertuje dane w zależności od formatu."""
-    
-    # Określenie parametrów na podstawie typu
-    if dtype_enum == 'int16':
-        # Standard I16 (BladeRF, USRP, gnss-sdr)
-        # 2 bajty na składową, 4 bajty na sampel
-        bytes_per_sample = 4 
-        np_dtype = np.int16
-    elif dtype_enum == 'int8':
-        # Signed 8-bit (HackRF)
-        # 1 bajt na składową, 2 bajty na sampel
-        bytes_per_sample = 2
-        np_dtype = np.int8
-    elif dtype_enum == 'uint8':
-        # Unsigned 8-bit (RTL-SDR)
-        # 1 bajt na składową, 2 bajty na sampel
-        # Wymaga przesunięcia o -127.5
-        bytes_per_sample = 2
-        np_dtype = np.uint8
-    else:
-        raise ValueError("Nieznany format danych")
+# Liczba punktów wykresu (zapytanie do piramidy zależy od niej, nie od długości pliku)
+PLOT_POINTS = 4000
 
-    chunk_bytes = chunk_size * bytes_per_sample
-    raw_data = f.read(chunk_bytes)
-    
-    if not raw_data:
-        return None, None
-        
-    samples = np.frombuffer(raw_data, dtype=np_dtype).astype(np.float32)
-    
-    # Obsługa RTL-SDR (uint8 -> przesunięcie zera)
-    if dtype_enum == 'uint8':
-        samples -= 127.5
-        
-    # Rozdzielenie I / Q
-    i_data = samples[0::2]
-    q_data = samples[1::2]
-    
-    # Wyrównanie długości
-    min_len = min(len(i_data), len(q_data))
-    return i_data[:min_len], q_data[:min_len]
+def pyramid_power_series(file_path, sampling_rate, start_s=None, end_s=None):
+    """Moc uint8 z piramidy mocy (cache): czas środka binu, średnia, min, max.
 
-def plot_iq_power(file_path, sampling_rate=2048000, chunk_size=20480, dtype_name='int16'):
+    Po analizie w GUI piramida jest już w cache; bez niej liczony jest tylko skan mocy
+    (bez statystyk szczytowych i magazynu cech).
+    """
+    pyramid = load_or_scan_pyramid(file_path)
+    if pyramid is None:
+        return None
+    start_sample = int((start_s or 0) * sampling_rate)
+    end_sample = int(end_s * sampling_rate) if end_s is not None else None
+    data = pyramid.query(start_sample, end_sample, max_points=PLOT_POINTS)
+    centers = data['start_sample'] + (np.arange(len(data['mean'])) + 0.5) * data['bin_samples']
+    print(f"Piramida mocy: {len(data['mean'])} punktów po {data['bin_samples']} próbek")
+    return (centers / sampling_rate, data['mean'].astype(np.float64) + 1e-10,
+            data['min'].astype(np.float64) + 1e-10, data['max'].astype(np.float64) + 1e-10)
+
+def plot_iq_power(file_path, sampling_rate=2048000, chunk_size=20480, dtype_name='int16', start_s=None, end_s=None):
     
     if not os.path.exists(file_path):
         print(f"Błąd: Plik '{file_path}' nie istnieje.")
@@ -66,34 +48,39 @@ def plot_iq_power(file_path, sampling_rate=2048000, chunk_size=20480, dtype_name
     power_values = []
     time_values = []
     processed_samples = 0
+    envelope = None
     
     try:
-        with open(file_path, 'rb') as f:
-            while True:
-                i_data, q_data = read_chunk(f, chunk_size, dtype_name)
-                
-                if i_data is None:
-                    break
-                
-                if len(i_data) == 0:
-                    break
-
+        series = None
+        if dtype_name == 'uint8':
+            # RTL-SDR: bez ponownego czytania pliku - gotowa piramida min/max/średnia
+            series = pyramid_power_series(file_path, sampling_rate, start_s, end_s)
+        if series is not None:
+            time_values, power_values, env_min, env_max = series
+            envelope = (env_min, env_max)
+        else:
+            # int16 / int8 (oraz uint8 bez piramidy): okna complex64 przez mmap, bez przesunięcia skali
+            reader = IQFile(file_path, dtype_name, sampling_rate)
+            start_sample = int((start_s or 0) * sampling_rate)
+            stop_sample = int(end_s * sampling_rate) if end_s is not None else None
+            processed_samples = start_sample
+            for _, iq in reader.iter_chunks(chunk_size, start_sample, stop_sample, normalize=False):
                 # Obliczanie mocy: P = I^2 + Q^2
-                instant_power = i_data**2 + q_data**2 + 1e-10
+                instant_power = iq.real**2 + iq.imag**2 + 1e-10
                 avg_power = np.mean(instant_power)
-                
+
                 power_values.append(avg_power)
-                
-                current_time = (processed_samples + (len(i_data) / 2)) / sampling_rate
+
+                current_time = (processed_samples + (len(iq) / 2)) / sampling_rate
                 time_values.append(current_time)
-                processed_samples += len(i_data)
-                
+                processed_samples += len(iq)
+
                 if len(power_values) % 200 == 0:
                     print(f"\rPrzetworzono: {current_time:.2f}s...", end="")
 
         print("\nGenerowanie wykresu...")
         
-        if not power_values:
+        if len(power_values) == 0:
             print("Błąd: Brak danych do wyświetlenia.")
             return
 
@@ -108,6 +95,10 @@ def plot_iq_power(file_path, sampling_rate=2048000, chunk_size=20480, dtype_name
         y_db = 10 * np.log10(y_raw / baseline)
         
         plt.figure(figsize=(14, 7))
+        if envelope is not None:
+            # Zakres min-max próbek w każdym binie piramidy
+            plt.fill_between(x_time, 10 * np.log10(envelope[0] / baseline), 10 * np.log10(envelope[1] / baseline),
+                             color='#007acc', alpha=0.15, linewidth=0, label='Min / max w binie')
         plt.plot(x_time, y_db, label='Moc (dB)', color='#007acc', linewidth=1)
         
         # Linie progowe
@@ -139,6 +130,8 @@ if __name__ == "__main__":
     # Dodano wybór formatu danych
     parser.add_argument('--dtype', type=str, default='uint8', choices=['int16', 'int8', 'uint8'], 
                         help='Format danych: int16 (domyślny), int8 (HackRF), uint8 (RTL-SDR)')
+    parser.add_argument('--start', type=float, default=None, help='Początek zakresu [s] (uint8: z piramidy mocy)')
+    parser.add_argument('--end', type=float, default=None, help='Koniec zakresu [s] (uint8: z piramidy mocy)')
     
     args = parser.parse_args()
     target_file = args.file or DEFAULT_FILE_PATH
@@ -156,6 +149,7 @@ if __name__ == "__main__":
             
     if target_file:
         chunk_s = int(args.rate * 0.01) 
-        plot_iq_power(target_file, sampling_rate=args.rate, chunk_size=chunk_s, dtype_name=args.dtype)
+        plot_iq_power(target_file, sampling_rate=args.rate, chunk_size=chunk_s, dtype_name=args.dtype,
+                      start_s=args.start, end_s=args.end)
     else:
         print("Nie podano pliku.")
\ No newline at end of file
@@ -1,30 +1,23 @@
 import numpy as np
 import os
 
+from iq_io import IQFile
+from recording_features import amplitude_after_threshold
+
 def read_iq_data(filename):
     """
-    Reads IQ data from a binary file.
+    Opens IQ data from a binary file.
     This version is specifically for uint8 formatted data.
+    Samples are memory-mapped and converted to complex64 window by window.
     """
     try:
-        # Read the raw bytes from the file as unsigned 8-bit integers.
-        with open(filename, 'rb') as f:
-            raw_data = np.fromfile(f, dtype=np.uint8)
+        reader = IQFile(filename, 'uint8')
 
-        if raw_data.size == 0:
+        if reader.num_samples == 0:
             print(f"Warning: The file '{filename}' is empty.")
             return None
 
-        # Convert uint8 data [0, 255] to a normalized float format [-1.0, 1.0]
-        float_data = (raw_data.astype(np.float32) - 127.5) / 127.5
-
-        # De-interleave the data into I and Q components
-        i_samples = float_data[0::2]
-        q_samples = float_data[1::2]
-
-        # Combine into complex numbers (I + jQ)
-        complex_data = i_samples + 1j * q_samples
-        return complex_data
+        return reader
     except FileNotFoundError:
         print(f"Error: The file '{filename}' was not found.")
         print("Please make sure your data file is in the same directory as the script.")
@@ -56,26 +49,24 @@ def main():
     print(f"--- Attempting to load IQ data from '{iq_filename}' (assuming uint8 format) ---")
 
     # --- 2. Read and Prepare Data ---
-    iq_samples = read_iq_data(iq_filename)
-    if iq_samples is None:
+    iq_reader = read_iq_data(iq_filename)
+    if iq_reader is None:
         return
 
-    print(f"Successfully loaded and processed {len(iq_samples)} IQ samples.")
+    print(f"Successfully opened {iq_reader.num_samples} IQ samples.")
 
     # --- 3. Signal Change Detection ---
-    amplitude = np.abs(iq_samples)
-
     # Define a threshold for detecting the signal.
     # You will need to carefully tune this value. It should be just above your noise floor.
     signal_threshold = 0.1 # This is a starting guess, adjust as needed.
 
-    turn_on_index = find_change_point(amplitude, signal_threshold)
+    # Full chunks come from the shared feature store; only chunks around the threshold are read.
+    turn_on_index, avg_amplitude = amplitude_after_threshold(iq_filename, signal_threshold)
 
     if turn_on_index is not None:
         print(f"\nSignal change detected at sample index: {turn_on_index}")
 
         # --- 4. Distance Estimation ---
-        avg_amplitude = np.mean(amplitude[turn_on_index:])
         print(f"Average signal amplitude after turn-on: {avg_amplitude:.4f}")
 
         # This calculation is a rough, uncalibrated estimate based on the normalized amplitude.
@@ -112,10 +103,11 @@ def main():
 
     else:
         print(f"\nSignal did not cross the threshold of {signal_threshold}. No change detected.")
-        if len(amplitude) > 0:
-            print(f"Max amplitude detected in file was: {np.max(amplitude):.4f}")
+        if iq_reader.num_samples > 0:
+            max_amplitude = max(float(np.max(np.abs(chunk))) for _, chunk in iq_reader.iter_chunks())
+            print(f"Max amplitude detected in file was: {max_amplitude:.4f}")
             print("You may need to adjust the 'signal_threshold' value.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
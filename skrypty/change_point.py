@@ -0,0 +1,198 @@
+import numpy as np
+
+# Zgrubny etap: moc w binach (średnia |IQ|² z BIN_SAMPLES próbek) w dB
+DEFAULT_BIN_SAMPLES = 4096
+# Dokładny etap: okno wokół zgrubnego przejścia (w binach po każdej stronie)
+REFINE_MARGIN_BINS = 2
+
+
+def _lindley(z, s0):
+    """S_n = max(0, S_{n-1} + z_n) dla całego bloku naraz (postać zamknięta rekurencji Lindleya).
+
+    Zwraca (S, maska S_n == 0).
+    """
+    c = s0 + np.cumsum(z)
+    floor = np.minimum(np.minimum.accumulate(c), 0.0)
+    s = c - floor
+    return s, s <= 0.0
+
+
+class CusumDetector:
+    """Strumieniowy, dwustronny CUSUM na mocy binów [dB].
+
+    Poziom odniesienia to środek między tłem (baseline_db) a tłem + shift_db:
+    statystyka górna szuka wzrostu, dolna (w trakcie zakłócenia) powrotu do tła.
+    Przejście zgłaszane jest, gdy statystyka przekroczy threshold_db; jako moment
+    zmiany podawany jest bin po ostatnim zerze statystyki (estymator CUSUM).
+    Bloki liczone są wektorowo, pętla tylko po wykrytych przejściach.
+    """
+
+    def __init__(self, shift_db=6.0, threshold_db=None, baseline_db=None, warmup_bins=64):
+        self.shift_db = shift_db
+        self.threshold_db = 2.0 * shift_db if threshold_db is None else threshold_db
+        self.baseline_db = baseline_db
+        self.warmup_bins = warmup_bins
+
+        self.bins_seen = 0
+        self.active = False         # trwa zakłócenie
+        self.statistic = 0.0
+        self.last_zero = 0          # indeks binu, od którego liczona jest statystyka
+        self.transitions = []       # ('start' / 'end', bin)
+        self._pending = []
+
+    @property
+    def reference_db(self):
+        return self.baseline_db + self.shift_db / 2.0
+
+    def update(self, bin_db):
+        """Dodaje moce kolejnych binów [dB]. Zwraca nowe przejścia: ('start', bin) / ('end', bin)."""
+        bin_db = np.asarray(bin_db, dtype=np.float64)
+        if self.baseline_db is None:
+            # Tło z pierwszych binów (mediana) - jak rozgrzewka StreamingPowerDetector
+            self._pending.append(bin_db)
+            if sum(len(b) for b in self._pending) < self.warmup_bins:
+                return []
+            bin_db = self._start_from_warmup()
+
+        changes = []
+        first = self.bins_seen
+        pos = 0
+        while pos < len(bin_db):
+            z = bin_db[pos:] - self.reference_db
+            if self.active:
+                z = -z
+            s, zeros = _lindley(z, self.statistic)
+            crossed = np.flatnonzero(s > self.threshold_db)
+            end = int(crossed[0]) + 1 if len(crossed) else len(z)
+
+            zero_idx = np.flatnonzero(zeros[:end])
+            if len(zero_idx):
+                self.last_zero = first + pos + int(zero_idx[-1]) + 1
+            if not len(crossed):
+                self.statistic = float(s[-1])
+                break
+
+            kind = 'end' if self.active else 'start'
+            self.transitions.append((kind, self.last_zero))
+            changes.append((kind, self.last_zero))
+            self.active = not self.active
+            self.statistic = 0.0
+            pos += end
+            self.last_zero = first + pos
+        self.bins_seen += len(bin_db)
+        return changes
+
+    def flush(self):
+        """Koniec danych: zamyka trwające zakłócenie na ostatnim binie."""
+        changes = []
+        if self._pending:
+            changes.extend(self._flush_warmup())
+        if self.active:
+            self.active = False
+            self.transitions.append(('end', self.bins_seen))
+            changes.append(('end', self.bins_seen))
+        return changes
+
+    def _start_from_warmup(self):
+        # Tło tylko z pierwszych warmup_bins binów (początek nagrania bez zakłócenia)
+        bin_db = np.concatenate(self._pending)
+        self._pending = []
+        self.baseline_db = float(np.median(bin_db[:self.warmup_bins]))
+        return bin_db
+
+    def _flush_warmup(self):
+        return self.update(self._start_from_warmup())
+
+
+def bin_power_db(samples, bin_samples):
+    """Moc [dB] binów po bin_samples próbek (ostatni niepełny pomijany)."""
+    n = len(samples) // bin_samples
+    power = samples[:n * bin_samples].real ** 2 + samples[:n * bin_samples].imag ** 2
+    return 10.0 * np.log10(np.maximum(power.reshape(n, bin_samples).mean(axis=1), 1e-12))
+
+
+def refine_change_point(reader, start_sample, end_sample, level_before, level_after):
+    """Próbka zmiany poziomu mocy w oknie [start_sample, end_sample) - czytane jest tylko to okno.
+
+    Model: moc próbki |IQ|² wykładnicza o średniej level_before przed zmianą i level_after po.
+    Moment zmiany maksymalizuje log-wiarygodność, czyli minimalizuje skumulowaną sumę LLR
+    od początku okna. Poziomy w tych samych jednostkach co reader.read(normalize=False).
+    """
+    start_sample = max(0, int(start_sample))
+    samples = reader.read(start_sample, max(0, end_sample - start_sample), normalize=False)
+    if len(samples) == 0 or level_before <= 0 or level_after <= 0 or level_before == level_after:
+        return start_sample
+    power = samples.real.astype(np.float64) ** 2 + samples.imag.astype(np.float64) ** 2
+    llr = np.log(level_before / level_after) + power * (1.0 / level_before - 1.0 / level_after)
+    prefix = np.concatenate(([0.0], np.cumsum(llr)))
+    return start_sample + int(np.argmin(prefix))
+
+
+def refine_intervals(reader, starts, ends, chunk_samples, powers, margin_chunks=1):
+    """Dokładne (co do próbki) granice przedziałów wysokiej mocy wyznaczonych na chunkach.
+
+    starts/ends - przedziały [start, end) w chunkach (np. z high_power_runs), powers - średnia
+    moc chunków. Czytane są tylko okna margin_chunks chunków wokół każdej granicy.
+    Zwraca listę (start_sample, end_sample).
+    """
+    powers = np.asarray(powers, dtype=np.float64)
+    num_chunks = len(powers)
+    refined = []
+    for s, e in zip(starts, ends):
+        s, e = int(s), int(e)
+        inside = float(np.median(powers[s:e]))
+
+        if s > 0:
+            # Tło: najniższa moc chunków tuż przed przedziałem (mniej zależna od częściowego chunka)
+            before = float(powers[max(0, s - 1 - margin_chunks):s].min())
+            start_sample = refine_change_point(reader, (s - margin_chunks) * chunk_samples,
+                                               (s + margin_chunks) * chunk_samples, before, inside)
+        else:
+            start_sample = 0
+
+        if e < num_chunks:
+            after = float(powers[e:e + 1 + margin_chunks].min())
+            end_sample = refine_change_point(reader, (e - margin_chunks) * chunk_samples,
+                                             (e + margin_chunks) * chunk_samples, inside, after)
+        else:
+            end_sample = reader.num_samples
+        refined.append((start_sample, max(end_sample, start_sample)))
+    return refined
+
+
+def detect_onsets(reader, bin_samples=DEFAULT_BIN_SAMPLES, shift_db=6.0, baseline_db=None,
+                  read_samples=1 << 21, first_only=False):
+    """Zgrubny CUSUM po binach całego pliku (strumieniowo), potem doprecyzowanie przejść.
+
+    Zwraca listę (start_sample, end_sample) zakłóceń; first_only=True kończy czytanie
+    po pierwszym wykrytym początku (koniec = None).
+    """
+    read_samples -= read_samples % bin_samples
+    detector = CusumDetector(shift_db=shift_db, baseline_db=baseline_db)
+    transitions = []
+    for _, chunk in reader.iter_chunks(read_samples, normalize=False):
+        transitions.extend(detector.update(bin_power_db(chunk, bin_samples)))
+        if first_only and any(kind == 'start' for kind, _ in transitions):
+            break
+    else:
+        transitions.extend(detector.flush())
+
+    baseline = 10 ** (detector.baseline_db / 10.0) if detector.baseline_db is not None else None
+    level_on = 10 ** ((detector.baseline_db + detector.shift_db) / 10.0) if baseline else None
+    margin = REFINE_MARGIN_BINS * bin_samples
+    events = []
+    for kind, b in transitions:
+        center = b * bin_samples
+        if kind == 'start':
+            # Poziom zakłócenia z binów tuż za przejściem (bez czytania całego przedziału)
+            after = reader.read(center, margin, normalize=False)
+            if len(after):
+                level_on = max(float(np.mean(after.real ** 2 + after.imag ** 2)), level_on)
+            events.append([refine_change_point(reader, center - margin, center + margin, baseline, level_on), None])
+            if first_only:
+                break
+        elif events and events[-1][1] is None:
+            end = reader.num_samples if b >= detector.bins_seen else \
+                refine_change_point(reader, center - margin, center + margin, level_on, baseline)
+            events[-1][1] = end
+    return [tuple(event) for event in events]
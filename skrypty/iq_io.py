@@ -0,0 +1,144 @@
+import os
+import numpy as np
+
+# Formaty próbek I/Q: typ składowej, przesunięcie zera, pełna skala
+#   uint8 - RTL-SDR (zero w 127.5)
+#   int8  - HackRF
+#   int16 - BladeRF, USRP, gnss-sdr
+IQ_FORMATS = {
+    'uint8': (np.uint8, 127.5, 127.5),
+    'int8': (np.int8, 0.0, 128.0),
+    'int16': (np.int16, 0.0, 32768.0),
+}
+
+DEFAULT_SAMPLE_RATE = 2048000
+# Domyślny rozmiar okna iteratorów (1M próbek = 8 MB complex64)
+DEFAULT_CHUNK_SAMPLES = 1 << 20
+
+
+def _conversion_lut(dtype_name, normalize):
+    # Dla formatów 8-bitowych konwersja to jedna tablica 256 wartości float32
+    np_dtype, offset, scale = IQ_FORMATS[dtype_name]
+    values = np.arange(256, dtype=np.int64)
+    if np_dtype == np.int8:
+        values = values.astype(np.uint8).view(np.int8)
+    lut = values.astype(np.float32) - np.float32(offset)
+    if normalize:
+        lut /= np.float32(scale)
+    return lut
+
+
+class IQFile:
+    """Plik I/Q (przeplot I, Q) czytany przez mmap - w pamięci jest tylko żądane okno.
+
+    read()/read_time() zwracają complex64; normalize=True skaluje do [-1, 1],
+    normalize=False tylko usuwa przesunięcie zera (np. -127.5 dla RTL-SDR).
+    """
+
+    def __init__(self, file_path, dtype='uint8', sample_rate=DEFAULT_SAMPLE_RATE):
+        if dtype not in IQ_FORMATS:
+            raise ValueError(f"Nieznany format danych: {dtype}")
+        self.file_path = file_path
+        self.dtype = dtype
+        self.sample_rate = sample_rate
+
+        np_dtype = IQ_FORMATS[dtype][0]
+        component_bytes = np.dtype(np_dtype).itemsize
+        # Bez niepełnej próbki na końcu (np. nieparzysty bajt)
+        self.num_samples = os.path.getsize(file_path) // (2 * component_bytes)
+        if self.num_samples > 0:
+            self.raw = np.memmap(file_path, dtype=np_dtype, mode='r', shape=(self.num_samples * 2,))
+        else:
+            self.raw = np.empty(0, dtype=np_dtype)
+        self._luts = {}
+
+    @property
+    def duration(self):
+        return self.num_samples / self.sample_rate
+
+    def close(self):
+        self.raw = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def raw_window(self, start_sample, count):
+        """Surowe składowe (I, Q, I, Q, ...) próbek [start_sample, start_sample + count) - bez kopii."""
+        start_sample, end_sample = self._clip(start_sample, count)
+        return self.raw[2 * start_sample:2 * end_sample]
+
+    def _clip(self, start_sample, count):
+        start_sample = min(max(0, int(start_sample)), self.num_samples)
+        end_sample = self.num_samples if count is None else min(self.num_samples, start_sample + int(count))
+        return start_sample, end_sample
+
+    def read(self, start_sample=0, count=None, normalize=True):
+        """Okno próbek jako complex64 (count=None -> do końca pliku)."""
+        raw = self.raw_window(start_sample, count)
+        components = np.empty(len(raw), dtype=np.float32)
+        if self.dtype == 'int16':
+            np.multiply(raw, np.float32(1.0 / IQ_FORMATS['int16'][2]) if normalize else np.float32(1.0), out=components)
+        else:
+            lut = self._luts.get(normalize)
+            if lut is None:
+                lut = self._luts[normalize] = _conversion_lut(self.dtype, normalize)
+            np.take(lut, raw.view(np.uint8), out=components)
+        # Przeplot float32 (re, im) ma dokładnie układ complex64
+        return components.view(np.complex64)
+
+    def read_time(self, start_sec, duration_sec=None, normalize=True):
+        """Okno po czasie nagrania [s]."""
+        count = None if duration_sec is None else int(round(duration_sec * self.sample_rate))
+        return self.read(int(round(start_sec * self.sample_rate)), count, normalize)
+
+    def iter_chunks(self, chunk_samples=DEFAULT_CHUNK_SAMPLES, start_sample=0, stop_sample=None,
+                    overlap=0, normalize=True):
+        """Generator (pierwsza próbka okna, complex64) kolejnych okien po chunk_samples.
+
+        overlap > 0: każde okno zaczyna się overlap próbek wcześniej (np. dla średniej ruchomej
+        na granicy okien); pierwsza próbka uwzględnia to przesunięcie.
+        """
+        stop_sample = self.num_samples if stop_sample is None else min(stop_sample, self.num_samples)
+        position = max(0, start_sample)
+        while position < stop_sample:
+            first = max(start_sample, position - overlap)
+            count = min(chunk_samples, stop_sample - position) + (position - first)
+            yield first, self.read(first, count, normalize)
+            position += chunk_samples
+
+    def iter_raw_chunks(self, chunk_samples=DEFAULT_CHUNK_SAMPLES, start_sample=0, stop_sample=None):
+        """Jak iter_chunks, ale surowe składowe (widok mmap, bez konwersji)."""
+        stop_sample = self.num_samples if stop_sample is None else min(stop_sample, self.num_samples)
+        for position in range(max(0, start_sample), stop_sample, chunk_samples):
+            yield position, self.raw_window(position, min(chunk_samples, stop_sample - position))
+
+
+def count_samples(file_path, dtype='uint8'):
+    """Liczba pełnych próbek I/Q w pliku (bez czytania danych)."""
+    component_bytes = np.dtype(IQ_FORMATS[dtype][0]).itemsize
+    return os.path.getsize(file_path) // (2 * component_bytes)
+
+
+def mean_amplitude_after_threshold(file_path, threshold, dtype='uint8', chunk_samples=DEFAULT_CHUNK_SAMPLES):
+    """Pierwsza próbka z |IQ| > threshold (skala [-1, 1]) i średnia amplituda od niej do końca pliku.
+
+    Zwraca (indeks, średnia) albo (None, None), jeśli próg nie został przekroczony.
+    """
+    turn_on_index = None
+    amplitude_sum = 0.0
+    with IQFile(file_path, dtype) as reader:
+        for first, chunk in reader.iter_chunks(chunk_samples):
+            amplitude = np.abs(chunk)
+            if turn_on_index is None:
+                above = np.flatnonzero(amplitude > threshold)
+                if len(above) == 0:
+                    continue
+                turn_on_index = first + int(above[0])
+                amplitude = amplitude[above[0]:]
+            amplitude_sum += float(np.sum(amplitude, dtype=np.float64))
+        if turn_on_index is None:
+            return None, None
+        return turn_on_index, amplitude_sum / (reader.num_samples - turn_on_index)
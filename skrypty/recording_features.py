@@ -0,0 +1,42 @@
+import os
+import sys
+
+# Magazyn cech nagrania (GpsJammerApp/app/feature_store.py) - ten sam cache co worker GUI
+_APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'GpsJammerApp', 'app')
+if _APP_DIR not in sys.path:
+    sys.path.append(_APP_DIR)
+from power_scan import load_or_scan_recording
+from saturation import SATURATION_CLIP_FRACTION, saturated_mask
+
+from iq_io import IQFile, mean_amplitude_after_threshold
+
+
+def recording_features(file_path):
+    """Magazyn cech nagrania uint8 (z cache albo z jednego skanu pliku)."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    return load_or_scan_recording(file_path)[3]
+
+
+def amplitude_after_threshold(file_path, threshold, dtype='uint8', exclude_saturated=True):
+    """Jak iq_io.mean_amplitude_after_threshold, ale pełne chunki z magazynu cech.
+
+    exclude_saturated=True pomija chunki z nasyconym ADC (amplituda obcięta zaniża RSSI,
+    czyli zawyża odległość). Magazyn istnieje tylko dla uint8 - inne formaty czytane są w całości.
+    """
+    if dtype != 'uint8':
+        return mean_amplitude_after_threshold(file_path, threshold, dtype)
+    store = recording_features(file_path)
+    limit = SATURATION_CLIP_FRACTION if exclude_saturated else None
+    with IQFile(file_path, dtype) as reader:
+        turn_on_index, avg_amplitude = store.amplitude_after_threshold(reader, threshold, max_clip_fraction=limit)
+    if turn_on_index is not None:
+        saturated = saturated_mask(store['clip_fraction'][turn_on_index // store.chunk_samples:])
+        if saturated.all():
+            print(f"[SATURACJA] {os.path.basename(file_path)}: cały sygnał po progu nasyca ADC - "
+                  f"amplituda zaniżona, odległość zawyżona.")
+        elif saturated.any():
+            action = "pominięte w średniej" if exclude_saturated else "w średniej (amplituda zaniżona)"
+            print(f"[SATURACJA] {os.path.basename(file_path)}: {int(saturated.sum())} z {len(saturated)} "
+                  f"chunków z nasyconym ADC - {action}.")
+    return turn_on_index, avg_amplitude
@@ -1,6 +1,9 @@
 import numpy as np
 import math
 
+from iq_io import IQFile
+from recording_features import amplitude_after_threshold
+
 # ==============================================================================
 #   KONFIGURACJA I STAŁE
 # ==============================================================================
@@ -24,12 +27,10 @@ METERS_PER_DEGREE_LON = 111320.0
 # ==============================================================================
 
 def read_iq_data(filename):
-  ##Wczytywanie i przetwarzanie IQ w uint8 z pliku  
+  ##Wczytywanie i przetwarzanie IQ w uint8 z pliku (complex64, skala [-1, 1])
     try:
-        raw_data = np.fromfile(filename, dtype=np.uint8)
-        float_data = (raw_data.astype(np.float32) - 127.5) / 127.5
-        complex_data = float_data[0::2] + 1j * float_data[1::2]
-        return complex_data
+        with IQFile(filename) as reader:
+            return reader.read()
     except FileNotFoundError:
         print(f"BŁĄD: Plik '{filename}' nie został znaleziony.")
         return None
@@ -60,12 +61,13 @@ def calculate_distance_from_file(iq_filename,
   ##Obliczanie odległości na podstawie pliku z danymi IQ 
     if verbose:
         print(f"  Analizowanie pliku '{iq_filename}'  ")
-    iq_samples = read_iq_data(iq_filename)
-    if iq_samples is None or len(iq_samples) == 0: return None
-    amplitude = np.abs(iq_samples)
-    turn_on_index = find_change_point(amplitude, threshold)
+    # Pełne chunki z magazynu cech (wspólny cache), z pliku tylko chunki wokół progu
+    try:
+        turn_on_index, avg_amplitude = amplitude_after_threshold(iq_filename, threshold)
+    except FileNotFoundError:
+        print(f"BŁĄD: Plik '{iq_filename}' nie został znaleziony.")
+        return None
     if turn_on_index is not None:
-        avg_amplitude = np.mean(amplitude[turn_on_index:])
         if avg_amplitude == 0: return None
         received_power_db = 10 * np.log10(avg_amplitude**2)
         if verbose:
@@ -4,6 +4,9 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
 from matplotlib.colors import LogNorm
 
+from iq_io import IQFile
+from recording_features import amplitude_after_threshold
+
 # --- KONFIGURACJA ---
 
 # Ścieżki do plików I/Q
@@ -33,10 +36,8 @@ STAR_COLOUR_INTENSITY = 1  # Intensywność kontrastu między kolejnymi gwiazdam
 
 def read_iq_data(filename):
     try:
-        raw_data = np.fromfile(filename, dtype=np.uint8)
-        float_data = (raw_data.astype(np.float32) - 127.5) / 127.5
-        complex_data = float_data[0::2] + 1j * float_data[1::2]
-        return complex_data
+        with IQFile(filename) as reader:
+            return reader.read()
     except FileNotFoundError: return None
 
 def find_change_point(amplitude_data, threshold):
@@ -45,12 +46,10 @@ def find_change_point(amplitude_data, threshold):
 
 def calculate_distance_from_file(iq_filename):
     print(f"--- Analizowanie pliku '{iq_filename}' ---")
-    iq_samples = read_iq_data(iq_filename)
-    if iq_samples is None or len(iq_samples) == 0: return None
-    amplitude = np.abs(iq_samples)
-    turn_on_index = find_change_point(amplitude, SIGNAL_THRESHOLD)
+    try:
+        turn_on_index, avg_amplitude = amplitude_after_threshold(iq_filename, SIGNAL_THRESHOLD)
+    except FileNotFoundError: return None
     if turn_on_index is not None:
-        avg_amplitude = np.mean(amplitude[turn_on_index:])
         if avg_amplitude == 0: return None
         received_power_db = 10 * np.log10(avg_amplitude**2)
         print(f"Sygnał wykryty. Średnia amplituda: {avg_amplitude:.4f}")
@@ -154,4 +153,4 @@ if __name__ == "__main__":
             
     print("\nGenerowanie wykresu...")
     plot_results(ANT0_POS, dist0, ANT1_POS, dist1, grid_x, grid_y, error_grid, distinct_locations, distinct_errors)
-    plt.show()
\ No newline at end of file
+    plt.show()
\ No newline at end of file
@@ -2,6 +2,9 @@ import numpy as np
 from scipy import signal
 import math
 
+from iq_io import IQFile
+from change_point import detect_onsets
+
 # --- KONFIGURACJA ---
 # TODO: Dostosować wartości dla dokładnośći
 
@@ -25,28 +28,31 @@ DETECTION_THRESHOLD_FACTOR = 50.0
 # 5. Rozmair wycinka korelacji TDOA
 CORRELATION_SLICE_SIZE = 50000 
 
-# 6. Stałe
+# 6. Okno czytania pliku (próbki) - plik nie jest wczytywany w całości
+READ_CHUNK_SAMPLES = 1 << 21
+
+# 7. Stałe
 SPEED_OF_LIGHT = 299792458  # Prędkość światła w m/s
 
 def load_iq_data(filename):
-    """Wczytuje dane I/Q z pliku binarnego (format rtl-sdr: uint8) i konwertuje je do liczb zespolonych."""
-    raw_data = np.fromfile(filename, dtype=np.uint8)
-    iq_data = (raw_data[0::2].astype(np.float32) - 127.5) + 1j * (raw_data[1::2].astype(np.float32) - 127.5)
-    return iq_data
-
-def find_interference_start(iq_data, noise_samples, window_size, threshold_factor):
-    """Znajduje indeks próbki, gdzie moc sygnału gwałtownie wzrasta."""
-    if len(iq_data) < noise_samples + window_size: return -1
-    power = np.abs(iq_data)**2
-    noise_power = np.mean(power[:noise_samples])
+    """Otwiera plik I/Q (format rtl-sdr: uint8) - próbki complex64 czytane oknami przez mmap."""
+    return IQFile(filename, 'uint8', SAMPLE_RATE)
+
+def find_interference_start(reader, noise_samples, window_size, threshold_factor):
+    """Znajduje indeks próbki, gdzie moc sygnału gwałtownie wzrasta.
+
+    CUSUM na mocy okien po window_size próbek (wzrost o threshold_factor względem szumu),
+    potem dokładna próbka zmiany z okna wokół wykrytego przejścia. Czytanie pliku
+    kończy się na pierwszym wykrytym początku.
+    """
+    if reader.num_samples < noise_samples + window_size: return -1
+    noise_power = np.mean(np.abs(reader.read(0, noise_samples, normalize=False))**2)
     if noise_power == 0: noise_power = 1e-9
-    moving_avg_power = np.convolve(power, np.ones(window_size)/window_size, mode='valid')
-    detection_threshold = noise_power * threshold_factor
-    start_indices = np.where(moving_avg_power > detection_threshold)[0]
-    if len(start_indices) > 0:
-        return start_indices[0] + window_size // 2
-    else:
-        return -1
+    onsets = detect_onsets(
+        reader, bin_samples=window_size, shift_db=10 * np.log10(threshold_factor),
+        baseline_db=10 * np.log10(noise_power), read_samples=READ_CHUNK_SAMPLES, first_only=True
+    )
+    return onsets[0][0] if onsets else -1
 
 if __name__ == "__main__":
     print("Wczytywanie danych I/Q...")
@@ -71,14 +77,14 @@ if __name__ == "__main__":
     
     # --- KROK 2: OBLICZENIE TDOA NA KRÓTKIM WYCINKU SYGNAŁU ---
     # Sprawdzenie, czy mamy wystarczająco dużo danych na wycinek
-    if len(signal0_full) < start0 + CORRELATION_SLICE_SIZE or \
-       len(signal1_full) < start1 + CORRELATION_SLICE_SIZE:
+    if signal0_full.num_samples < start0 + CORRELATION_SLICE_SIZE or \
+       signal1_full.num_samples < start1 + CORRELATION_SLICE_SIZE:
         print("BŁĄD: Niewystarczająca ilość danych po wykryciu interferencji do analizy.")
         exit()
 
-    # Stwórz wyrównane wycinki
-    signal0_slice = signal0_full[start0 : start0 + CORRELATION_SLICE_SIZE]
-    signal1_slice = signal1_full[start1 : start1 + CORRELATION_SLICE_SIZE]
+    # Stwórz wyrównane wycinki (czytane z pliku tylko w tym zakresie)
+    signal0_slice = signal0_full.read(start0, CORRELATION_SLICE_SIZE, normalize=False)
+    signal1_slice = signal1_full.read(start1, CORRELATION_SLICE_SIZE, normalize=False)
     
     print(f"\nSygnały wyrównane. Przetwarzanie wycinka {CORRELATION_SLICE_SIZE} próbek.")
 
@@ -1,17 +1,20 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import signal
 import os
 
+from recording_features import PSD_BINS, recording_features
+
 # --- KONFIGURACJA ---
 FILENAME = '/home/szymon/Downloads/capture_ruch10.bin'  # Zmień na nazwę pliku
 SAMPLE_RATE = 2.048e6           # 2.048 MSps
 CHUNK_SIZE = int(SAMPLE_RATE)   # Analizujemy 1 sekundę na raz (jako jeden "pasek" wykresu)
-FFT_SIZE = 1024                 # Rozdzielczość częstotliwościowa (szerokość wykresu)
+FFT_SIZE = PSD_BINS             # Rozdzielczość częstotliwościowa - zgrubne widmo z magazynu cech
 
 def analyze_full_file(filename):
     file_size = os.path.getsize(filename)
-    total_samples = file_size // 2 # 2 bajty na próbkę (I+Q)
+    # Widmo i histogram z magazynu cech (jeden skan pliku, potem cache)
+    store = recording_features(filename)
+    total_samples = store.total_samples # 2 bajty na próbkę (I+Q)
     duration_sec = total_samples / SAMPLE_RATE
     
     print(f"Analiza pliku: {filename}")
@@ -19,42 +22,10 @@ def analyze_full_file(filename):
     print(f"Czas trwania: {duration_sec:.2f} sekund")
     print("Przetwarzanie... to może chwilę potrwać.")
 
-    # Przygotowanie tablic na wyniki
-    spectrogram_data = []
-    histogram_samples = [] # Weźmiemy próbki losowo do histogramu
-    
-    with open(filename, 'rb') as f:
-        while True:
-            # Czytamy kawałek (CHUNK) - np. 1 sekundę
-            raw_chunk = np.fromfile(f, dtype=np.uint8, count=CHUNK_SIZE * 2)
-            
-            if len(raw_chunk) < FFT_SIZE * 2:
-                break # Koniec pliku
-
-            # Zbieranie próbek do histogramu (bierzemy co 100-tną próbkę, żeby nie zapchać pamięci, ale mieć reprezentację całości)
-            histogram_samples.extend(raw_chunk[::100])
-
-            # Konwersja na zespolone
-            raw_chunk = raw_chunk.astype(np.float32)
-            i = (raw_chunk[0::2] - 127.5) / 127.5
-            q = (raw_chunk[1::2] - 127.5) / 127.5
-            complex_chunk = i + 1j * q
-            
-            # Usunięcie DC offset (dla danego kawałka)
-            complex_chunk = complex_chunk - np.mean(complex_chunk)
-
-            # Obliczenie PSD (widma) dla tego kawałka czasu
-            # Używamy Welcha, żeby wygładzić szum w obrębie tej 1 sekundy
-            f_axis, Pxx = signal.welch(complex_chunk, SAMPLE_RATE, nperseg=FFT_SIZE, return_onesided=False)
-            
-            # Shift i Logarytm
-            Pxx = np.fft.fftshift(Pxx)
-            Pxx_db = 10 * np.log10(Pxx + 1e-15)
-            
-            spectrogram_data.append(Pxx_db)
-
-    # Konwersja listy na macierz 2D (Czas x Częstotliwość)
-    spectrogram_array = np.array(spectrogram_data)
+    # Wiersz wodospadu = średnie widmo chunków z 1 sekundy (DC chunków usunięte w magazynie)
+    Pxx = store.rows_by_time('psd', CHUNK_SIZE)
+    # Macierz 2D (Czas x Częstotliwość)
+    spectrogram_array = 10 * np.log10(Pxx + 1e-15)
     
     # --- RYSOWANIE ---
     fig = plt.figure(figsize=(12, 10))
@@ -82,8 +53,10 @@ def analyze_full_file(filename):
 
     # 3. HISTOGRAM (Z próbek z całego pliku)
     ax3 = fig.add_subplot(gs[2])
-    ax3.hist(histogram_samples, bins=256, range=(0, 256), color='green', alpha=0.7, density=True)
-    ax3.set_title('Histogram (Reprezentatywny dla całego pliku)')
+    # Histogram wszystkich bajtów I i Q (nie próbki co 100-tnej)
+    histogram = store.histogram().astype(np.float64)
+    ax3.bar(np.arange(256), histogram / max(histogram.sum(), 1), width=1.0, align='edge', color='green', alpha=0.7)
+    ax3.set_title('Histogram (Cały plik)')
     ax3.set_xlabel('Wartość surowa (0-255)')
     ax3.axvline(0, color='red', linestyle='--')
     ax3.axvline(255, color='red', linestyle='--')